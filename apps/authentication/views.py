@@ -14,6 +14,8 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from datetime import timedelta
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.db import transaction
+import logging
 import secrets
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -27,10 +29,30 @@ from .serializers import (
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
 
 
+logger = logging.getLogger(__name__)
+
+
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
 
+def enqueue_feed_warmup(user):
+    """
+    Encola el precalentamiento del feed tras el commit de la petición
+    Si el broker no está disponible el login continúa sin precalentar
+    """
+    from apps.feed.tasks import warm_feed_task
+
+    def enqueue():
+        try:
+            # Es opcional: sin reintentos para no demorar el login
+            warm_feed_task.apply_async((user.pk,), retry=False)
+        except Exception as exc:
+            logger.warning('No se pudo encolar warm_feed_task: %s', exc)
+
+    transaction.on_commit(enqueue)
+
+
 def get_client_ip(request):
     """
     Obtener IP del cliente
@@ -141,6 +163,9 @@ def login_view(request):
                 else:
                     request.session.set_expiry(1209600)  # 2 semanas
                 
+                # Precalentar el feed mientras se sigue la redirección
+                enqueue_feed_warmup(user)
+                
                 # Registrar inicio de sesión
                 LoginHistory.objects.create(
                     user=user,
@@ -4,4 +4,10 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.feed'
-    verbose_name = 'Feed'
\ No newline at end of file
+    verbose_name = 'Feed'
+    
+    def ready(self):
+        """
+        Importar signals cuando la app esté lista
+        """
+        import apps.feed.signals
@@ -0,0 +1,38 @@
+"""
+Recalcula las puntuaciones de relevancia del feed
+Uso: python manage.py compute_feed_scores [--user USERNAME]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.models import User
+from apps.feed.ranking import compute_feed_scores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula en lote las puntuaciones del modo "destacados" del feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Recalcular solo el timeline de este username'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+
+        if options['user']:
+            user_ids = list(
+                User.objects.filter(username=options['user']).values_list('pk', flat=True)
+            )
+            if not user_ids:
+                raise CommandError(f"El usuario '{options['user']}' no existe")
+
+        started = time.perf_counter()
+        updated = compute_feed_scores(user_ids=user_ids)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} entrada(s) puntuada(s) en {elapsed:.2f}s'
+        ))
@@ -0,0 +1,39 @@
+"""
+Reconstruye los timelines materializados del feed
+Uso: python manage.py rebuild_timelines [--user USERNAME] [--limit N]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.models import User
+from apps.feed.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los timelines del feed a partir de los posts existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Reconstruir solo el timeline de este username'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Número máximo de posts por timeline'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"El usuario '{options['user']}' no existe")
+
+        total = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            rebuild_timeline(user_id, limit=options['limit'])
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{total} timeline(s) reconstruido(s)'))
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("posts", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="creado")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="autor",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="posts.post",
+                        verbose_name="publicación",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="usuario",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "entrada de timeline",
+                "verbose_name_plural": "entradas de timeline",
+                "ordering": ["-created_at", "-post_id"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-created_at", "-post"],
+                        name="feed_timeline_user_created_idx",
+                    ),
+                    models.Index(
+                        fields=["user", "author"], name="feed_timeline_user_author_idx"
+                    ),
+                ],
+                "unique_together": {("user", "post")},
+            },
+        ),
+    ]
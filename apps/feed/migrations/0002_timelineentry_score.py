@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feed", "0001_initial"),
+        ("posts", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timelineentry",
+            name="score",
+            field=models.FloatField(default=0.0, verbose_name="puntuación"),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["user", "-score", "-post"], name="feed_timeline_user_score_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+"""
+Modelos del feed para UnicoNet
+Timeline materializado por usuario (fan-out on write)
+"""
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class TimelineEntry(models.Model):
+    """
+    Entrada del timeline de un usuario
+    Se crea al publicar un post (para el autor y sus amigos) y se elimina
+    cuando el post se archiva, se vuelve privado o termina la amistad
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name=_('usuario')
+    )
+
+    post = models.ForeignKey(
+        'posts.Post',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name=_('publicación')
+    )
+
+    # Desnormalizado para limpiar entradas al terminar una amistad
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('autor')
+    )
+
+    # Copia de post.created_at para ordenar sin unir con posts_post
+    created_at = models.DateTimeField(_('creado'))
+
+    # Puntuación de relevancia para el modo "destacados"
+    # (la recalcula periódicamente apps.feed.ranking)
+    score = models.FloatField(_('puntuación'), default=0.0)
+
+    class Meta:
+        verbose_name = _('entrada de timeline')
+        verbose_name_plural = _('entradas de timeline')
+        ordering = ['-created_at', '-post_id']
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at', '-post'],
+                name='feed_timeline_user_created_idx'
+            ),
+            models.Index(
+                fields=['user', '-score', '-post'],
+                name='feed_timeline_user_score_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} en timeline de {self.user_id}"
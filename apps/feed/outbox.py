@@ -0,0 +1,43 @@
+"""
+Manejadores del outbox para el módulo de feed
+El fan-out es idempotente: las entradas existentes se ignoran
+"""
+from apps.outbox.dispatch import register
+from .timeline import backfill_friend_entries, sync_post
+
+
+def _get_post(payload):
+    from apps.posts.models import Post
+
+    return Post.objects.filter(pk=payload['post_id']).first()
+
+
+@register('post.created')
+def fanout_post_created(payload):
+    """
+    Copia el post nuevo a los timelines de los amigos del autor
+    """
+    post = _get_post(payload)
+    if post is not None:
+        sync_post(post, created=True)
+
+
+@register('post.updated')
+def fanout_post_updated(payload):
+    """
+    Resincroniza el timeline de un post cuya visibilidad cambió
+    """
+    if not payload.get('timeline'):
+        return
+
+    post = _get_post(payload)
+    if post is not None:
+        sync_post(post)
+
+
+@register('friendship.created')
+def backfill_new_friendship(payload):
+    """
+    Copia los posts recientes de cada nuevo amigo al timeline del otro
+    """
+    backfill_friend_entries(payload['user1_id'], payload['user2_id'])
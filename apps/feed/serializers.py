@@ -0,0 +1,64 @@
+"""
+Serialización compacta del feed para la API JSON (/feed/api/)
+Funciones simples sobre diccionarios: los posts llegan ya hidratados
+por hydrate_posts, así que serializar no ejecuta consultas
+"""
+
+
+def get_viewer_reactions(user, posts):
+    """
+    Reacción del lector a cada post de la página (una sola consulta)
+
+    Returns:
+        dict: {post_id: reaction_type}
+    """
+    from apps.likes.models import get_user_reactions
+
+    return get_user_reactions(user, posts)
+
+
+def serialize_author(user):
+    profile = getattr(user, 'profile', None)
+    image = getattr(profile, 'profile_image', None)
+
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'name': user.get_full_name(),
+        'avatar': image.url if image else None,
+    }
+
+
+def serialize_post(post, reaction=None):
+    """
+    Representación compacta de un post para el feed
+    """
+    return {
+        'id': post.pk,
+        'author': serialize_author(post.author),
+        'content': post.content,
+        'privacy': post.privacy,
+        'created_at': post.created_at.isoformat(),
+        'updated_at': post.updated_at.isoformat(),
+        'shared_post_id': post.shared_post_id,
+        'counts': {
+            'likes': post.likes_count,
+            'comments': post.comments_count,
+            'shares': post.shares_count,
+        },
+        'images': [image.image.url for image in post.images.all()],
+        'videos': [
+            {
+                'url': video.video.url,
+                'thumbnail': video.thumbnail.url if video.thumbnail else None,
+            }
+            for video in post.videos.all()
+        ],
+        'reaction': reaction,
+        'url': post.get_absolute_url(),
+    }
+
+
+def serialize_posts(user, posts):
+    reactions = get_viewer_reactions(user, posts)
+    return [serialize_post(post, reactions.get(post.pk)) for post in posts]
@@ -0,0 +1,30 @@
+"""
+Signals para el módulo de feed
+Mantiene los timelines materializados cuando terminan las amistades
+o se eliminan publicaciones
+Las altas (fan-out y backfill) se procesan en el outbox (ver apps/feed/outbox.py)
+"""
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from apps.friends.models import Friendship
+from apps.posts.models import Post
+from .timeline import invalidate_pull_sources, remove_friend_entries, remove_post
+
+
+@receiver(post_delete, sender=Friendship)
+def friendship_timeline_deleted(sender, instance, **kwargs):
+    """
+    Elimina del timeline los posts del ex-amigo
+    """
+    remove_friend_entries(instance.user1_id, instance.user2_id)
+
+
+@receiver(pre_delete, sender=Post)
+def post_timeline_deleted(sender, instance, **kwargs):
+    """
+    Quita el post de los timelines antes del borrado en cascada
+    para invalidar sus cabeceras y las caches pull
+    """
+    remove_post(instance.pk)
+    invalidate_pull_sources(instance)
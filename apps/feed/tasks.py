@@ -0,0 +1,57 @@
+"""
+Tareas asíncronas (Celery) del módulo de feed
+"""
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def compute_feed_scores_task():
+    """
+    Recalcula las puntuaciones del modo "destacados"
+    Programada en CELERY_BEAT_SCHEDULE
+    """
+    from .ranking import compute_feed_scores
+
+    updated = compute_feed_scores()
+    logger.info('feed.ranking entradas_actualizadas=%s', updated)
+
+
+@shared_task(ignore_result=True)
+def warm_feed_task(user_id):
+    """
+    Precalienta la cache del feed de un usuario recién autenticado
+    - IDs de amigos y solicitudes pendientes (barra lateral)
+    - Primera página del timeline
+    - Fragmentos cacheados de las tarjetas de esa página
+    Se encola desde authentication.views.login_view
+    """
+    from django.conf import settings
+    from django.template.loader import render_to_string
+
+    from apps.authentication.models import User
+    from apps.friends.models import get_friend_ids, get_pending_requests_count
+    from apps.posts.cards import prepare_post_cards
+    from .timeline import get_first_page
+
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return
+
+    get_friend_ids(user)
+    get_pending_requests_count(user)
+
+    per_page = settings.UNICONET_CONFIG.get('POSTS_PER_PAGE', 20)
+    rows, posts, has_more = get_first_page(user, per_page)
+
+    # Renderizar las tarjetas llena los fragmentos {% cache %}, que no
+    # dependen del lector; la parte por lector se descarta
+    for post in prepare_post_cards(posts, user):
+        render_to_string('posts/components/post_card.html', {'post': post, 'user': user})
+
+    logger.info('feed.warm user=%s posts=%s', user_id, len(posts))
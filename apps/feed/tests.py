@@ -0,0 +1,306 @@
+"""
+Tests del módulo de feed
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.friends.models import Friendship
+from apps.outbox.dispatch import process_outbox
+from apps.profiles.models import UserProfile
+from utils import counters
+from utils.testing import make_post, make_user
+
+from .models import TimelineEntry
+from .timeline import (
+    backfill_friend_entries, get_initial_score, get_timeline_page, is_high_fanout, push_post,
+    rebuild_timeline
+)
+
+
+def timeline_post_ids(user):
+    return set(TimelineEntry.objects.filter(user=user).values_list('post_id', flat=True))
+
+
+# ============================================================================
+# FAN-OUT
+# ============================================================================
+
+class FanoutTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('autor')
+        self.friend = make_user('amigo')
+        self.stranger = make_user('desconocido')
+        Friendship.objects.create(user1=self.author, user2=self.friend)
+        self.post = make_post(self.author)
+        process_outbox()
+
+    def recipients(self):
+        return set(TimelineEntry.objects.filter(post=self.post).values_list('user_id', flat=True))
+
+    def test_new_post_reaches_author_and_friends(self):
+        self.assertEqual(self.recipients(), {self.author.pk, self.friend.pk})
+
+    def test_fanout_is_idempotent(self):
+        push_post(self.post)
+
+        self.assertEqual(TimelineEntry.objects.filter(post=self.post).count(), 2)
+
+    def test_post_made_private_stays_with_author(self):
+        self.post.privacy = 'private'
+        self.post.save()
+        process_outbox()
+
+        self.assertEqual(self.recipients(), {self.author.pk})
+
+    def test_archived_post_leaves_every_timeline(self):
+        self.post.is_archived = True
+        self.post.save()
+        process_outbox()
+
+        self.assertEqual(self.recipients(), set())
+
+    def test_deleted_post_leaves_every_timeline(self):
+        post_id = self.post.pk
+        self.post.delete()
+
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post_id).exists())
+
+    def test_ended_friendship_removes_the_other_posts(self):
+        own = make_post(self.friend)
+        process_outbox()
+        self.assertIn(own.pk, timeline_post_ids(self.author))
+
+        Friendship.objects.get(user1=self.author, user2=self.friend).delete()
+
+        self.assertEqual(timeline_post_ids(self.friend), {own.pk})
+        self.assertEqual(timeline_post_ids(self.author), {self.post.pk})
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+class BackfillScoreTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reader = make_user('lector')
+        self.author = make_user('autor')
+        self.post = make_post(self.author)
+
+    def scores(self):
+        return list(
+            TimelineEntry.objects.filter(user=self.reader).values_list('score', flat=True)
+        )
+
+    def test_new_friendship_backfills_with_base_score(self):
+        backfill_friend_entries(self.reader, self.author)
+
+        self.assertEqual(self.scores(), [get_initial_score()])
+
+    def test_rebuilt_timeline_uses_base_score(self):
+        Friendship.objects.create(user1=self.reader, user2=self.author)
+        rebuild_timeline(self.reader)
+
+        self.assertEqual(self.scores(), [get_initial_score()])
+
+
+# ============================================================================
+# UMBRAL DE FAN-OUT
+# ============================================================================
+
+@override_settings(UNICONET_CONFIG={**settings.UNICONET_CONFIG, 'FEED_FANOUT_THRESHOLD': 1})
+class FanoutThresholdTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('autor')
+        self.friends = [make_user('ana'), make_user('beto')]
+        for friend in self.friends:
+            Friendship.objects.create(user1=self.author, user2=friend)
+
+    def apply_friends(self, delta):
+        # Lo que hace el flush de utils.counters al aplicar friends_count
+        with self.captureOnCommitCallbacks(execute=True):
+            counters._apply('profile.friends', {self.author.pk: delta})
+
+    def test_crossing_is_seen_without_waiting_for_the_cache(self):
+        self.assertFalse(is_high_fanout(self.author.pk))
+
+        self.apply_friends(2)
+        self.assertTrue(is_high_fanout(self.author.pk))
+
+        self.apply_friends(-1)
+        self.assertFalse(is_high_fanout(self.author.pk))
+
+    def test_posts_from_pull_mode_are_backfilled(self):
+        self.apply_friends(2)
+        post = make_post(self.author)
+        push_post(post)
+        for friend in self.friends:
+            self.assertNotIn(post.pk, timeline_post_ids(friend))
+
+        # Vuelve a quedar bajo el umbral: sus amigos ya no lo leen en pull
+        self.apply_friends(-1)
+
+        for friend in self.friends:
+            self.assertIn(post.pk, timeline_post_ids(friend))
+        # Con la puntuación base, no con el 0.0 del modelo
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post=post).values_list('score', flat=True)),
+            {get_initial_score()}
+        )
+
+    def test_raising_above_threshold_moves_posts_to_pull(self):
+        self.apply_friends(1)
+        post = make_post(self.author)
+        push_post(post)
+        self.assertIn(post.pk, timeline_post_ids(self.friends[0]))
+
+        self.apply_friends(1)
+
+        self.assertNotIn(post.pk, timeline_post_ids(self.friends[0]))
+        self.assertIn(post.pk, timeline_post_ids(self.author))
+
+
+# ============================================================================
+# MODO TOP
+# ============================================================================
+
+@override_settings(UNICONET_CONFIG={**settings.UNICONET_CONFIG, 'FEED_FANOUT_THRESHOLD': 1})
+class TopModeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reader = make_user('lector')
+        self.friend = make_user('amigo')
+        self.popular = make_user('popular')
+        for author in (self.friend, self.popular):
+            Friendship.objects.create(user1=self.reader, user2=author)
+        # Sobre el umbral: sus posts se leen en modo pull
+        UserProfile.objects.filter(user=self.popular).update(friends_count=5)
+
+    def publish(self, author, **fields):
+        post = make_post(author, **fields)
+        push_post(post)
+        return post
+
+    def walk(self, limit, between_pages=None, **kwargs):
+        seen = []
+        rows, posts, has_more = get_timeline_page(self.reader, limit, mode='top', **kwargs)
+        while True:
+            seen.extend(post.pk for post in posts)
+            if not has_more:
+                return seen
+            if between_pages:
+                between_pages()
+            rows, posts, has_more = get_timeline_page(
+                self.reader, limit, before=rows[-1], mode='top', **kwargs
+            )
+
+    def test_includes_pull_sources(self):
+        pushed = self.publish(self.friend)
+        pulled = self.publish(self.popular)
+        public = self.publish(make_user('desconocido'))
+
+        self.assertCountEqual(self.walk(10), [pushed.pk, pulled.pk])
+        self.assertCountEqual(
+            self.walk(10, include_public=True), [pushed.pk, pulled.pk, public.pk]
+        )
+
+    def test_pages_survive_score_changes(self):
+        posts = [self.publish(self.friend) for _ in range(5)] + [self.publish(self.popular)]
+        entries = TimelineEntry.objects.filter(user=self.reader)
+
+        def rescore():
+            # Un recálculo invierte el orden entre una página y la siguiente
+            for entry in entries:
+                entry.score = 100.0 - entry.score - entry.post_id
+                entry.save(update_fields=['score'])
+
+        seen = self.walk(2, between_pages=rescore)
+
+        self.assertCountEqual(seen, [post.pk for post in posts])
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_rebuilt_snapshot_continues_after_last_post(self):
+        for _ in range(4):
+            self.publish(self.friend)
+
+        rows, first, _ = get_timeline_page(self.reader, 2, mode='top')
+        cache.clear()
+        _, rest, _ = get_timeline_page(self.reader, 10, before=rows[-1], mode='top')
+
+        self.assertEqual(len({post.pk for post in first + rest}), 4)
+
+
+# ============================================================================
+# API JSON
+# ============================================================================
+
+class FeedApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reader = make_user('lector')
+        self.friend = make_user('amigo')
+        Friendship.objects.create(user1=self.reader, user2=self.friend)
+        self.posts = [make_post(self.friend) for _ in range(3)]
+        process_outbox()
+        self.client.force_login(self.reader)
+
+    def get(self, url_name='feed:api', etag=None, **params):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse(url_name), params, **headers)
+
+    def test_unchanged_feed_answers_304_without_reading_it(self):
+        etag = self.get()['ETag']
+
+        with mock.patch('apps.feed.views.get_timeline_page') as get_page:
+            response = self.get(etag=etag)
+
+        self.assertEqual(response.status_code, 304)
+        get_page.assert_not_called()
+
+    def test_new_post_changes_the_etag(self):
+        etag = self.get()['ETag']
+
+        make_post(self.friend)
+        process_outbox()
+
+        self.assertEqual(self.get(etag=etag).status_code, 200)
+
+    def test_etag_depends_on_the_parameters(self):
+        self.assertNotEqual(self.get()['ETag'], self.get(limit=1)['ETag'])
+
+    def test_since_id_returns_only_newer_posts(self):
+        data = self.get(since_id=self.posts[0].pk).json()
+
+        self.assertEqual(
+            [post['id'] for post in data['posts']], [self.posts[2].pk, self.posts[1].pk]
+        )
+        self.assertIsNone(data['next_cursor'])
+
+    def test_new_count(self):
+        response = self.get('feed:api_new_count', since_id=self.posts[0].pk)
+
+        self.assertEqual(response.json(), {'count': 2})
+        self.assertEqual(self.get('feed:api_new_count').status_code, 400)
+
+    def test_cursor_walks_the_whole_feed(self):
+        seen = []
+        params = {'limit': 2}
+        while True:
+            data = self.get(**params).json()
+            seen.extend(post['id'] for post in data['posts'])
+            if not data['has_more']:
+                break
+            params['after'] = data['next_cursor']
+
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
@@ -0,0 +1,738 @@
+"""
+Timeline materializado del feed (fan-out on write)
+Cada post se copia al timeline del autor y de sus amigos al publicarse,
+de modo que abrir el feed es una lectura por rango de índice
+
+Estrategia híbrida: los posts de autores con más de FEED_FANOUT_THRESHOLD
+amigos y los posts públicos del campus no se copian; se leen de una cache
+de posts recientes por fuente y se mezclan con el timeline al leer (pull)
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import TimelineEntry
+
+
+FANOUT_BATCH_SIZE = 1000
+
+# Campos cuyo cambio obliga a resincronizar el timeline de un post
+TIMELINE_FIELDS = {'privacy', 'is_archived'}
+
+# Cabecera del timeline: marca de tiempo del contenido más reciente (ETag)
+FEED_HEAD_KEY = 'feed_head_{}'
+
+# Primera página del feed (precalculada al iniciar sesión)
+FIRST_PAGE_KEY = 'feed_first_page_{}_{}'
+
+# Fuentes leídas en modo pull
+HIGH_FANOUT_KEY = 'feed_high_fanout_authors'
+PULL_VERSION_KEY = 'feed_pull_version'
+AUTHOR_RECENT_KEY = 'feed_author_recent_{}'
+PUBLIC_RECENT_KEY = 'feed_public_recent'
+
+# Ranking del modo 'top' de un lector (user_id, include_public)
+TOP_SNAPSHOT_KEY = 'feed_top_snapshot_{}_{}'
+
+
+def get_feed_config(key, default=None):
+    """
+    Lee una opción del feed desde UNICONET_CONFIG
+    """
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+# ============================================================================
+# ESCRITURA (FAN-OUT)
+# ============================================================================
+
+def get_initial_score():
+    """
+    Puntuación de una entrada nueva hasta el próximo compute_feed_scores
+    Con el 0.0 del modelo los posts recién copiados quedarían al final del
+    modo 'top'
+    """
+    return get_feed_config('FEED_RANKING', {}).get('BASE', 1.0)
+
+
+def get_recipient_ids(post):
+    """
+    Usuarios cuyo timeline debe contener el post
+    - Archivado: nadie
+    - Privado: solo el autor
+    - Público o amigos: el autor y sus amigos, salvo que el autor supere
+      FEED_FANOUT_THRESHOLD (sus amigos leen el post en modo pull)
+    """
+    if post.is_archived:
+        return []
+
+    if post.privacy == 'private' or is_high_fanout(post.author_id):
+        return [post.author_id]
+
+    from apps.friends.models import get_friend_ids
+
+    return [post.author_id] + get_friend_ids(post.author_id)
+
+
+def push_post(post, recipient_ids=None):
+    """
+    Inserta el post en el timeline de los destinatarios
+    Es idempotente: las entradas existentes se ignoran
+    """
+    if recipient_ids is None:
+        recipient_ids = get_recipient_ids(post)
+
+    initial_score = get_initial_score()
+
+    entries = [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            created_at=post.created_at,
+            score=initial_score
+        )
+        for user_id in recipient_ids
+    ]
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    invalidate_feed_heads(recipient_ids)
+
+
+def sync_post(post, created=False):
+    """
+    Ajusta el timeline tras crear o editar un post
+    Elimina las entradas que ya no corresponden y agrega las que faltan
+    """
+    recipient_ids = get_recipient_ids(post)
+    invalidate_pull_sources(post, public=not created or post.privacy == 'public')
+
+    if post.is_archived:
+        remove_post(post.pk)
+        return
+
+    if post.privacy == 'private':
+        remove_post(post.pk, keep_user_id=post.author_id)
+
+    push_post(post, recipient_ids)
+
+
+def remove_post(post_id, keep_user_id=None):
+    """
+    Quita un post de los timelines (opcionalmente salvo el de un usuario)
+    """
+    entries = TimelineEntry.objects.filter(post_id=post_id)
+    if keep_user_id is not None:
+        entries = entries.exclude(user_id=keep_user_id)
+
+    invalidate_feed_heads(entries.values_list('user_id', flat=True))
+    entries.delete()
+
+
+def remove_friend_entries(user1, user2):
+    """
+    Elimina de cada timeline los posts del otro usuario
+    Se llama cuando termina una amistad
+    """
+    user1_id = getattr(user1, 'pk', user1)
+    user2_id = getattr(user2, 'pk', user2)
+
+    TimelineEntry.objects.filter(
+        Q(user_id=user1_id, author_id=user2_id) |
+        Q(user_id=user2_id, author_id=user1_id)
+    ).delete()
+    invalidate_feed_heads([user1_id, user2_id])
+
+
+def backfill_friend_entries(user1, user2, limit=None):
+    """
+    Copia los posts recientes de cada usuario al timeline del otro
+    Se llama cuando se crea una amistad
+    """
+    from apps.posts.models import Post
+
+    if limit is None:
+        limit = get_feed_config('FEED_BACKFILL_POSTS', 50)
+
+    initial_score = get_initial_score()
+    user1_id = getattr(user1, 'pk', user1)
+    user2_id = getattr(user2, 'pk', user2)
+
+    for author_id, recipient_id in ((user1_id, user2_id), (user2_id, user1_id)):
+        if is_high_fanout(author_id):
+            continue
+
+        recent = Post.objects.filter(
+            author_id=author_id,
+            privacy__in=['public', 'friends'],
+            is_archived=False
+        ).order_by('-created_at').values_list('pk', 'created_at')[:limit]
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=recipient_id,
+                    post_id=post_id,
+                    author_id=author_id,
+                    created_at=created_at,
+                    score=initial_score
+                )
+                for post_id, created_at in recent
+            ],
+            batch_size=FANOUT_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+    invalidate_feed_heads([user1_id, user2_id])
+
+
+def backfill_author_entries(author_id, limit=None):
+    """
+    Copia los posts recientes de un autor al timeline de todos sus amigos
+    Se llama cuando el autor vuelve a quedar bajo FEED_FANOUT_THRESHOLD: lo
+    que publicó en modo pull no llegó a ningún timeline
+    """
+    from apps.posts.models import Post
+    from apps.friends.models import get_friend_ids
+
+    if limit is None:
+        limit = get_feed_config('FEED_BACKFILL_POSTS', 50)
+
+    initial_score = get_initial_score()
+    friend_ids = get_friend_ids(author_id)
+    recent = list(
+        Post.objects.filter(
+            author_id=author_id,
+            privacy__in=['public', 'friends'],
+            is_archived=False
+        ).order_by('-created_at').values_list('pk', 'created_at')[:limit]
+    )
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=friend_id,
+                post_id=post_id,
+                author_id=author_id,
+                created_at=created_at,
+                score=initial_score
+            )
+            for friend_id in friend_ids
+            for post_id, created_at in recent
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    invalidate_feed_heads(friend_ids)
+
+
+def remove_author_entries(author_id):
+    """
+    Quita los posts de un autor de los timelines ajenos
+    Se llama cuando el autor supera FEED_FANOUT_THRESHOLD: desde entonces
+    sus amigos los leen en modo pull
+    """
+    entries = TimelineEntry.objects.filter(author_id=author_id).exclude(user_id=author_id)
+    invalidate_feed_heads(entries.values_list('user_id', flat=True).distinct())
+    entries.delete()
+
+
+def rebuild_timeline(user, limit=None):
+    """
+    Reconstruye desde cero el timeline de un usuario
+    Útil para poblar timelines de datos existentes
+    """
+    from apps.posts.models import Post
+    from apps.friends.models import get_friend_ids
+
+    if limit is None:
+        limit = get_feed_config('FEED_TIMELINE_LENGTH', 1000)
+
+    initial_score = get_initial_score()
+    user_id = getattr(user, 'pk', user)
+    high_fanout = get_high_fanout_author_ids()
+    friend_ids = [
+        friend_id for friend_id in get_friend_ids(user_id)
+        if friend_id not in high_fanout
+    ]
+
+    posts = Post.objects.filter(
+        Q(author_id=user_id) |
+        Q(author_id__in=friend_ids, privacy__in=['public', 'friends'])
+    ).exclude(
+        is_archived=True
+    ).order_by('-created_at').values_list('pk', 'author_id', 'created_at')[:limit]
+
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                created_at=created_at,
+                score=initial_score
+            )
+            for post_id, author_id, created_at in posts
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    invalidate_feed_heads([user_id])
+
+
+# ============================================================================
+# CABECERA DEL TIMELINE
+# ============================================================================
+
+def invalidate_feed_heads(user_ids):
+    """
+    Descarta la cabecera cacheada de los timelines indicados
+    La próxima lectura la recalcula con una consulta
+    """
+    keys = [FEED_HEAD_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_feed_head(user):
+    """
+    Marca del contenido más reciente del timeline de un usuario
+    Combina el created_at más nuevo y el updated_at más nuevo de sus posts;
+    mientras esté en cache no consulta la base de datos
+
+    Returns:
+        str: token estable mientras el timeline no cambie
+    """
+    user_id = getattr(user, 'pk', user)
+    key = FEED_HEAD_KEY.format(user_id)
+
+    head = cache.get(key)
+    if head is None:
+        latest = TimelineEntry.objects.filter(user_id=user_id).aggregate(
+            created=Max('created_at'),
+            updated=Max('post__updated_at')
+        )
+        # El instante de cálculo distingue cambios que no mueven las marcas
+        # (borrados, reacciones del lector)
+        head = '{}-{}-{}'.format(
+            latest['created'].timestamp() if latest['created'] else 0,
+            latest['updated'].timestamp() if latest['updated'] else 0,
+            timezone.now().timestamp()
+        )
+        cache.set(key, head, settings.CACHE_TIMEOUT.get('feed', 300))
+
+    # Los posts leídos en modo pull no pasan por el timeline del usuario
+    return f'{head}-{cache.get(PULL_VERSION_KEY, 0)}'
+
+
+# ============================================================================
+# PULL (AUTORES CON MUCHOS AMIGOS Y POSTS PÚBLICOS)
+# ============================================================================
+
+def get_high_fanout_author_ids():
+    """
+    Autores cuyo número de amigos supera FEED_FANOUT_THRESHOLD (cacheado)
+    """
+    author_ids = cache.get(HIGH_FANOUT_KEY)
+    if author_ids is None:
+        from apps.profiles.models import UserProfile
+
+        author_ids = frozenset(
+            UserProfile.objects.filter(
+                friends_count__gt=get_feed_config('FEED_FANOUT_THRESHOLD', 1000)
+            ).values_list('user_id', flat=True)
+        )
+        cache.set(HIGH_FANOUT_KEY, author_ids, settings.CACHE_TIMEOUT.get('feed', 300))
+
+    return author_ids
+
+
+def is_high_fanout(author_id):
+    return author_id in get_high_fanout_author_ids()
+
+
+def _bump_pull_version():
+    try:
+        cache.incr(PULL_VERSION_KEY)
+    except ValueError:
+        cache.set(PULL_VERSION_KEY, 1, None)
+
+
+def update_high_fanout_authors(deltas):
+    """
+    Ajusta el fan-out de los autores cuyo número de amigos cruzó
+    FEED_FANOUT_THRESHOLD (utils.counters la llama al aplicar cambios de
+    friends_count)
+    - El conjunto cacheado de autores se descarta en cuanto cambia
+    - Bajo el umbral: sus posts recientes se copian a los timelines
+    - Sobre el umbral: sus entradas en timelines ajenos se eliminan
+
+    Args:
+        deltas: {user_id: cambio aplicado a friends_count}
+    """
+    from apps.profiles.models import UserProfile
+
+    threshold = get_feed_config('FEED_FANOUT_THRESHOLD', 1000)
+    counts = UserProfile.objects.filter(
+        user_id__in=list(deltas)
+    ).values_list('user_id', 'friends_count')
+
+    lowered = []
+    raised = []
+    for user_id, friends_count in counts:
+        was_high = friends_count - deltas[user_id] > threshold
+        if was_high and friends_count <= threshold:
+            lowered.append(user_id)
+        elif not was_high and friends_count > threshold:
+            raised.append(user_id)
+
+    if not lowered and not raised:
+        return
+
+    cache.delete(HIGH_FANOUT_KEY)
+    cache.delete_many([AUTHOR_RECENT_KEY.format(user_id) for user_id in lowered + raised])
+    for user_id in lowered:
+        backfill_author_entries(user_id)
+    for user_id in raised:
+        remove_author_entries(user_id)
+    # Cambian las fuentes pull de sus amigos
+    _bump_pull_version()
+
+
+def invalidate_pull_sources(post, public=True):
+    """
+    Descarta las caches de posts recientes a las que pertenece el post
+    Un post nuevo que no es público no afecta a la cache de públicos
+    """
+    keys = [AUTHOR_RECENT_KEY.format(post.author_id)]
+    if public:
+        keys.append(PUBLIC_RECENT_KEY)
+    cache.delete_many(keys)
+
+    if is_high_fanout(post.author_id):
+        # Cambia el ETag de todos los feeds: sus lectores no tienen entrada propia
+        _bump_pull_version()
+
+
+def _author_source(author_id):
+    from apps.posts.models import Post
+
+    return Post.objects.filter(
+        author_id=author_id,
+        privacy__in=['public', 'friends'],
+        is_archived=False
+    )
+
+
+def _public_source():
+    from apps.posts.models import Post
+
+    return Post.objects.filter(privacy='public', is_archived=False)
+
+
+def _source_rows(queryset, before, limit):
+    if before is not None:
+        created_at, post_id = before
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=post_id)
+        )
+    return list(
+        queryset.order_by('-created_at', '-pk').values_list('created_at', 'pk')[:limit]
+    )
+
+
+def _pull_rows(sources, before, limit):
+    """
+    Lee hasta `limit` entradas (created_at, post_id) de cada fuente
+
+    Cada fuente es (clave de cache, queryset). La cache guarda los
+    FEED_PULL_CACHE_SIZE posts más recientes; las páginas que caen fuera
+    de esa ventana se leen directamente del índice
+    """
+    size = get_feed_config('FEED_PULL_CACHE_SIZE', 100)
+
+    cached = cache.get_many([key for key, _ in sources])
+    missing = {}
+    results = []
+
+    for key, queryset in sources:
+        window = cached.get(key)
+        if window is None:
+            window = missing[key] = _source_rows(queryset, None, size)
+
+        rows = window
+        if before is not None:
+            rows = [row for row in window if tuple(row) < tuple(before)]
+
+        # Una ventana incompleta contiene todos los posts de la fuente
+        if len(rows) < limit and len(window) >= size:
+            rows = _source_rows(queryset, before, limit)
+
+        results.append(rows[:limit])
+
+    if missing:
+        cache.set_many(missing, settings.CACHE_TIMEOUT.get('feed', 300))
+
+    return results
+
+
+def get_pull_sources(user, include_public=False):
+    """
+    Fuentes pull de un lector: sus amigos con muchos amigos y, opcionalmente,
+    los posts públicos del campus
+    """
+    from apps.friends.models import get_friend_ids
+
+    sources = []
+    high_fanout = get_high_fanout_author_ids()
+    if high_fanout:
+        user_id = getattr(user, 'pk', user)
+        for author_id in sorted(high_fanout.intersection(get_friend_ids(user_id))):
+            sources.append((AUTHOR_RECENT_KEY.format(author_id), _author_source(author_id)))
+
+    if include_public:
+        sources.append((PUBLIC_RECENT_KEY, _public_source()))
+
+    return sources
+
+
+def _merge_rows(pushed, pulled, limit):
+    """
+    Mezcla listas ordenadas por (created_at, post_id) descendente sin duplicados
+    """
+    merged = []
+    seen = set()
+
+    for created_at, post_id in heapq.merge(pushed, *pulled, reverse=True):
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        merged.append((created_at, post_id))
+        if len(merged) == limit:
+            break
+
+    return merged
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def hydrate_posts(post_ids):
+    """
+    Carga los posts indicados en lote, conservando el orden recibido
+    """
+    from apps.posts.models import Post
+
+    posts = Post.objects.filter(
+        pk__in=post_ids
+    ).select_related(
+        'author', 'author__profile',
+        'shared_post', 'shared_post__author', 'shared_post__author__profile'
+    ).prefetch_related(
+        'images', 'videos', 'mentions__user', 'post_hashtags__hashtag',
+        'shared_post__images'
+    ).in_bulk()
+
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+FEED_MODES = {
+    # modo: orden
+    'recent': 'created_at',
+    'top': 'score',
+}
+
+
+def get_timeline_page(user, limit, before=None, mode='recent', include_public=False):
+    """
+    Lee una página del timeline de un usuario, mezclando las fuentes pull
+    En modo 'top' recorre el ranking cacheado del lector (get_top_page)
+
+    Args:
+        user: Usuario dueño del timeline
+        limit: Número máximo de posts
+        before: (valor, post_id) de la última entrada ya mostrada
+        mode: 'recent' (cronológico) o 'top' (por puntuación)
+        include_public: Mezclar también los posts públicos del campus
+
+    Returns:
+        tuple: (entradas, posts, has_more); cada entrada es (valor, post_id)
+    """
+    if mode == 'top':
+        return get_top_page(user, limit, before, include_public)
+
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        created_at, post_id = before
+        entries = entries.filter(
+            Q(created_at__lt=created_at) |
+            Q(created_at=created_at, post_id__lt=post_id)
+        )
+
+    rows = list(
+        entries.order_by('-created_at', '-post_id').values_list(
+            'created_at', 'post_id'
+        )[:limit + 1]
+    )
+
+    sources = get_pull_sources(user, include_public)
+    if sources:
+        rows = _merge_rows(rows, _pull_rows(sources, before, limit + 1), limit + 1)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return rows, hydrate_posts([post_id for _, post_id in rows]), has_more
+
+
+def build_top_snapshot(user, include_public=False):
+    """
+    Ranking de los posts recientes (WINDOW_HOURS) de un lector: las entradas
+    de su timeline con su puntuación y los posts de sus fuentes pull,
+    puntuados al leer (ranking.score_posts)
+
+    Se cachea SNAPSHOT_SECONDS para paginar sobre una lista fija: la
+    puntuación cambia con cada compute_feed_scores y un cursor sobre ella
+    repetiría o saltaría posts
+
+    Returns:
+        list: post_ids del más al menos relevante (hasta SNAPSHOT_SIZE)
+    """
+    from .ranking import get_ranking_weights, score_posts
+
+    weights = get_ranking_weights()
+    size = weights['SNAPSHOT_SIZE']
+    user_id = getattr(user, 'pk', user)
+    since = timezone.now() - timedelta(hours=weights['WINDOW_HOURS'])
+
+    scores = dict(
+        TimelineEntry.objects.filter(
+            user_id=user_id, created_at__gte=since
+        ).order_by('-score', '-post_id').values_list('post_id', 'score')[:size]
+    )
+
+    sources = get_pull_sources(user_id, include_public)
+    if sources:
+        pulled = {
+            post_id
+            for rows in _pull_rows(sources, None, size)
+            for created_at, post_id in rows
+            if created_at >= since and post_id not in scores
+        }
+        scores.update(score_posts(user_id, pulled, weights))
+
+    ranked = sorted(scores, key=lambda post_id: (scores[post_id], post_id), reverse=True)[:size]
+    cache.set(
+        TOP_SNAPSHOT_KEY.format(user_id, int(include_public)), ranked, weights['SNAPSHOT_SECONDS']
+    )
+    return ranked
+
+
+def _snapshot_start(post_ids, position, post_id):
+    """
+    Índice donde continúa una página del ranking después del cursor
+    Si el ranking se recalculó (expiró u otra pestaña abrió la primera
+    página) se busca post_id en el nuevo
+    """
+    valid = isinstance(position, int) and position >= 0
+    if valid and position < len(post_ids) and post_ids[position] == post_id:
+        return position + 1
+    if post_id in post_ids:
+        return post_ids.index(post_id) + 1
+    return position + 1 if valid else len(post_ids)
+
+
+def get_top_page(user, limit, before=None, include_public=False):
+    """
+    Página del modo 'top'
+    La primera página recalcula el ranking del lector; las siguientes lo
+    recorren con el cursor (posición, post_id)
+
+    Returns:
+        tuple: igual que get_timeline_page
+    """
+    user_id = getattr(user, 'pk', user)
+    post_ids = None
+    if before is not None:
+        post_ids = cache.get(TOP_SNAPSHOT_KEY.format(user_id, int(include_public)))
+    if post_ids is None:
+        post_ids = build_top_snapshot(user_id, include_public)
+
+    start = _snapshot_start(post_ids, *before) if before is not None else 0
+    page_ids = post_ids[start:start + limit]
+    rows = [(start + offset, post_id) for offset, post_id in enumerate(page_ids)]
+
+    return rows, hydrate_posts(page_ids), start + limit < len(post_ids)
+
+
+def get_first_page(user, limit):
+    """
+    Primera página cronológica del feed, cacheada mientras no cambie
+    la cabecera del timeline (ver get_feed_head)
+
+    Returns:
+        tuple: igual que get_timeline_page
+    """
+    user_id = getattr(user, 'pk', user)
+    key = FIRST_PAGE_KEY.format(user_id, limit)
+    head = get_feed_head(user_id)
+
+    cached = cache.get(key)
+    if cached is not None and cached['head'] == head:
+        rows, has_more = cached['rows'], cached['has_more']
+        return rows, hydrate_posts([post_id for _, post_id in rows]), has_more
+
+    rows, posts, has_more = get_timeline_page(user, limit)
+    cache.set(
+        key,
+        {'head': head, 'rows': rows, 'has_more': has_more},
+        settings.CACHE_TIMEOUT.get('feed', 300)
+    )
+    return rows, posts, has_more
+
+
+def get_timeline_since(user, since_id, limit):
+    """
+    Posts del timeline más nuevos que `since_id` (el primero que tiene el cliente)
+
+    Returns:
+        tuple: (posts, has_more), del más nuevo al más antiguo
+    """
+    rows = _since_rows(user, since_id, limit + 1)
+    has_more = len(rows) > limit
+    return hydrate_posts([post_id for _, post_id in rows[:limit]]), has_more
+
+
+def count_timeline_since(user, since_id, cap=99):
+    """
+    Número de posts nuevos desde `since_id`, acotado a `cap`
+    """
+    return len(_since_rows(user, since_id, cap))
+
+
+def _since_rows(user, since_id, limit):
+    rows = list(
+        TimelineEntry.objects.filter(
+            user=user, post_id__gt=since_id
+        ).order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit]
+    )
+
+    sources = get_pull_sources(user)
+    if sources:
+        # Los posts nuevos están al principio de la ventana cacheada
+        pulled = [
+            [row for row in source_rows if row[1] > since_id]
+            for source_rows in _pull_rows(sources, None, limit)
+        ]
+        rows = _merge_rows(rows, pulled, limit)
+
+    return rows
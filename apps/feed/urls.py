@@ -5,4 +5,6 @@ app_name = 'feed'
 
 urlpatterns = [
     path('', views.index_view, name='home'),
+    path('api/', views.feed_api, name='api'),
+    path('api/new-count/', views.feed_api_new_count, name='api_new_count'),
 ]
\ No newline at end of file
@@ -1,44 +1,156 @@
+"""
+Vistas para el módulo de feed
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_GET
+
+from apps.posts.cards import prepare_post_cards
+from utils.helpers import query_counter
+from utils.pagination import CursorPage, decode_cursor, encode_cursor
+from .serializers import serialize_posts
+from .timeline import (
+    FEED_MODES, count_timeline_since, get_feed_head, get_first_page,
+    get_timeline_page, get_timeline_since
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_sidebar_stats(user):
+    """
+    Estadísticas de la barra lateral a partir de contadores desnormalizados
+    """
+    from apps.friends.models import get_pending_requests_count
+
+    profile = getattr(user, 'profile', None)
+
+    return {
+        'friends_count': profile.friends_count if profile else 0,
+        'posts_count': profile.posts_count if profile else 0,
+        # Las solicitudes de amistad son por ahora la única fuente de avisos
+        'notifications_count': get_pending_requests_count(user),
+    }
 
 
 @login_required
 def index_view(request):
     """
     Vista principal del feed
+    Lee una página del timeline materializado del usuario
+    ?mode=top ordena por puntuación de relevancia en lugar de por fecha
+    """
+    per_page = settings.UNICONET_CONFIG.get('POSTS_PER_PAGE', 20)
+    mode = request.GET.get('mode', 'recent')
+    if mode not in FEED_MODES:
+        mode = 'recent'
+
+    with query_counter() as stats:
+        before = decode_cursor(request.GET.get('after'), 2)
+        if before is None and mode == 'recent':
+            rows, posts, has_more = get_first_page(request.user, per_page)
+        else:
+            rows, posts, has_more = get_timeline_page(
+                request.user, per_page, before=before, mode=mode
+            )
+
+        next_cursor = encode_cursor(rows[-1]) if has_more and rows else None
+        page = CursorPage(prepare_post_cards(posts, request.user), next_cursor=next_cursor, params=request.GET)
+
+        context = {
+            'posts': page,
+            'feed_mode': mode,
+            'stats': get_sidebar_stats(request.user),
+            'unread_notifications': [],
+        }
+        response = render(request, 'feed/index.html', context)
+
+    logger.info(
+        'feed.index user=%s mode=%s posts=%s queries=%s latency_ms=%.1f',
+        request.user.pk, mode, len(posts), stats.queries, stats.elapsed_ms
+    )
+
+    return response
+
+
+# ============================================================================
+# API JSON
+# ============================================================================
+
+FEED_API_MAX_LIMIT = 50
+
+
+def feed_api_etag(request):
+    """
+    ETag de las respuestas de la API: usuario + cabecera del timeline + parámetros
+    Solo lee la cache, de modo que un sondeo sin cambios responde 304
+    sin consultar la base de datos
     """
-    # Import aquí para evitar errores circulares
-    from apps.posts.models import Post
-    
-    print("=" * 50)
-    print("INICIANDO VISTA FEED")
-    print(f"Usuario: {request.user.username}")
-    
+    if not request.user.is_authenticated:
+        return None
+
+    head = get_feed_head(request.user)
+    raw = f'{request.user.pk}:{head}:{request.GET.urlencode()}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _get_int_param(request, name, default=None):
     try:
-        # Consulta simple sin filtros complejos
-        posts = Post.objects.all().order_by('-created_at')
-        
-        print(f"Query ejecutada, total posts: {posts.count()}")
-        
-        for post in posts:
-            print(f"  - Post {post.id}: {post.content[:30]}")
-        
-    except Exception as e:
-        print(f"ERROR al obtener posts: {e}")
-        import traceback
-        traceback.print_exc()
-        posts = []
-    
-    context = {
-        'posts': posts,
-        'stats': {
-            'friends_count': 0,
-            'notifications_count': 0,
-        },
-        'unread_notifications': [],
-    }
-    
-    print(f"Context creado con {len(posts)} posts")
-    print("=" * 50)
-    
-    return render(request, 'feed/index.html', context)
\ No newline at end of file
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+
+
+@login_required
+@require_GET
+@condition(etag_func=feed_api_etag)
+def feed_api(request):
+    """
+    Página del feed en JSON
+    GET /feed/api/?mode=recent|top&after=<cursor>&limit=N
+    GET /feed/api/?since_id=<id>  Solo posts más nuevos que el indicado
+    """
+    per_page = settings.UNICONET_CONFIG.get('POSTS_PER_PAGE', 20)
+    limit = min(max(_get_int_param(request, 'limit', per_page), 1), FEED_API_MAX_LIMIT)
+    since_id = _get_int_param(request, 'since_id')
+    mode = request.GET.get('mode', 'recent')
+    if mode not in FEED_MODES:
+        mode = 'recent'
+
+    next_cursor = None
+    if since_id is not None:
+        posts, has_more = get_timeline_since(request.user, since_id, limit)
+    else:
+        before = decode_cursor(request.GET.get('after'), 2)
+        rows, posts, has_more = get_timeline_page(
+            request.user, limit, before=before, mode=mode
+        )
+        next_cursor = encode_cursor(rows[-1]) if has_more and rows else None
+
+    return JsonResponse({
+        'posts': serialize_posts(request.user, posts),
+        'mode': mode,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+@require_GET
+@condition(etag_func=feed_api_etag)
+def feed_api_new_count(request):
+    """
+    Número de posts nuevos desde since_id (para el aviso "hay publicaciones nuevas")
+    GET /feed/api/new-count/?since_id=<id>
+    """
+    since_id = _get_int_param(request, 'since_id')
+    if since_id is None:
+        return JsonResponse({'error': 'since_id es requerido'}, status=400)
+
+    return JsonResponse({'count': count_timeline_since(request.user, since_id)})
@@ -2,7 +2,7 @@
 Context processors para el módulo de friends
 Proporciona datos de amigos a todos los templates
 """
-from .models import FriendRequest
+from .models import get_pending_requests_count
 
 
 def friends_context(request):
@@ -11,10 +11,7 @@ def friends_context(request):
     """
     if request.user.is_authenticated:
         # Contar solicitudes pendientes
-        pending_requests_count = FriendRequest.objects.filter(
-            to_user=request.user,
-            status='pending'
-        ).count()
+        pending_requests_count = get_pending_requests_count(request.user)
         
         return {
             'pending_friend_requests_count': pending_requests_count,
@@ -161,14 +161,12 @@ class FriendRequest(models.Model):
         
         # Crear amistad
         user1, user2 = sorted([self.from_user, self.to_user], key=lambda u: u.id)
+        # Los contadores de amigos los actualiza el signal de Friendship
         friendship = Friendship.objects.create(
             user1=user1,
             user2=user2
         )
         
-        # Actualizar contadores en perfiles
-        self._update_friend_counts()
-        
         return friendship
     
     def reject(self):
@@ -200,17 +198,6 @@ class FriendRequest(models.Model):
         if not self.viewed_at:
             self.viewed_at = timezone.now()
             self.save(update_fields=['viewed_at'])
-    
-    def _update_friend_counts(self):
-        """
-        Actualiza los contadores de amigos en los perfiles
-        """
-        from apps.profiles.models import UserProfile
-        
-        for user in [self.from_user, self.to_user]:
-            profile, _ = UserProfile.objects.get_or_create(user=user)
-            profile.friends_count = get_friends_count(user)
-            profile.save(update_fields=['friends_count'])
 
 
 class BlockedUser(models.Model):
@@ -288,7 +275,14 @@ class BlockedUser(models.Model):
                 to_user=self.blocker,
                 status='pending'
             ).update(status='cancelled', responded_at=timezone.now())
-        
+
+            # update() no dispara signals: invalidar el contador cacheado
+            from django.core.cache import cache
+            cache.delete_many([
+                f'pending_requests_{self.blocker.pk}',
+                f'pending_requests_{self.blocked.pk}',
+            ])
+
         super().save(*args, **kwargs)
 
 
@@ -401,6 +395,32 @@ def get_friends(user):
     return friends
 
 
+def get_friend_ids(user):
+    """
+    Obtiene los IDs de los amigos de un usuario en una sola consulta
+    Acepta un usuario o directamente su ID
+    Se cachea en 'friends_list_<id>', que invalidan los signals de friends
+    """
+    from django.core.cache import cache
+    from django.db.models import Q
+
+    user_id = getattr(user, 'pk', user)
+    cache_key = f'friends_list_{user_id}'
+    friend_ids = cache.get(cache_key)
+
+    if friend_ids is None:
+        rows = Friendship.objects.filter(
+            Q(user1_id=user_id) | Q(user2_id=user_id)
+        ).values_list('user1_id', 'user2_id')
+        friend_ids = [
+            user2_id if user1_id == user_id else user1_id
+            for user1_id, user2_id in rows
+        ]
+        cache.set(cache_key, friend_ids, settings.CACHE_TIMEOUT['friends'])
+
+    return friend_ids
+
+
 def get_friends_count(user):
     """
     Obtiene el número de amigos de un usuario
@@ -420,20 +440,12 @@ def remove_friendship(user1, user2):
         return False
     
     user_min, user_max = sorted([user1, user2], key=lambda u: u.id)
+    # Los contadores de amigos los actualiza el signal de Friendship
     deleted_count, _ = Friendship.objects.filter(
         user1=user_min,
         user2=user_max
     ).delete()
     
-    # Actualizar contadores
-    if deleted_count > 0:
-        from apps.profiles.models import UserProfile
-        
-        for user in [user1, user2]:
-            profile, _ = UserProfile.objects.get_or_create(user=user)
-            profile.friends_count = get_friends_count(user)
-            profile.save(update_fields=['friends_count'])
-    
     return deleted_count > 0
 
 
@@ -461,6 +473,28 @@ def has_pending_request(from_user, to_user):
     ).exists()
 
 
+def get_pending_requests_count(user):
+    """
+    Obtiene el número de solicitudes de amistad pendientes recibidas
+    Acepta un usuario o directamente su ID
+    Se cachea en 'pending_requests_<id>', que invalidan los signals de friends
+    """
+    from django.core.cache import cache
+
+    user_id = getattr(user, 'pk', user)
+    cache_key = f'pending_requests_{user_id}'
+    count = cache.get(cache_key)
+
+    if count is None:
+        count = FriendRequest.objects.filter(
+            to_user_id=user_id,
+            status='pending'
+        ).count()
+        cache.set(cache_key, count, settings.CACHE_TIMEOUT['friends'])
+
+    return count
+
+
 def get_mutual_friends(user1, user2):
     """
     Obtiene los amigos en común entre dos usuarios
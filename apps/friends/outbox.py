@@ -0,0 +1,85 @@
+"""
+Manejadores del outbox para el módulo de friends
+Se ejecutan en el worker, fuera de la petición; deben ser idempotentes
+"""
+from apps.outbox.dispatch import register
+from .models import FriendRequest, FriendSuggestion
+
+
+def _get_users(payload):
+    from apps.authentication.models import User
+
+    users = User.objects.in_bulk([payload['user1_id'], payload['user2_id']])
+    return users.get(payload['user1_id']), users.get(payload['user2_id'])
+
+
+@register('friendship.created')
+def handle_friendship_created(payload):
+    """
+    - Notifica al usuario cuya solicitud fue aceptada
+    - Regenera sugerencias de ambos usuarios
+    Los contadores de amigos los actualiza utils.counters desde el signal
+    """
+    from .views import generate_friend_suggestions
+
+    user1, user2 = _get_users(payload)
+    if user1 is None or user2 is None:
+        return
+
+    # Crear notificación (si la app existe)
+    try:
+        from apps.notifications.utils import create_notification
+    except ImportError:
+        create_notification = None
+
+    if create_notification is not None:
+        # Encontrar qué usuario aceptó la solicitud
+        friend_request = FriendRequest.objects.filter(
+            from_user__in=[user1, user2],
+            to_user__in=[user1, user2],
+            status='accepted'
+        ).select_related('from_user', 'to_user').first()
+
+        if friend_request:
+            accepter_user = friend_request.to_user
+            create_notification(
+                recipient=friend_request.from_user,
+                sender=accepter_user,
+                notification_type='friend_accept',
+                text=f'{accepter_user.get_full_name()} aceptó tu solicitud de amistad',
+                link=f'/profiles/{accepter_user.username}/'
+            )
+
+    # Eliminar sugerencias mutuas (ya son amigos) y generar nuevas
+    FriendSuggestion.objects.filter(user=user1, suggested_user=user2).delete()
+    FriendSuggestion.objects.filter(user=user2, suggested_user=user1).delete()
+
+    generate_friend_suggestions(user1, limit=5)
+    generate_friend_suggestions(user2, limit=5)
+
+
+@register('friend_request.created')
+def handle_friend_request_created(payload):
+    """
+    Notifica al destinatario de una solicitud nueva
+    """
+    try:
+        from apps.notifications.utils import create_notification
+    except ImportError:
+        return
+
+    friend_request = FriendRequest.objects.select_related(
+        'from_user', 'to_user'
+    ).filter(pk=payload['request_id'], status='pending').first()
+    if friend_request is None:
+        return
+
+    create_notification(
+        recipient=friend_request.to_user,
+        sender=friend_request.from_user,
+        notification_type='friend_request',
+        text=f'{friend_request.from_user.get_full_name()} te envió una solicitud de amistad',
+        link='/friends/requests/',
+        related_object_type='friend_request',
+        related_object_id=friend_request.pk
+    )
@@ -1,15 +1,16 @@
 """
 Signals para el módulo de friends
 Maneja eventos relacionados con amistades, solicitudes y notificaciones
+Contadores, notificaciones y sugerencias se procesan en el outbox
+(ver apps/friends/outbox.py)
 """
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.db.models import F
 
-from .models import (
-    Friendship, FriendRequest, BlockedUser, 
-    get_friends_count
-)
+from apps.outbox.dispatch import publish
+from utils import counters
+from .models import Friendship, FriendRequest, BlockedUser
 
 
 # ============================================================================
@@ -20,50 +21,30 @@ from .models import (
 def friendship_created(sender, instance, created, **kwargs):
     """
     Se ejecuta cuando se crea una nueva amistad
-    - Actualiza contadores de amigos en perfiles
-    - Crea notificación (si existe app de notificaciones)
+    - Suma uno a los contadores de amigos (utils.counters)
+    - Publica en el outbox la notificación, las sugerencias y el backfill
+      del feed
     """
     if created:
-        # Actualizar contadores de amigos
-        update_friends_count(instance.user1)
-        update_friends_count(instance.user2)
-        
-        # Crear notificación (si la app existe)
-        try:
-            from apps.notifications.utils import create_notification
-            
-            # Encontrar qué usuario aceptó la solicitud
-            # (el que no envió la solicitud original)
-            friend_request = FriendRequest.objects.filter(
-                from_user__in=[instance.user1, instance.user2],
-                to_user__in=[instance.user1, instance.user2],
-                status='accepted'
-            ).first()
-            
-            if friend_request:
-                # Notificar al que envió la solicitud
-                sender_user = friend_request.from_user
-                accepter_user = friend_request.to_user
-                
-                create_notification(
-                    recipient=sender_user,
-                    sender=accepter_user,
-                    notification_type='friend_accept',
-                    text=f'{accepter_user.get_full_name()} aceptó tu solicitud de amistad',
-                    link=f'/profiles/{accepter_user.username}/'
-                )
-        except ImportError:
-            pass  # La app de notificaciones no existe todavía
+        counters.increment_many(
+            'profile.friends', [instance.user1_id, instance.user2_id]
+        )
+        publish(
+            'friendship.created',
+            {'user1_id': instance.user1_id, 'user2_id': instance.user2_id},
+            key=f'friendship.created:{instance.pk}'
+        )
 
 
 @receiver(post_delete, sender=Friendship)
 def friendship_deleted(sender, instance, **kwargs):
     """
     Se ejecuta cuando se elimina una amistad
-    - Actualiza contadores de amigos en perfiles
+    - Resta uno a los contadores de amigos (utils.counters)
     """
-    update_friends_count(instance.user1)
-    update_friends_count(instance.user2)
+    counters.increment_many(
+        'profile.friends', [instance.user1_id, instance.user2_id], -1
+    )
 
 
 # ============================================================================
@@ -76,21 +57,12 @@ def friend_request_saved(sender, instance, created, **kwargs):
     Se ejecuta cuando se crea o actualiza una solicitud de amistad
     """
     if created:
-        # Nueva solicitud creada - crear notificación
-        try:
-            from apps.notifications.utils import create_notification
-            
-            create_notification(
-                recipient=instance.to_user,
-                sender=instance.from_user,
-                notification_type='friend_request',
-                text=f'{instance.from_user.get_full_name()} te envió una solicitud de amistad',
-                link=f'/friends/requests/',
-                related_object_type='friend_request',
-                related_object_id=instance.id
-            )
-        except ImportError:
-            pass
+        # Nueva solicitud creada - notificación en el outbox
+        publish(
+            'friend_request.created',
+            {'request_id': instance.pk},
+            key=f'friend_request.created:{instance.pk}'
+        )
     
     else:
         # Solicitud actualizada
@@ -170,25 +142,6 @@ def user_unblocked(sender, instance, **kwargs):
     pass
 
 
-# ============================================================================
-# FUNCIONES AUXILIARES
-# ============================================================================
-
-def update_friends_count(user):
-    """
-    Actualiza el contador de amigos en el perfil del usuario
-    """
-    try:
-        from apps.profiles.models import UserProfile
-        
-        profile, created = UserProfile.objects.get_or_create(user=user)
-        profile.friends_count = get_friends_count(user)
-        profile.save(update_fields=['friends_count'])
-    except Exception as e:
-        # Log del error si es necesario
-        print(f"Error actualizando friends_count para {user.username}: {e}")
-
-
 # ============================================================================
 # SIGNALS PARA LIMPIEZA DE DATOS
 # ============================================================================
@@ -216,36 +169,8 @@ def cleanup_old_requests(sender, instance, created, **kwargs):
 # SIGNALS PARA SUGERENCIAS DE AMISTAD
 # ============================================================================
 
-@receiver(post_save, sender=Friendship)
-def update_suggestions_on_new_friendship(sender, instance, created, **kwargs):
-    """
-    Actualiza sugerencias cuando se crea una nueva amistad
-    - Elimina sugerencias entre los nuevos amigos
-    - Genera nuevas sugerencias basadas en amigos en común
-    """
-    if created:
-        from .models import FriendSuggestion
-        from .views import generate_friend_suggestions
-        
-        # Eliminar sugerencias mutuas (ya son amigos)
-        FriendSuggestion.objects.filter(
-            user=instance.user1,
-            suggested_user=instance.user2
-        ).delete()
-        
-        FriendSuggestion.objects.filter(
-            user=instance.user2,
-            suggested_user=instance.user1
-        ).delete()
-        
-        # Generar nuevas sugerencias para ambos usuarios
-        # (basadas en el nuevo amigo en común)
-        try:
-            generate_friend_suggestions(instance.user1, limit=5)
-            generate_friend_suggestions(instance.user2, limit=5)
-        except Exception as e:
-            print(f"Error generando sugerencias: {e}")
-
+# Las sugerencias por nueva amistad se regeneran en el outbox
+# (handle_friendship_created en apps/friends/outbox.py)
 
 @receiver(post_save, sender=BlockedUser)
 def remove_suggestions_on_block(sender, instance, created, **kwargs):
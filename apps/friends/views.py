@@ -374,12 +374,9 @@ def find_friends(request):
         
         # Búsqueda por texto
         if query:
-            users = users.filter(
-                Q(username__icontains=query) |
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query) |
-                Q(email__icontains=query)
-            )
+            from apps.profiles.search import SEARCH_LIMIT, search_people
+            
+            users = search_people(request.user, query, users)
         
         # Filtros adicionales
         if filter_by == 'career' and request.user.career:
@@ -408,7 +405,13 @@ def find_friends(request):
                     output_field=IntegerField()
                 )
             )
-        ).order_by('-has_pending_request', '-date_joined')[:50]
+        )
+        
+        # Con texto: los SEARCH_LIMIT más relevantes
+        if query:
+            users = users.order_by('-rank', '-id')[:SEARCH_LIMIT]
+        else:
+            users = users.order_by('-has_pending_request', '-date_joined')[:50]
     
     # Paginación
     paginator = Paginator(users, 20)
@@ -0,0 +1,587 @@
+"""
+Reacciones en buffer para posts virales (REACTION_BUFFER_ENABLED)
+
+Cuando un post recibe más de REACTION_BUFFER_HOT_RATE reacciones por minuto,
+toggle_reaction deja de escribir en Like y ReactionCount: guarda el estado
+deseado de cada usuario en Redis y flush() lo aplica en lote cada
+REACTION_BUFFER_FLUSH_SECONDS (flush_reaction_buffer_task).
+
+Claves por post:
+- uniconet:reactions:{post}:users  hash usuario -> tipo ('' = sin reacción)
+- uniconet:reactions:{post}:counts hash tipo -> delta estimado, más 'total'
+- las mismas con sufijo :inflight  lo que un flush está aplicando
+- uniconet:reactions:{post}:flushing  lock del flush del post (con TTL)
+- uniconet:reactions:dirty         set de posts con cambios pendientes
+
+Cada cambio lee el estado anterior (pendiente, en vuelo o en la base de
+datos) y escribe el nuevo bajo WATCH: si otro cambio o un flush toca las
+claves entre medio, se vuelve a leer. Así un doble clic nunca parte dos
+veces del mismo estado anterior.
+
+El flush renombra las claves a :inflight, aplica el estado en una
+transacción y solo al confirmar las borra; mientras tanto las lecturas y
+los cambios nuevos siguen viendo lo que está en vuelo. Si la transacción
+falla, lo que está en vuelo vuelve al buffer (sin pisar cambios más
+nuevos). Un flush interrumpido deja las claves :inflight, y el siguiente
+las vuelve a aplicar (sync_reactions fija estados, así que es idempotente).
+
+Las lecturas (reacción del lector, resumen y conteo) suman lo pendiente,
+así que cada usuario ve su reacción al instante. En el flush los deltas se
+recalculan contra la tabla de likes, de modo que los estimados no se
+acumulan como error.
+
+Si la cache no es django_redis se usa LocalRedis, un sustituto en memoria
+del proceso con los mismos comandos; ahí el flush corre en el propio
+proceso (en el siguiente toggle tras el intervalo y al terminar).
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from redis.exceptions import WatchError
+
+
+logger = logging.getLogger(__name__)
+
+
+USERS_KEY = 'uniconet:reactions:{}:users'
+COUNTS_KEY = 'uniconet:reactions:{}:counts'
+INFLIGHT_USERS_KEY = 'uniconet:reactions:{}:users:inflight'
+INFLIGHT_COUNTS_KEY = 'uniconet:reactions:{}:counts:inflight'
+FLUSH_LOCK_KEY = 'uniconet:reactions:{}:flushing'
+DIRTY_KEY = 'uniconet:reactions:dirty'
+RATE_KEY = 'uniconet:reactions:{}:rate:{}'
+
+TOTAL_FIELD = 'total'
+
+# Si un flush muere sin liberar el lock, otro retoma el post tras este plazo
+FLUSH_LOCK_SECONDS = 60
+
+
+def get_buffer_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _reaction(value):
+    """
+    Valor del hash de usuarios -> tipo o None ('' = sin reacción)
+    """
+    return _text(value) or None
+
+
+# ============================================================================
+# REDIS LOCAL
+# ============================================================================
+
+class LocalRedis:
+    """
+    Subconjunto de comandos de redis-py sobre diccionarios del proceso
+    Suficiente para el buffer de reacciones en desarrollo y pruebas
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = {}
+        self._expires = {}
+        # Versión de cada clave, para WATCH
+        self._versions = {}
+
+    def _purge(self):
+        now = time.monotonic()
+        for key in [key for key, deadline in self._expires.items() if deadline <= now]:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            self._touch(key)
+
+    def _touch(self, *keys):
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _hash(self, key):
+        self._touch(key)
+        return self._data.setdefault(key, {})
+
+    def hget(self, key, field):
+        with self._lock:
+            return self._data.get(key, {}).get(str(field))
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._hash(key)[str(field)] = value
+
+    def hsetnx(self, key, field, value):
+        with self._lock:
+            return self._hash(key).setdefault(str(field), value) == value
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            values = self._hash(key)
+            values[str(field)] = int(values.get(str(field), 0)) + amount
+            return values[str(field)]
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._touch(key)
+            self._data.setdefault(key, set()).update(str(member) for member in members)
+
+    def spop(self, key, count=1):
+        with self._lock:
+            self._touch(key)
+            members = self._data.get(key, set())
+            return [members.pop() for _ in range(min(count, len(members)))]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            self._purge()
+            if nx and key in self._data:
+                return None
+            self._touch(key)
+            self._data[key] = value
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._purge()
+            self._touch(key)
+            self._data[key] = int(self._data.get(key, 0)) + amount
+            return self._data[key]
+
+    def expire(self, key, seconds):
+        with self._lock:
+            self._expires[key] = time.monotonic() + seconds
+
+    def exists(self, *keys):
+        with self._lock:
+            self._purge()
+            return sum(1 for key in keys if key in self._data)
+
+    def rename(self, source, destination):
+        with self._lock:
+            if source not in self._data:
+                raise KeyError(source)
+            self._touch(source, destination)
+            self._data[destination] = self._data.pop(source)
+            self._expires.pop(destination, None)
+            if source in self._expires:
+                self._expires[destination] = self._expires.pop(source)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._touch(key)
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """
+    Encola llamadas y las ejecuta juntas bajo el lock de LocalRedis
+    Como en redis-py, tras watch() los comandos se ejecutan al momento
+    hasta multi(), y execute() lanza WatchError si una clave vigilada cambió
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+        self.watching = None
+        self.immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            if self.immediate:
+                return method(*args, **kwargs)
+            self.calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def watch(self, *keys):
+        with self.redis._lock:
+            self.watching = {key: self.redis._versions.get(key, 0) for key in keys}
+        self.immediate = True
+
+    def multi(self):
+        self.immediate = False
+
+    def unwatch(self):
+        self.watching = None
+        self.immediate = False
+
+    def reset(self):
+        self.calls = []
+        self.unwatch()
+
+    def execute(self):
+        try:
+            with self.redis._lock:
+                for key, version in (self.watching or {}).items():
+                    if self.redis._versions.get(key, 0) != version:
+                        raise WatchError(f'{key} cambió')
+                return [method(*args, **kwargs) for method, args, kwargs in self.calls]
+        finally:
+            self.reset()
+
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+class ReactionBuffer:
+    """
+    Estado pendiente de las reacciones sobre una conexión tipo redis-py
+    """
+
+    def __init__(self, connection, local=False):
+        self.connection = connection
+        self.local = local
+        self._last_flush = time.monotonic()
+
+    # -------------------------------------------------------------- decisión
+
+    def should_buffer(self, post_id, user_id):
+        """
+        True si el post está caliente (ritmo del minuto actual sobre el
+        umbral) o si el usuario ya tiene un cambio pendiente o en vuelo en
+        el post (para no reordenar sus escrituras)
+        """
+        return post_id in self.buffered_posts(user_id, [post_id])
+
+    def buffered_posts(self, user_id, post_ids):
+        """
+        Posts de `post_ids` cuyas reacciones del usuario van al buffer
+        Una sola ida y vuelta a Redis; cuenta una reacción por post
+        """
+        post_ids = list(post_ids)
+        minute = int(time.time() // 60)
+        hot_rate = get_buffer_config('REACTION_BUFFER_HOT_RATE', 60)
+
+        pipe = self.connection.pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.incr(RATE_KEY.format(post_id, minute))
+            pipe.expire(RATE_KEY.format(post_id, minute), 120)
+            pipe.hget(USERS_KEY.format(post_id), user_id)
+            pipe.hget(INFLIGHT_USERS_KEY.format(post_id), user_id)
+        results = pipe.execute()
+
+        return {
+            post_id for post_id, rate, pending, inflight in zip(
+                post_ids, results[0::4], results[2::4], results[3::4]
+            )
+            if pending is not None or inflight is not None or rate > hot_rate
+        }
+
+    # ------------------------------------------------------------- escritura
+
+    def toggle(self, user, post, reaction_type):
+        """
+        Alterna la reacción del usuario sobre su estado más reciente
+
+        Returns:
+            tuple: (anterior, actual) con None si no hay reacción
+        """
+        return self._compare_and_set(
+            user.pk, post.pk,
+            lambda previous: None if previous == reaction_type else reaction_type
+        )
+
+    def set_reaction(self, user_id, post_id, reaction_type):
+        """
+        Fija el estado deseado de la reacción del usuario
+
+        Returns:
+            tuple: (anterior, actual); iguales si no hubo cambio
+        """
+        return self._compare_and_set(user_id, post_id, lambda previous: reaction_type)
+
+    def _stored_reaction(self, user_id, post_id):
+        from .models import Like
+
+        return Like.objects.filter(
+            user_id=user_id, post_id=post_id
+        ).values_list('reaction_type', flat=True).first()
+
+    def _compare_and_set(self, user_id, post_id, decide):
+        """
+        Lee el estado anterior (pendiente, en vuelo o guardado), calcula el
+        nuevo con decide(anterior) y lo escribe junto con los deltas
+        estimados, todo bajo WATCH de las claves del post
+
+        La lectura de la base de datos también queda cubierta: un flush
+        borra las claves en vuelo después de confirmar, lo que invalida el
+        WATCH de un cambio que leyó la fila antes de la confirmación
+        """
+        users_key = USERS_KEY.format(post_id)
+        inflight_key = INFLIGHT_USERS_KEY.format(post_id)
+
+        with self.connection.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(users_key, inflight_key)
+                    pending = pipe.hget(users_key, user_id)
+                    if pending is None:
+                        pending = pipe.hget(inflight_key, user_id)
+                    if pending is not None:
+                        previous = _reaction(pending)
+                    else:
+                        previous = self._stored_reaction(user_id, post_id)
+
+                    current = decide(previous)
+                    pipe.multi()
+                    if current != previous:
+                        self._queue_change(pipe, user_id, post_id, previous, current)
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        if current != previous:
+            self._schedule_local_flush()
+        return previous, current
+
+    def _queue_change(self, pipe, user_id, post_id, previous, current):
+        counts_key = COUNTS_KEY.format(post_id)
+        pipe.hset(USERS_KEY.format(post_id), user_id, current or '')
+        if previous:
+            pipe.hincrby(counts_key, previous, -1)
+        if current:
+            pipe.hincrby(counts_key, current, 1)
+        pipe.hincrby(counts_key, TOTAL_FIELD, (current is not None) - (previous is not None))
+        pipe.sadd(DIRTY_KEY, post_id)
+
+    def _schedule_local_flush(self):
+        if self.local and time.monotonic() - self._last_flush > get_buffer_config(
+            'REACTION_BUFFER_FLUSH_SECONDS', 5
+        ):
+            transaction.on_commit(self.flush)
+
+    # --------------------------------------------------------------- lectura
+
+    def pending_reactions(self, user_id, post_ids):
+        """
+        {post_id: tipo o None} de los posts con un cambio pendiente o en
+        vuelo del usuario
+        """
+        post_ids = list(post_ids)
+        if not post_ids:
+            return {}
+
+        pipe = self.connection.pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.hget(USERS_KEY.format(post_id), user_id)
+            pipe.hget(INFLIGHT_USERS_KEY.format(post_id), user_id)
+        results = pipe.execute()
+
+        pending = {}
+        for post_id, value, inflight in zip(post_ids, results[0::2], results[1::2]):
+            if value is None:
+                value = inflight
+            if value is not None:
+                pending[post_id] = _reaction(value)
+        return pending
+
+    def pending_counts(self, post_id):
+        """
+        {tipo: delta, 'total': delta} pendientes del post
+        """
+        return self.pending_counts_many([post_id])[post_id]
+
+    def pending_counts_many(self, post_ids):
+        """
+        {post_id: {tipo: delta, 'total': delta}} (pendiente más en vuelo)
+        en una sola ida y vuelta
+        """
+        post_ids = list(post_ids)
+        pipe = self.connection.pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.hgetall(COUNTS_KEY.format(post_id))
+            pipe.hgetall(INFLIGHT_COUNTS_KEY.format(post_id))
+        results = pipe.execute()
+
+        pending = {}
+        for post_id, counts, inflight in zip(post_ids, results[0::2], results[1::2]):
+            totals = pending[post_id] = {}
+            for values in (counts, inflight):
+                for field, value in values.items():
+                    field = _text(field)
+                    totals[field] = totals.get(field, 0) + int(value)
+        return pending
+
+    # ----------------------------------------------------------------- flush
+
+    def _drain(self, post_id):
+        """
+        Pasa el estado pendiente del post a las claves en vuelo
+        Si quedaron claves en vuelo de un flush interrumpido, se devuelven
+        esas y lo pendiente espera al siguiente flush
+
+        Returns:
+            dict: {user_id: tipo o None} a aplicar
+        """
+        users_key = USERS_KEY.format(post_id)
+        counts_key = COUNTS_KEY.format(post_id)
+        inflight_users_key = INFLIGHT_USERS_KEY.format(post_id)
+        inflight_counts_key = INFLIGHT_COUNTS_KEY.format(post_id)
+
+        with self.connection.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(users_key, counts_key)
+                    if pipe.exists(inflight_users_key):
+                        users = pipe.hgetall(inflight_users_key)
+                        pipe.multi()
+                        pipe.sadd(DIRTY_KEY, post_id)
+                    elif pipe.exists(users_key):
+                        users = pipe.hgetall(users_key)
+                        has_counts = pipe.exists(counts_key)
+                        pipe.multi()
+                        pipe.rename(users_key, inflight_users_key)
+                        if has_counts:
+                            pipe.rename(counts_key, inflight_counts_key)
+                    else:
+                        return {}
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        return {int(_text(user_id)): _reaction(value) for user_id, value in users.items()}
+
+    def _settle(self, post_id):
+        """
+        El estado en vuelo ya está en la base de datos: se descarta
+        """
+        self.connection.delete(
+            INFLIGHT_USERS_KEY.format(post_id),
+            INFLIGHT_COUNTS_KEY.format(post_id),
+            FLUSH_LOCK_KEY.format(post_id)
+        )
+
+    def _restore(self, post_id):
+        """
+        Devuelve al buffer el estado en vuelo de un flush fallido
+        Un cambio más nuevo del mismo usuario tiene prioridad (hsetnx); sus
+        deltas se calcularon sobre el estado en vuelo, así que los de este
+        se suman igual
+        """
+        inflight_users_key = INFLIGHT_USERS_KEY.format(post_id)
+        inflight_counts_key = INFLIGHT_COUNTS_KEY.format(post_id)
+
+        # Con el lock tomado nadie más escribe las claves en vuelo
+        users = self.connection.hgetall(inflight_users_key)
+        counts = self.connection.hgetall(inflight_counts_key)
+
+        pipe = self.connection.pipeline(transaction=True)
+        for user_id, value in users.items():
+            pipe.hsetnx(USERS_KEY.format(post_id), _text(user_id), value)
+        for field, delta in counts.items():
+            pipe.hincrby(COUNTS_KEY.format(post_id), _text(field), int(delta))
+        pipe.delete(inflight_users_key, inflight_counts_key, FLUSH_LOCK_KEY.format(post_id))
+        pipe.sadd(DIRTY_KEY, post_id)
+        pipe.execute()
+
+    def flush(self, batch_size=None):
+        """
+        Aplica los cambios pendientes de hasta `batch_size` posts
+        Una transacción por post; si falla, el estado vuelve al buffer.
+        Un post que otro flush está aplicando se deja para la próxima vez
+
+        Returns:
+            int: Reacciones aplicadas
+        """
+        batch_size = batch_size or get_buffer_config('REACTION_BUFFER_BATCH_SIZE', 100)
+        self._last_flush = time.monotonic()
+
+        applied = 0
+        for post_id in self.connection.spop(DIRTY_KEY, batch_size) or []:
+            post_id = int(_text(post_id))
+            if not self.connection.set(
+                FLUSH_LOCK_KEY.format(post_id), 1, ex=FLUSH_LOCK_SECONDS, nx=True
+            ):
+                self.connection.sadd(DIRTY_KEY, post_id)
+                continue
+
+            desired = self._drain(post_id)
+            if not desired:
+                self.connection.delete(FLUSH_LOCK_KEY.format(post_id))
+                continue
+            try:
+                with transaction.atomic():
+                    applied += apply_desired_reactions(post_id, desired)
+                    transaction.on_commit(lambda post_id=post_id: self._settle(post_id))
+            except Exception:
+                logger.exception('reactions.flush error post=%s', post_id)
+                self._restore(post_id)
+        return applied
+
+
+def apply_desired_reactions(post_id, desired):
+    """
+    Aplica el estado deseado de cada usuario en un post (ver sync_reactions)
+
+    Args:
+        post_id: ID del post
+        desired: {user_id: tipo o None}
+
+    Returns:
+        int: Filas de Like creadas, cambiadas o eliminadas
+    """
+    from apps.posts.models import Post
+    from .models import sync_reactions
+
+    if not Post.objects.filter(pk=post_id).exists():
+        # El post se eliminó mientras había cambios pendientes
+        return 0
+
+    return sync_reactions({
+        (user_id, post_id): reaction_type for user_id, reaction_type in desired.items()
+    })
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_reaction_buffer():
+    """
+    Buffer de reacciones, o None si REACTION_BUFFER_ENABLED es False
+    Redis si la cache por defecto es django_redis; si no, LocalRedis
+    """
+    global _buffer
+
+    if not get_buffer_config('REACTION_BUFFER_ENABLED', False):
+        return None
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                try:
+                    from django_redis import get_redis_connection
+                    _buffer = ReactionBuffer(get_redis_connection('default'))
+                except (ImportError, NotImplementedError):
+                    _buffer = ReactionBuffer(LocalRedis(), local=True)
+                    atexit.register(_buffer.flush)
+    return _buffer
@@ -0,0 +1,23 @@
+"""
+Recalcula los conteos por tipo de reacción (ReactionCount) desde los likes
+Uso: python manage.py reconcile_reaction_counts [--batch-size 1000]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.likes.models import reconcile_reaction_counts
+
+
+class Command(BaseCommand):
+    help = 'Corrige los conteos de reacciones por tipo de cada post'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Posts (rango de IDs) por lote'
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_reaction_counts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{fixed} conteo(s) corregido(s)'))
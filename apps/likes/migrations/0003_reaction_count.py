@@ -0,0 +1,82 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    Like = apps.get_model("likes", "Like")
+    ReactionCount = apps.get_model("likes", "ReactionCount")
+
+    rows = (
+        Like.objects.order_by()
+        .values("post_id", "reaction_type")
+        .annotate(total=Count("pk"))
+        .values_list("post_id", "reaction_type", "total")
+    )
+    ReactionCount.objects.bulk_create(
+        (
+            ReactionCount(post_id=post_id, reaction_type=reaction_type, count=total)
+            for post_id, reaction_type, total in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("likes", "0002_alter_like_options_like_reaction_type_and_more"),
+        ("posts", "0004_post_archive_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReactionCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reaction_type",
+                    models.CharField(
+                        choices=[
+                            ("like", "👍 Me gusta"),
+                            ("love", "❤️ Me encanta"),
+                            ("haha", "😂 Me divierte"),
+                            ("wow", "😮 Me asombra"),
+                            ("sad", "😢 Me entristece"),
+                            ("angry", "😠 Me enoja"),
+                        ],
+                        max_length=10,
+                        verbose_name="tipo de reacción",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, verbose_name="reacciones"),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reaction_counts",
+                        to="posts.post",
+                        verbose_name="publicación",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "conteo de reacciones",
+                "verbose_name_plural": "conteos de reacciones",
+                "unique_together": {("post", "reaction_type")},
+            },
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -7,8 +7,10 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 
+from utils.mixins import DirtyFieldsMixin
 
-class Like(models.Model):
+
+class Like(DirtyFieldsMixin, models.Model):
     """
     Reacción de un usuario a una publicación
     Soporta múltiples tipos de reacciones
@@ -77,11 +79,46 @@ class Like(models.Model):
         if not self.post.can_view(self.user):
             raise ValidationError(_('No tienes permiso para reaccionar a esta publicación.'))
     
+    # El signal post_save usa el tipo anterior para mover el conteo
+    # entre reacciones (ReactionCount)
+    TRACKED_FIELDS = {'reaction_type'}
+    
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
 
 
+class ReactionCount(models.Model):
+    """
+    Número de reacciones de cada tipo en un post
+    Se actualiza por deltas desde los signals de Like; el comando
+    reconcile_reaction_counts corrige diferencias con la tabla de likes
+    """
+    
+    post = models.ForeignKey(
+        'posts.Post',
+        on_delete=models.CASCADE,
+        related_name='reaction_counts',
+        verbose_name=_('publicación')
+    )
+    
+    reaction_type = models.CharField(
+        _('tipo de reacción'),
+        max_length=10,
+        choices=Like.REACTION_CHOICES
+    )
+    
+    count = models.PositiveIntegerField(_('reacciones'), default=0)
+    
+    class Meta:
+        verbose_name = _('conteo de reacciones')
+        verbose_name_plural = _('conteos de reacciones')
+        unique_together = ('post', 'reaction_type')
+    
+    def __str__(self):
+        return f"Post {self.post_id}: {self.count} {self.reaction_type}"
+
+
 # ============================================================================
 # FUNCIONES AUXILIARES
 # ============================================================================
@@ -117,9 +154,64 @@ def has_user_liked_post(user, post):
     return Like.objects.filter(user=user, post=post).exists()
 
 
+def get_user_reactions(user, posts):
+    """
+    Reacciones de un usuario a una página de posts (una sola consulta)
+    
+    Args:
+        user: Usuario
+        posts: Iterable de posts ya cargados
+    
+    Returns:
+        dict: {post_id: reaction_type}
+    """
+    from .buffer import get_reaction_buffer
+    
+    post_ids = [post.pk for post in posts]
+    if not post_ids or not user.is_authenticated:
+        return {}
+    
+    reactions = dict(
+        Like.objects.filter(
+            user=user, post_id__in=post_ids
+        ).values_list('post_id', 'reaction_type')
+    )
+    
+    # Cambios aún en el buffer de posts virales
+    buffer = get_reaction_buffer()
+    if buffer is not None:
+        reactions.update(buffer.pending_reactions(user.pk, post_ids))
+        reactions = {post_id: reaction for post_id, reaction in reactions.items() if reaction}
+    
+    return reactions
+
+
+def annotate_viewer_reactions(posts, user):
+    """
+    Anota en cada post la reacción del lector (viewer_reaction) y para
+    quién se calculó (viewer_id); los template tags de likes la leen en
+    lugar de consultar la base de datos
+    
+    Args:
+        posts: Lista de posts ya cargados
+        user: Usuario que ve la página
+    
+    Returns:
+        La misma lista de posts
+    """
+    reactions = get_user_reactions(user, posts)
+    
+    for post in posts:
+        post.viewer_reaction = reactions.get(post.pk)
+        post.viewer_id = user.pk
+    
+    return posts
+
+
 def get_post_likes_count(post):
     """
     Obtiene el conteo de reacciones de un post
+    Suma las filas de ReactionCount (una por tipo) sin recorrer los likes
     
     Args:
         post: Publicación
@@ -127,12 +219,14 @@ def get_post_likes_count(post):
     Returns:
         int: Número de reacciones
     """
-    return Like.objects.filter(post=post).count()
+    return sum(get_post_reactions_summary(post).values())
 
 
 def get_post_reactions_summary(post):
     """
     Obtiene un resumen de las reacciones por tipo
+    Lee ReactionCount: a lo sumo una fila por tipo de reacción, sin importar
+    cuántos likes tenga el post
     
     Args:
         post: Publicación
@@ -140,14 +234,302 @@ def get_post_reactions_summary(post):
     Returns:
         dict: {'like': 5, 'love': 3, 'haha': 2, ...}
     """
-    from django.db.models import Count
+    return get_reactions_summaries([post.pk])[post.pk]
+
+
+def get_reactions_summaries(post_ids):
+    """
+    Resumen de reacciones de varios posts con una sola consulta
+    (más una lectura del buffer de reacciones si está activo)
+    
+    Returns:
+        dict: {post_id: {'like': 5, 'love': 3, ...}} ordenado por conteo
+    """
+    from .buffer import TOTAL_FIELD, get_reaction_buffer
+    
+    post_ids = list(post_ids)
+    reactions = {post_id: {} for post_id in post_ids}
+    
+    rows = ReactionCount.objects.filter(
+        post_id__in=post_ids, count__gt=0
+    ).values_list('post_id', 'reaction_type', 'count')
+    for post_id, reaction_type, count in rows:
+        reactions[post_id][reaction_type] = count
+    
+    # Deltas aún en el buffer de posts virales
+    buffer = get_reaction_buffer()
+    if buffer is not None:
+        for post_id, pending in buffer.pending_counts_many(post_ids).items():
+            for reaction_type, delta in pending.items():
+                if reaction_type != TOTAL_FIELD:
+                    counts = reactions[post_id]
+                    counts[reaction_type] = counts.get(reaction_type, 0) + delta
+    
+    return {
+        post_id: dict(sorted(
+            ((reaction_type, count) for reaction_type, count in counts.items() if count > 0),
+            key=lambda item: (-item[1], item[0])
+        ))
+        for post_id, counts in reactions.items()
+    }
+
+
+def apply_reaction_deltas(post_id, deltas):
+    """
+    Aplica cambios exactos a los conteos por tipo de un post
+    
+    Args:
+        post_id: ID del post
+        deltas: {reaction_type: delta}
+    """
+    apply_reaction_count_deltas({
+        (post_id, reaction_type): delta for reaction_type, delta in deltas.items()
+    })
+
+
+def apply_reaction_count_deltas(deltas):
+    """
+    Aplica cambios exactos a ReactionCount de uno o varios posts
+    Una consulta para crear las filas que falten y un UPDATE por valor de delta
+    
+    Los incrementos crean la fila si falta; los decrementos solo actualizan
+    (no se crean filas para un post que se está eliminando en cascada)
+    
+    Args:
+        deltas: {(post_id, reaction_type): delta}
+    """
+    from collections import defaultdict
+    from django.db.models import F, Q
+    from django.db.models.functions import Greatest
+    
+    added = [key for key, delta in deltas.items() if delta > 0]
+    if added:
+        ReactionCount.objects.bulk_create(
+            [
+                ReactionCount(post_id=post_id, reaction_type=reaction_type)
+                for post_id, reaction_type in added
+            ],
+            ignore_conflicts=True
+        )
+    
+    by_delta = defaultdict(Q)
+    for (post_id, reaction_type), delta in deltas.items():
+        if delta:
+            by_delta[delta] |= Q(post_id=post_id, reaction_type=reaction_type)
+    
+    for delta, condition in by_delta.items():
+        ReactionCount.objects.filter(condition).update(count=Greatest(F('count') + delta, 0))
+
+
+def _lock_reactions(desired):
+    """
+    Reacciones guardadas de los pares indicados, bloqueadas hasta el final
+    de la transacción (SELECT ... FOR UPDATE en orden de id)
+
+    Returns:
+        dict: {(user_id, post_id): (pk, reaction_type)}
+    """
+    rows = Like.objects.select_for_update().filter(
+        user_id__in={user_id for user_id, _ in desired},
+        post_id__in={post_id for _, post_id in desired}
+    ).order_by('pk').values_list('pk', 'user_id', 'post_id', 'reaction_type')
+    return {
+        (user_id, post_id): (pk, reaction_type)
+        for pk, user_id, post_id, reaction_type in rows
+        if (user_id, post_id) in desired
+    }
+
+
+def _sync_locked_reactions(desired):
+    """
+    Un intento de sync_reactions dentro de su transacción
+
+    Returns:
+        tuple: (filas cambiadas, {(post_id, tipo): delta}, {post_id: delta
+        de likes}), o None si otra petición insertó una de las reacciones
+        después de la lectura
+    """
+    from collections import defaultdict
+    from django.db import IntegrityError, connection, transaction
     
-    reactions = Like.objects.filter(post=post).values('reaction_type').annotate(
-        count=Count('reaction_type')
-    ).order_by('-count')
+    existing = _lock_reactions(desired)
     
-    summary = {reaction['reaction_type']: reaction['count'] for reaction in reactions}
-    return summary
+    inserted = []
+    removed = []
+    changed = defaultdict(list)
+    deltas = defaultdict(int)
+    likes_deltas = defaultdict(int)
+    
+    for (user_id, post_id), reaction_type in desired.items():
+        pk, previous = existing.get((user_id, post_id), (None, None))
+        if reaction_type == previous:
+            continue
+        
+        if pk is None:
+            inserted.append(Like(user_id=user_id, post_id=post_id, reaction_type=reaction_type))
+        elif reaction_type is None:
+            removed.append(pk)
+        else:
+            changed[reaction_type].append(pk)
+        
+        if reaction_type is not None:
+            deltas[(post_id, reaction_type)] += 1
+        if previous is not None:
+            deltas[(post_id, previous)] -= 1
+        likes_deltas[post_id] += (reaction_type is not None) - (previous is not None)
+    
+    # Primero las inserciones: si una choca, el intento se descarta sin
+    # haber escrito nada más
+    if inserted:
+        try:
+            with transaction.atomic():
+                Like.objects.bulk_create(inserted)
+        except IntegrityError:
+            return None
+    
+    # Las filas existentes están bloqueadas: siguen como se leyeron
+    if removed:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(Like._meta.db_table)} '
+                f'WHERE id IN ({", ".join(["%s"] * len(removed))})',
+                removed
+            )
+    for reaction_type, pks in changed.items():
+        Like.objects.filter(pk__in=pks).update(reaction_type=reaction_type)
+    
+    total = len(inserted) + len(removed) + sum(len(pks) for pks in changed.values())
+    return total, deltas, likes_deltas
+
+
+def sync_reactions(desired):
+    """
+    Lleva la tabla de likes al estado indicado con escrituras en lote y
+    aplica a ReactionCount, al contador de likes de cada post y a la
+    cabecera del feed de cada usuario los deltas de las filas cambiadas.
+    No pasa por Like.save ni por los signals.
+    
+    Las reacciones existentes se bloquean al leerlas, así que un toggle
+    concurrente espera a que esta transacción confirme; las nuevas se
+    insertan sin ON CONFLICT y, si otra petición insertó la misma antes, el
+    intento se repite con una lectura nueva (TOGGLE_REACTION_ATTEMPTS)
+    
+    Args:
+        desired: {(user_id, post_id): reaction_type o None}
+    
+    Returns:
+        int: Filas de Like creadas, cambiadas o eliminadas
+    """
+    from django.db import OperationalError, transaction
+    from apps.feed.timeline import invalidate_feed_heads
+    from utils import counters
+    
+    if not desired:
+        return 0
+    
+    with transaction.atomic():
+        for attempt in range(TOGGLE_REACTION_ATTEMPTS):
+            result = _sync_locked_reactions(desired)
+            if result is not None:
+                break
+        else:
+            raise OperationalError('sync_reactions: las reacciones cambiaron en cada intento')
+        
+        total, deltas, likes_deltas = result
+        apply_reaction_count_deltas(deltas)
+        for delta in {delta for delta in likes_deltas.values() if delta}:
+            counters.increment_many(
+                'post.likes',
+                [post_id for post_id, value in likes_deltas.items() if value == delta],
+                delta
+            )
+    
+    invalidate_feed_heads({user_id for user_id, _ in desired})
+    return total
+
+
+def set_reactions(user, desired):
+    """
+    Fija la reacción del usuario en varios posts (sincronización en lote)
+    Los posts virales pasan por el buffer de reacciones; el resto por
+    sync_reactions. Quien llama ya verificó que puede ver los posts.
+    
+    Args:
+        user: Usuario
+        desired: {post_id: reaction_type o None}
+    
+    Returns:
+        int: Reacciones cambiadas (incluye las que quedaron en el buffer)
+    """
+    from .buffer import get_reaction_buffer
+    
+    buffered = {}
+    buffer = get_reaction_buffer()
+    if buffer is not None:
+        hot = buffer.buffered_posts(user.pk, desired)
+        buffered = {post_id: desired[post_id] for post_id in hot}
+    
+    changed = 0
+    for post_id, reaction_type in buffered.items():
+        previous, current = buffer.set_reaction(user.pk, post_id, reaction_type)
+        changed += previous != current
+    
+    changed += sync_reactions({
+        (user.pk, post_id): reaction_type
+        for post_id, reaction_type in desired.items()
+        if post_id not in buffered
+    })
+    return changed
+
+
+def reconcile_reaction_counts(batch_size=1000):
+    """
+    Recalcula ReactionCount a partir de la tabla de likes
+    Recorre los posts por rangos de ID; en cada rango compara el GROUP BY de
+    Like con las filas guardadas y solo escribe las diferencias
+    
+    Returns:
+        int: Filas corregidas (creadas, actualizadas o eliminadas)
+    """
+    from django.db.models import Count, Max
+    from apps.posts.models import Post
+    
+    max_id = Post.objects.aggregate(max_id=Max('pk'))['max_id'] or 0
+    fixed = 0
+    
+    for start in range(0, max_id, batch_size):
+        id_range = {'post_id__gt': start, 'post_id__lte': start + batch_size}
+        
+        exact = {
+            (post_id, reaction_type): total
+            for post_id, reaction_type, total in Like.objects.filter(
+                **id_range
+            ).order_by().values('post_id', 'reaction_type').annotate(
+                total=Count('pk')
+            ).values_list('post_id', 'reaction_type', 'total')
+        }
+        stored = {
+            (row.post_id, row.reaction_type): row
+            for row in ReactionCount.objects.filter(**id_range)
+        }
+        
+        stale = []
+        for key, row in stored.items():
+            value = exact.get(key, 0)
+            if row.count != value:
+                row.count = value
+                stale.append(row)
+        missing = [
+            ReactionCount(post_id=post_id, reaction_type=reaction_type, count=total)
+            for (post_id, reaction_type), total in exact.items()
+            if (post_id, reaction_type) not in stored
+        ]
+        
+        ReactionCount.objects.bulk_update(stale, ['count'])
+        ReactionCount.objects.bulk_create(missing, ignore_conflicts=True)
+        fixed += len(stale) + len(missing)
+    
+    return fixed
 
 
 def get_post_likers(post, limit=None):
@@ -169,28 +551,37 @@ def get_post_likers(post, limit=None):
     return [{'user': like.user, 'reaction': like.reaction_type} for like in likes]
 
 
-def get_user_liked_posts(user, limit=None):
+def get_user_liked_posts(user, limit=None, viewer=None):
     """
     Obtiene los posts a los que un usuario ha reaccionado
+    Ordenados por la fecha de la reacción (índice (user, -created_at) de Like)
     
     Args:
         user: Usuario
         limit: Límite de posts a retornar (opcional)
+        viewer: Si se indica, solo los posts que este usuario puede ver
     
     Returns:
-        QuerySet: Posts con reacción del usuario
+        QuerySet: Posts con reacción del usuario, anotados con liked_at y
+        like_id (clave de paginación ('-liked_at', '-like_id'))
     """
+    from django.db.models import F
     from apps.posts.models import Post
     
-    liked_post_ids = Like.objects.filter(user=user).values_list('post_id', flat=True)
+    posts = Post.objects.all()
+    if viewer is not None:
+        posts = posts.visible_to(viewer)
     
-    posts = Post.objects.filter(
-        id__in=liked_post_ids
+    posts = posts.filter(
+        likes__user=user
+    ).annotate(
+        liked_at=F('likes__created_at'),
+        like_id=F('likes__id')
     ).select_related(
         'author', 'author__profile'
     ).prefetch_related(
         'images', 'videos'
-    ).order_by('-created_at')
+    ).order_by('-liked_at', '-like_id')
     
     if limit:
         posts = posts[:limit]
@@ -198,49 +589,226 @@ def get_user_liked_posts(user, limit=None):
     return posts
 
 
-def toggle_reaction(user, post, reaction_type='like'):
+# Alterna la reacción en una sola sentencia (PostgreSQL):
+# - existing: la reacción actual, bloqueada
+# - removed: se elimina si es del mismo tipo
+# - changed: se cambia el tipo si es otro
+# - inserted: se inserta si no había; si otra transacción la insertó a la
+#   vez, ON CONFLICT DO NOTHING no cambia nada y la sentencia se repite
+#   (ver _toggle_reaction_sql)
+# - inc / dec: ajustan ReactionCount solo con las filas realmente cambiadas
+# Devuelve (tipo anterior, tipo actual, si se eliminó)
+TOGGLE_REACTION_SQL = """
+WITH existing AS (
+    SELECT id, reaction_type FROM {likes}
+    WHERE user_id = %(user_id)s AND post_id = %(post_id)s
+    FOR UPDATE
+),
+removed AS (
+    DELETE FROM {likes}
+    WHERE id IN (SELECT id FROM existing WHERE reaction_type = %(reaction_type)s)
+    RETURNING reaction_type
+),
+changed AS (
+    UPDATE {likes} SET reaction_type = %(reaction_type)s
+    WHERE id IN (SELECT id FROM existing WHERE reaction_type <> %(reaction_type)s)
+    RETURNING reaction_type
+),
+inserted AS (
+    INSERT INTO {likes} (user_id, post_id, reaction_type, created_at)
+    SELECT %(user_id)s, %(post_id)s, %(reaction_type)s, %(now)s
+    WHERE NOT EXISTS (SELECT 1 FROM existing)
+    ON CONFLICT (user_id, post_id) DO NOTHING
+    RETURNING reaction_type
+),
+inc AS (
+    INSERT INTO {counts} (post_id, reaction_type, count)
+    SELECT %(post_id)s, reaction_type, 1 FROM (
+        SELECT reaction_type FROM changed
+        UNION ALL
+        SELECT reaction_type FROM inserted
+    ) added
+    ON CONFLICT (post_id, reaction_type)
+    DO UPDATE SET count = {counts}.count + 1
+),
+dec AS (
+    UPDATE {counts} SET count = GREATEST(count - 1, 0)
+    WHERE post_id = %(post_id)s AND reaction_type IN (
+        SELECT reaction_type FROM removed
+        UNION ALL
+        SELECT reaction_type FROM existing WHERE EXISTS (SELECT 1 FROM changed)
+    )
+)
+SELECT
+    (SELECT reaction_type FROM existing),
+    COALESCE((SELECT reaction_type FROM changed), (SELECT reaction_type FROM inserted)),
+    EXISTS (SELECT 1 FROM removed)
+"""
+
+# Reintentos ante una reacción insertada o eliminada por otra petición
+# entre la lectura y la escritura
+TOGGLE_REACTION_ATTEMPTS = 3
+
+
+def _toggle_reaction_sql(user, post, reaction_type):
+    from django.db import OperationalError, connection
+    from django.utils import timezone
+    
+    qn = connection.ops.quote_name
+    sql = TOGGLE_REACTION_SQL.format(
+        likes=qn(Like._meta.db_table),
+        counts=qn(ReactionCount._meta.db_table)
+    )
+    params = {
+        'user_id': user.pk,
+        'post_id': post.pk,
+        'reaction_type': reaction_type,
+        'now': timezone.now(),
+    }
+    
+    with connection.cursor() as cursor:
+        for attempt in range(TOGGLE_REACTION_ATTEMPTS):
+            cursor.execute(sql, params)
+            previous, current, removed = cursor.fetchone()
+            if removed:
+                return previous, None
+            if current is not None:
+                return previous, current
+            # Sin cambios: otra transacción insertó la reacción después de
+            # nuestra lectura. La sentencia siguiente ya la ve (READ COMMITTED)
+    
+    raise OperationalError('toggle_reaction: la reacción cambió en cada intento')
+
+
+def _read_reaction(user, post):
+    """
+    (pk, tipo) de la reacción del usuario en el post, o None
+    """
+    return Like.objects.filter(
+        user=user, post=post
+    ).values_list('pk', 'reaction_type').first()
+
+
+def _toggle_reaction_orm(user, post, reaction_type):
+    """
+    Misma operación en otros motores: leer la reacción actual y borrarla,
+    cambiarla o insertarla condicionada a que siga como se leyó; si otra
+    petición la cambió entre medio se vuelve a leer
+    Sin signals: los efectos los aplica toggle_reaction
+    """
+    from django.db import IntegrityError, OperationalError, connection, transaction
+    
+    for attempt in range(TOGGLE_REACTION_ATTEMPTS):
+        existing = _read_reaction(user, post)
+        previous = existing[1] if existing else None
+        
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    Like.objects.bulk_create(
+                        [Like(user=user, post=post, reaction_type=reaction_type)]
+                    )
+            except IntegrityError:
+                continue
+            current = reaction_type
+        elif previous == reaction_type:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(Like._meta.db_table)} '
+                    f'WHERE id = %s AND reaction_type = %s',
+                    [existing[0], previous]
+                )
+                if not cursor.rowcount:
+                    continue
+            current = None
+        else:
+            if not Like.objects.filter(
+                pk=existing[0], reaction_type=previous
+            ).update(reaction_type=reaction_type):
+                continue
+            current = reaction_type
+        
+        deltas = {}
+        if previous:
+            deltas[previous] = -1
+        if current:
+            deltas[current] = deltas.get(current, 0) + 1
+        apply_reaction_deltas(post.pk, deltas)
+        
+        return previous, current
+    
+    raise OperationalError('toggle_reaction: la reacción cambió en cada intento')
+
+
+def toggle_reaction(user, post, reaction_type='like', validate=True):
     """
     Alterna o cambia la reacción de un usuario en un post
     
+    En PostgreSQL es una sola sentencia (TOGGLE_REACTION_SQL); en otros
+    motores, una lectura y una escritura condicionada más el ajuste de
+    ReactionCount. Ambas vías cuentan solo los cambios efectivos aunque
+    dos peticiones del mismo usuario se crucen. Con
+    REACTION_BUFFER_ENABLED, los posts virales se escriben en el buffer
+    (ver buffer.py). No pasa por
+    Like.save ni por los signals: aquí se registran el delta del contador
+    de likes y la invalidación del feed del lector.
+    
     Args:
         user: Usuario que reacciona
         post: Publicación
         reaction_type: Tipo de reacción ('like', 'love', 'haha', etc.)
+        validate: False si quien llama ya verificó que el post no está
+            archivado y que el usuario puede verlo (evita repetir can_view)
     
     Returns:
         tuple: (reacted: bool, reaction_type: str, reactions_count: int)
             - reacted: True si hay reacción, False si se quitó
             - reaction_type: Tipo de reacción actual (o None si se quitó)
             - reactions_count: Nuevo conteo de reacciones del post
+    
+    Raises:
+        ValidationError: Si validate y el post no admite la reacción
     """
-    try:
-        # Intentar obtener la reacción existente
-        like = Like.objects.get(user=user, post=post)
-        
-        # Si es la misma reacción, quitarla
-        if like.reaction_type == reaction_type:
-            like.delete()
-            reacted = False
-            current_reaction = None
+    from django.db import connection, transaction
+    from apps.feed.timeline import invalidate_feed_heads
+    from utils import counters
+    from .buffer import TOTAL_FIELD, get_reaction_buffer
+    
+    if validate:
+        # Solo clean() y choices; los FK ya son instancias cargadas
+        Like(user=user, post=post, reaction_type=reaction_type).full_clean(
+            exclude=['user', 'post'], validate_unique=False
+        )
+    
+    # Posts virales: el cambio queda en el buffer hasta el próximo flush
+    buffer = get_reaction_buffer()
+    if buffer is not None and buffer.should_buffer(post.pk, user.pk):
+        previous, current = buffer.toggle(user, post, reaction_type)
+        invalidate_feed_heads([user.pk])
+        reactions_count = (
+            counters.get_value('post.likes', post.pk, post.likes_count) +
+            buffer.pending_counts(post.pk).get(TOTAL_FIELD, 0)
+        )
+        return current is not None, current, max(reactions_count, 0)
+    
+    # Valor guardado + pendiente, leído antes de registrar este cambio
+    current_count = counters.get_value('post.likes', post.pk, post.likes_count)
+    if buffer is not None:
+        current_count += buffer.pending_counts(post.pk).get(TOTAL_FIELD, 0)
+    
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            previous, current = _toggle_reaction_sql(user, post, reaction_type)
         else:
-            # Cambiar a la nueva reacción
-            like.reaction_type = reaction_type
-            like.save()
-            reacted = True
-            current_reaction = reaction_type
-            
-    except Like.DoesNotExist:
-        # Crear nueva reacción
-        Like.objects.create(user=user, post=post, reaction_type=reaction_type)
-        reacted = True
-        current_reaction = reaction_type
+            previous, current = _toggle_reaction_orm(user, post, reaction_type)
+        
+        delta = (current is not None) - (previous is not None)
+        if delta:
+            counters.increment('post.likes', post.pk, delta)
     
-    # Actualizar contador en el post
-    reactions_count = get_post_likes_count(post)
-    post.likes_count = reactions_count
-    post.save(update_fields=['likes_count'])
+    invalidate_feed_heads([user.pk])
     
-    return reacted, current_reaction, reactions_count
+    return current is not None, current, max(current_count + delta, 0)
 
 
 def remove_like(user, post):
@@ -254,12 +822,6 @@ def remove_like(user, post):
     Returns:
         bool: True si se eliminó, False si no existía
     """
+    # El contador lo actualiza el signal post_delete de Like
     deleted_count, _ = Like.objects.filter(user=user, post=post).delete()
-    
-    if deleted_count > 0:
-        # Actualizar contador
-        post.likes_count = get_post_likes_count(post)
-        post.save(update_fields=['likes_count'])
-        return True
-    
-    return False
\ No newline at end of file
+    return deleted_count > 0
\ No newline at end of file
@@ -1,28 +1,59 @@
 """
 Signals para el módulo de likes
-Actualiza contadores automáticamente
+Actualiza contadores automáticamente (agrupados por utils.counters)
 """
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Like
+
+from apps.feed.timeline import invalidate_feed_heads
+from utils import counters
+from .models import Like, apply_reaction_deltas
 
 
 @receiver(post_save, sender=Like)
 def update_likes_count_on_create(sender, instance, created, **kwargs):
     """
-    Actualiza el contador de likes cuando se crea un like
+    Suma uno al contador de likes del post
     """
     if created:
-        post = instance.post
-        post.likes_count = post.likes.count()
-        post.save(update_fields=['likes_count'])
+        counters.increment('post.likes', instance.post_id)
 
 
 @receiver(post_delete, sender=Like)
 def update_likes_count_on_delete(sender, instance, **kwargs):
     """
-    Actualiza el contador de likes cuando se elimina un like
+    Resta uno al contador de likes del post
+    """
+    counters.increment('post.likes', instance.post_id, -1)
+
+
+@receiver(post_save, sender=Like)
+def update_reaction_counts_on_save(sender, instance, created, **kwargs):
+    """
+    Suma uno al tipo nuevo; si la reacción cambió, resta uno al anterior
+    """
+    if created:
+        apply_reaction_deltas(instance.post_id, {instance.reaction_type: 1})
+        return
+    
+    previous = instance.get_dirty_fields().get('reaction_type')
+    if previous:
+        apply_reaction_deltas(instance.post_id, {previous: -1, instance.reaction_type: 1})
+
+
+@receiver(post_delete, sender=Like)
+def update_reaction_counts_on_delete(sender, instance, **kwargs):
+    """
+    Resta uno al tipo de la reacción eliminada
+    """
+    apply_reaction_deltas(instance.post_id, {instance.reaction_type: -1})
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_reactor_feed_head(sender, instance, **kwargs):
+    """
+    La reacción del lector forma parte de la respuesta de /feed/api/;
+    al cambiar se invalida su ETag
     """
-    post = instance.post
-    post.likes_count = post.likes.count()
-    post.save(update_fields=['likes_count'])
\ No newline at end of file
+    invalidate_feed_heads([instance.user_id])
@@ -0,0 +1,26 @@
+"""
+Tareas asíncronas (Celery) del módulo de likes
+"""
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def flush_reaction_buffer_task():
+    """
+    Aplica las reacciones acumuladas de los posts virales (likes.buffer)
+    Programada en CELERY_BEAT_SCHEDULE cada REACTION_BUFFER_FLUSH_SECONDS
+    """
+    from .buffer import get_reaction_buffer
+
+    buffer = get_reaction_buffer()
+    if buffer is None:
+        return
+
+    applied = buffer.flush()
+    if applied:
+        logger.info('reactions.flush filas=%s', applied)
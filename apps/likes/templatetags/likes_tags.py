@@ -2,11 +2,22 @@
 Template tags para el módulo de likes
 """
 from django import template
-from apps.likes.models import has_user_liked_post, get_user_reaction
+from apps.likes.models import get_user_reactions
 
 register = template.Library()
 
 
+def _viewer_reaction(post, user):
+    """
+    Reacción del usuario: la anotada por prepare_post_cards si se calculó
+    para este usuario; si no, una consulta (más el buffer de reacciones)
+    """
+    if getattr(post, 'viewer_id', None) == user.pk:
+        return post.viewer_reaction
+    
+    return get_user_reactions(user, [post]).get(post.pk)
+
+
 @register.filter(name='is_liked_by')
 def is_liked_by(post, user):
     """
@@ -15,7 +26,7 @@ def is_liked_by(post, user):
     """
     if not user or not user.is_authenticated:
         return False
-    return has_user_liked_post(user, post)
+    return _viewer_reaction(post, user) is not None
 
 
 @register.filter(name='user_reaction')
@@ -28,8 +39,7 @@ def user_reaction(post, user):
     if not user or not user.is_authenticated:
         return None
     
-    reaction = get_user_reaction(user, post)
-    return reaction.reaction_type if reaction else None
+    return _viewer_reaction(post, user)
 
 
 @register.simple_tag
@@ -41,10 +51,10 @@ def get_like_status(post, user):
     if not user or not user.is_authenticated:
         return {'reacted': False, 'reaction_type': None, 'count': post.likes_count}
     
-    reaction = get_user_reaction(user, post)
+    reaction_type = _viewer_reaction(post, user)
     
     return {
-        'reacted': reaction is not None,
-        'reaction_type': reaction.reaction_type if reaction else None,
+        'reacted': reaction_type is not None,
+        'reaction_type': reaction_type,
         'count': post.likes_count
     }
\ No newline at end of file
@@ -0,0 +1,565 @@
+"""
+Tests del módulo de likes
+"""
+import json
+from io import StringIO
+import threading
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.posts.cards import prepare_post_cards
+from utils.testing import make_post, make_user
+
+from . import buffer as reaction_buffer
+from .buffer import (
+    DIRTY_KEY, FLUSH_LOCK_KEY, INFLIGHT_USERS_KEY, TOTAL_FIELD, LocalRedis, ReactionBuffer
+)
+from .models import (
+    Like, ReactionCount, apply_reaction_count_deltas, get_post_reactions_summary,
+    get_user_reactions, reconcile_reaction_counts, sync_reactions, toggle_reaction
+)
+from .templatetags.likes_tags import get_like_status, user_reaction
+
+
+def reaction_counts(post):
+    return dict(
+        ReactionCount.objects.filter(post=post, count__gt=0).values_list('reaction_type', 'count')
+    )
+
+
+# ============================================================================
+# TOGGLE
+# ============================================================================
+
+class ToggleReactionTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('lector')
+        self.post = make_post(make_user('autor'))
+
+    def toggle_after_stale_read(self, stale, reaction_type):
+        """
+        toggle_reaction cuya primera lectura devuelve `stale` (lo que había
+        antes de que otra petición escribiera); las siguientes son reales
+        """
+        from . import models as likes_models
+
+        read = likes_models._read_reaction
+        reads = [stale]
+
+        def stale_read(user, post):
+            return reads.pop() if reads else read(user, post)
+
+        with mock.patch.object(likes_models, '_read_reaction', side_effect=stale_read):
+            return toggle_reaction(self.user, self.post, reaction_type)
+
+    def test_toggle_adds_changes_and_removes(self):
+        self.assertEqual(toggle_reaction(self.user, self.post, 'like')[:2], (True, 'like'))
+        self.assertEqual(reaction_counts(self.post), {'like': 1})
+
+        self.assertEqual(toggle_reaction(self.user, self.post, 'love')[:2], (True, 'love'))
+        self.assertEqual(reaction_counts(self.post), {'love': 1})
+
+        self.assertEqual(toggle_reaction(self.user, self.post, 'love')[:2], (False, None))
+        self.assertEqual(reaction_counts(self.post), {})
+        self.assertFalse(Like.objects.filter(user=self.user, post=self.post).exists())
+
+    def test_concurrent_first_reaction_counts_once(self):
+        # Otra petición del mismo usuario insertó la reacción después de
+        # que esta leyera "sin reacción"
+        Like.objects.create(user=self.user, post=self.post, reaction_type='like')
+
+        reacted, current, _ = self.toggle_after_stale_read(None, 'like')
+
+        # El segundo clic se aplica sobre la reacción ya guardada: la quita
+        self.assertEqual((reacted, current), (False, None))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 0)
+        self.assertEqual(reaction_counts(self.post), {})
+
+    def test_concurrent_change_is_not_applied_twice(self):
+        like = Like.objects.create(user=self.user, post=self.post, reaction_type='like')
+
+        # Entre la lectura y la escritura otra petición cambió a 'love'
+        toggle_reaction(self.user, self.post, 'love')
+
+        reacted, current, _ = self.toggle_after_stale_read((like.pk, 'like'), 'wow')
+
+        self.assertEqual((reacted, current), (True, 'wow'))
+        self.assertEqual(reaction_counts(self.post), {'wow': 1})
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'TOGGLE_REACTION_SQL es de PostgreSQL')
+class ConcurrentToggleReactionSQLTests(TransactionTestCase):
+    """
+    Dos primeras reacciones simultáneas del mismo usuario: la segunda espera
+    a que la primera confirme y debe aplicarse sobre ella, no sumarse
+    """
+
+    def test_simultaneous_first_reactions(self):
+        user = make_user('lector')
+        post = make_post(make_user('autor'))
+        inserted = threading.Event()
+        results = []
+
+        def first():
+            try:
+                with transaction.atomic():
+                    results.append(toggle_reaction(user, post, 'like', validate=False))
+                    inserted.set()
+                    # Mantener la fila sin confirmar mientras la otra entra
+                    threading.Event().wait(0.5)
+            finally:
+                connection.close()
+
+        def second():
+            try:
+                inserted.wait(5)
+                results.append(toggle_reaction(user, post, 'like', validate=False))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([result[:2] for result in results], [(True, 'like'), (False, None)])
+        self.assertFalse(Like.objects.filter(post=post).exists())
+        self.assertEqual(reaction_counts(post), {})
+
+
+# ============================================================================
+# CONTEOS POR TIPO
+# ============================================================================
+
+class ReactionCountTests(TestCase):
+
+    def setUp(self):
+        author = make_user('autor')
+        self.post = make_post(author)
+        self.other_post = make_post(author)
+        self.users = [make_user(f'lector{index}') for index in range(3)]
+
+    def test_likes_keep_counts_by_type(self):
+        likes = [
+            Like.objects.create(user=user, post=self.post, reaction_type=reaction_type)
+            for user, reaction_type in zip(self.users, ('like', 'love', 'love'))
+        ]
+        self.assertEqual(get_post_reactions_summary(self.post), {'love': 2, 'like': 1})
+
+        likes[0].reaction_type = 'love'
+        likes[0].save()
+        likes[1].delete()
+
+        self.assertEqual(get_post_reactions_summary(self.post), {'love': 2})
+
+    def test_deltas_create_rows_and_never_go_negative(self):
+        apply_reaction_count_deltas({
+            (self.post.pk, 'like'): 2,
+            (self.post.pk, 'wow'): -1,
+            (self.other_post.pk, 'like'): 2,
+        })
+        apply_reaction_count_deltas({(self.post.pk, 'like'): -5})
+
+        self.assertEqual(reaction_counts(self.post), {})
+        self.assertEqual(reaction_counts(self.other_post), {'like': 2})
+        # Los decrementos no crean filas
+        self.assertFalse(ReactionCount.objects.filter(reaction_type='wow').exists())
+
+    def test_reconcile_fixes_only_drifted_rows(self):
+        for user in self.users:
+            Like.objects.create(user=user, post=self.post, reaction_type='like')
+        Like.objects.create(user=self.users[0], post=self.other_post, reaction_type='haha')
+        ReactionCount.objects.filter(post=self.post).update(count=7)
+        ReactionCount.objects.filter(post=self.other_post).delete()
+        ReactionCount.objects.create(post=self.other_post, reaction_type='sad', count=4)
+
+        self.assertEqual(reconcile_reaction_counts(batch_size=1), 3)
+
+        self.assertEqual(reaction_counts(self.post), {'like': 3})
+        self.assertEqual(reaction_counts(self.other_post), {'haha': 1})
+        self.assertEqual(reconcile_reaction_counts(), 0)
+
+    def test_reconcile_command(self):
+        Like.objects.create(user=self.users[0], post=self.post, reaction_type='like')
+        ReactionCount.objects.all().delete()
+        out = StringIO()
+
+        call_command('reconcile_reaction_counts', batch_size=1, stdout=out)
+
+        self.assertIn('1 conteo(s) corregido(s)', out.getvalue())
+        self.assertEqual(reaction_counts(self.post), {'like': 1})
+
+
+# ============================================================================
+# SINCRONIZACIÓN EN LOTE
+# ============================================================================
+
+class SyncReactionsTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('lector')
+        self.other = make_user('otro')
+        self.post = make_post(make_user('autor'))
+
+    def test_applies_only_changed_rows(self):
+        Like.objects.create(user=self.user, post=self.post, reaction_type='like')
+        Like.objects.create(user=self.other, post=self.post, reaction_type='love')
+
+        changed = sync_reactions({
+            (self.user.pk, self.post.pk): 'like',
+            (self.other.pk, self.post.pk): 'wow',
+        })
+
+        self.assertEqual(changed, 1)
+        self.assertEqual(reaction_counts(self.post), {'like': 1, 'wow': 1})
+
+    def test_concurrent_insert_is_not_counted_twice(self):
+        from . import models as likes_models
+
+        # Otra petición insertó la reacción después de la lectura de esta
+        Like.objects.create(user=self.user, post=self.post, reaction_type='like')
+
+        lock = likes_models._lock_reactions
+        reads = [{}]
+
+        def stale_lock(desired):
+            return reads.pop() if reads else lock(desired)
+
+        with mock.patch.object(likes_models, '_lock_reactions', side_effect=stale_lock):
+            changed = sync_reactions({(self.user.pk, self.post.pk): 'love'})
+
+        # El reintento parte de la fila guardada: cambia 'like' por 'love'
+        self.assertEqual(changed, 1)
+        self.assertEqual(Like.objects.get(user=self.user, post=self.post).reaction_type, 'love')
+        self.assertEqual(reaction_counts(self.post), {'love': 1})
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'SELECT ... FOR UPDATE')
+class ConcurrentSyncReactionsTests(TransactionTestCase):
+    """
+    Un toggle que llega mientras sync_reactions tiene la fila bloqueada
+    espera a que confirme y se aplica sobre el estado sincronizado
+    """
+
+    def test_toggle_waits_for_sync(self):
+        user = make_user('lector')
+        post = make_post(make_user('autor'))
+        toggle_reaction(user, post, 'like', validate=False)
+        synced = threading.Event()
+
+        def sync():
+            try:
+                with transaction.atomic():
+                    sync_reactions({(user.pk, post.pk): 'love'})
+                    synced.set()
+                    threading.Event().wait(0.5)
+            finally:
+                connection.close()
+
+        def toggle():
+            try:
+                synced.wait(5)
+                toggle_reaction(user, post, 'wow', validate=False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=sync), threading.Thread(target=toggle)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(Like.objects.get(user=user, post=post).reaction_type, 'wow')
+        self.assertEqual(reaction_counts(post), {'wow': 1})
+
+
+# ============================================================================
+# REACCIONES DEL LECTOR
+# ============================================================================
+
+class ViewerReactionsTests(TestCase):
+
+    def setUp(self):
+        self.viewer = make_user('lector')
+        author = make_user('autor')
+        self.posts = [make_post(author) for _ in range(3)]
+        Like.objects.create(user=self.viewer, post=self.posts[0], reaction_type='like')
+        Like.objects.create(user=self.viewer, post=self.posts[2], reaction_type='haha')
+
+    def test_page_is_annotated_with_one_query(self):
+        with self.assertNumQueries(1):
+            posts = prepare_post_cards(self.posts, self.viewer)
+
+        with self.assertNumQueries(0):
+            reactions = [user_reaction(post, self.viewer) for post in posts]
+            status = get_like_status(posts[1], self.viewer)
+
+        self.assertEqual(reactions, ['like', None, 'haha'])
+        self.assertEqual((status['reacted'], status['reaction_type']), (False, None))
+
+    def test_other_users_are_looked_up(self):
+        other = make_user('otro')
+        Like.objects.create(user=other, post=self.posts[1], reaction_type='love')
+        posts = prepare_post_cards(self.posts, self.viewer)
+
+        self.assertEqual(user_reaction(posts[1], other), 'love')
+
+    def test_pending_buffer_changes_win(self):
+        buffer = ReactionBuffer(LocalRedis())
+        buffer.toggle(self.viewer, self.posts[0], 'like')
+        buffer.toggle(self.viewer, self.posts[1], 'wow')
+
+        with mock.patch.object(reaction_buffer, 'get_reaction_buffer', return_value=buffer):
+            reactions = get_user_reactions(self.viewer, self.posts)
+
+        self.assertEqual(reactions, {self.posts[1].pk: 'wow', self.posts[2].pk: 'haha'})
+
+
+# ============================================================================
+# BUFFER DE REACCIONES
+# ============================================================================
+
+class ReactionBufferTests(TestCase):
+
+    def setUp(self):
+        self.buffer = ReactionBuffer(LocalRedis())
+        self.user = make_user('lector')
+        self.other = make_user('otro')
+        self.post = make_post(make_user('autor'))
+
+    def pending(self, user):
+        return self.buffer.pending_reactions(user.pk, [self.post.pk]).get(self.post.pk, 'ninguno')
+
+    def flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.buffer.flush()
+
+    def test_toggle_alternates_on_pending_state(self):
+        self.assertEqual(self.buffer.toggle(self.user, self.post, 'like'), (None, 'like'))
+        self.assertEqual(self.buffer.toggle(self.user, self.post, 'love'), ('like', 'love'))
+        self.assertEqual(self.buffer.toggle(self.user, self.post, 'love'), ('love', None))
+
+        self.assertIsNone(self.pending(self.user))
+        counts = self.buffer.pending_counts(self.post.pk)
+        self.assertEqual((counts['like'], counts['love'], counts[TOTAL_FIELD]), (0, 0, 0))
+
+    def test_toggle_starts_from_stored_reaction(self):
+        Like.objects.create(user=self.user, post=self.post, reaction_type='like')
+
+        self.assertEqual(self.buffer.toggle(self.user, self.post, 'like'), ('like', None))
+        self.assertEqual(self.buffer.pending_counts(self.post.pk)[TOTAL_FIELD], -1)
+
+    def test_double_click_reads_previous_once(self):
+        stored = self.buffer._stored_reaction
+        clicks = []
+        raced = []
+
+        def racing_read(user_id, post_id):
+            # El segundo clic se escribe entre la lectura y la escritura del primero
+            if not raced:
+                raced.append(True)
+                clicks.append(self.buffer.toggle(self.user, self.post, 'like'))
+            return stored(user_id, post_id)
+
+        with mock.patch.object(self.buffer, '_stored_reaction', side_effect=racing_read):
+            clicks.append(self.buffer.toggle(self.user, self.post, 'like'))
+
+        self.assertEqual(clicks, [(None, 'like'), ('like', None)])
+        self.assertIsNone(self.pending(self.user))
+        self.assertEqual(self.buffer.pending_counts(self.post.pk)[TOTAL_FIELD], 0)
+
+    def test_flush_applies_pending_state(self):
+        self.buffer.toggle(self.user, self.post, 'like')
+        self.buffer.toggle(self.other, self.post, 'love')
+
+        self.assertEqual(self.flush(), 2)
+
+        self.assertEqual(reaction_counts(self.post), {'like': 1, 'love': 1})
+        self.assertEqual(self.pending(self.user), 'ninguno')
+        self.assertEqual(self.buffer.pending_counts(self.post.pk), {})
+
+    def test_inflight_state_visible_until_commit(self):
+        self.buffer.toggle(self.user, self.post, 'like')
+        apply = reaction_buffer.apply_desired_reactions
+        seen = []
+
+        def apply_with_click(post_id, desired):
+            applied = apply(post_id, desired)
+            # Sin confirmar todavía: el lector sigue viendo su reacción y un
+            # nuevo clic parte de ella, no de la fila vieja
+            seen.append(self.pending(self.user))
+            seen.append(self.buffer.toggle(self.user, self.post, 'like'))
+            return applied
+
+        with mock.patch.object(reaction_buffer, 'apply_desired_reactions', apply_with_click):
+            self.flush()
+
+        self.assertEqual(seen, ['like', ('like', None)])
+        self.assertFalse(self.buffer.connection.exists(INFLIGHT_USERS_KEY.format(self.post.pk)))
+
+        self.flush()
+        self.assertFalse(Like.objects.filter(post=self.post).exists())
+        self.assertEqual(reaction_counts(self.post), {})
+
+    def test_failed_flush_restores_state(self):
+        self.buffer.toggle(self.user, self.post, 'like')
+        self.buffer.toggle(self.other, self.post, 'like')
+
+        with mock.patch.object(
+            reaction_buffer, 'apply_desired_reactions', side_effect=RuntimeError
+        ), self.assertLogs(reaction_buffer.logger, 'ERROR'):
+            self.assertEqual(self.flush(), 0)
+
+        self.assertEqual(self.pending(self.user), 'like')
+        self.assertEqual(self.buffer.pending_counts(self.post.pk)['like'], 2)
+        self.assertFalse(self.buffer.connection.exists(FLUSH_LOCK_KEY.format(self.post.pk)))
+
+        self.assertEqual(self.flush(), 2)
+        self.assertEqual(reaction_counts(self.post), {'like': 2})
+
+    def test_restore_keeps_newer_change(self):
+        self.buffer.toggle(self.user, self.post, 'like')
+
+        def apply_then_fail(post_id, desired):
+            self.buffer.toggle(self.user, self.post, 'love')
+            raise RuntimeError
+
+        with mock.patch.object(
+            reaction_buffer, 'apply_desired_reactions', side_effect=apply_then_fail
+        ), self.assertLogs(reaction_buffer.logger, 'ERROR'):
+            self.flush()
+
+        self.assertEqual(self.pending(self.user), 'love')
+        counts = self.buffer.pending_counts(self.post.pk)
+        self.assertEqual((counts['like'], counts['love'], counts[TOTAL_FIELD]), (0, 1, 1))
+
+        self.flush()
+        self.assertEqual(reaction_counts(self.post), {'love': 1})
+
+    def test_interrupted_flush_is_resumed(self):
+        self.buffer.toggle(self.user, self.post, 'like')
+
+        # Un flush que murió después de mover el estado a las claves en vuelo
+        self.buffer.connection.spop(DIRTY_KEY, 10)
+        self.buffer._drain(self.post.pk)
+        self.buffer.toggle(self.other, self.post, 'love')
+
+        self.flush()
+        self.assertEqual(reaction_counts(self.post), {'like': 1})
+
+        self.flush()
+        self.assertEqual(reaction_counts(self.post), {'like': 1, 'love': 1})
+        self.assertEqual(self.buffer.pending_counts(self.post.pk), {})
+
+
+# ============================================================================
+# SINCRONIZACIÓN EN LOTE
+# ============================================================================
+
+class BatchReactionsViewTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('lector')
+        self.author = make_user('autor')
+        self.posts = [make_post(self.author) for _ in range(3)]
+        self.client.force_login(self.user)
+
+    def batch(self, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return self.client.post(
+            reverse('likes:batch_reactions'), body, content_type='application/json'
+        )
+
+    def stored(self):
+        return dict(Like.objects.filter(user=self.user).values_list('post_id', 'reaction_type'))
+
+    def test_malformed_body_is_rejected(self):
+        for body in ('no es json', {'ops': []}, {'operations': {}}, 'null'):
+            with self.subTest(body=body):
+                response = self.batch(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(response.json()['success'])
+
+    def test_too_many_operations_are_rejected(self):
+        operations = [{'post_id': post.pk, 'reaction_type': 'like'} for post in self.posts]
+
+        with override_settings(
+            UNICONET_CONFIG={**settings.UNICONET_CONFIG, 'LIKES_BATCH_MAX_OPERATIONS': 2}
+        ):
+            response = self.batch({'operations': operations})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored(), {})
+
+    def test_invalid_operations_are_reported_one_by_one(self):
+        post = self.posts[0]
+        response = self.batch([
+            {'post_id': True, 'reaction_type': 'like'},
+            {'post_id': str(post.pk), 'reaction_type': 'like'},
+            {'post_id': post.pk, 'reaction_type': 'no-existe'},
+            'like',
+            {'post_id': self.posts[1].pk, 'reaction_type': 'like'},
+        ])
+
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['errors']), 4)
+        self.assertEqual(data['changed'], 1)
+        self.assertEqual(self.stored(), {self.posts[1].pk: 'like'})
+
+    def test_mixed_operations(self):
+        changed, removed, added = self.posts
+        Like.objects.create(user=self.user, post=changed, reaction_type='like')
+        Like.objects.create(user=self.user, post=removed, reaction_type='love')
+        private = make_post(self.author, privacy='private')
+        archived = make_post(self.author, is_archived=True)
+
+        response = self.batch({'operations': [
+            {'post_id': changed.pk, 'reaction_type': 'wow'},
+            {'post_id': removed.pk, 'reaction_type': None},
+            {'post_id': added.pk, 'reaction_type': 'love'},
+            {'post_id': private.pk, 'reaction_type': 'like'},
+            {'post_id': archived.pk, 'reaction_type': 'like'},
+            {'post_id': added.pk, 'reaction_type': 'like'},
+        ]})
+
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['changed'], 3)
+        # Si un post se repite, gana la última operación
+        self.assertEqual(
+            {result['post_id']: result['reaction_type'] for result in data['results']},
+            {changed.pk: 'wow', removed.pk: None, added.pk: 'like'}
+        )
+        self.assertCountEqual(
+            [error['post_id'] for error in data['errors']], [private.pk, archived.pk]
+        )
+
+        self.assertEqual(self.stored(), {changed.pk: 'wow', added.pk: 'like'})
+        self.assertEqual(reaction_counts(changed), {'wow': 1})
+        self.assertEqual(reaction_counts(removed), {})
+        self.assertEqual(reaction_counts(added), {'like': 1})
+
+    def test_repeated_request_changes_nothing(self):
+        body = {'operations': [
+            {'post_id': self.posts[0].pk, 'reaction_type': 'love'},
+            {'post_id': self.posts[1].pk, 'reaction_type': None},
+        ]}
+
+        self.assertEqual(self.batch(body).json()['changed'], 1)
+        first = (self.stored(), reaction_counts(self.posts[0]))
+
+        again = self.batch(body).json()
+
+        self.assertEqual(again['changed'], 0)
+        self.assertEqual(again['errors'], [])
+        self.assertEqual((self.stored(), reaction_counts(self.posts[0])), first)
@@ -10,6 +10,7 @@ urlpatterns = [
     # Acciones de like
     path('toggle/<int:post_id>/', views.toggle_like_view, name='toggle_like'),
     path('remove/<int:post_id>/', views.remove_like_view, name='remove_like'),
+    path('batch/', views.batch_reactions_view, name='batch_reactions'),
     
     # Listados
     path('post/<int:post_id>/', views.post_likes_list, name='post_likes_list'),
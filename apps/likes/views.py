@@ -13,10 +13,12 @@ from django.db.models import Prefetch
 
 from apps.posts.models import Post
 from apps.authentication.models import User
+from utils.pagination import paginate_cursor
 from .models import (
     Like, has_user_liked_post, get_post_likes_count,
     get_post_likers, get_user_liked_posts, toggle_reaction,  # ← Cambiar a toggle_reaction
-    remove_like, get_post_reactions_summary, get_user_reaction  # ← Agregar estas dos también
+    remove_like, get_post_reactions_summary, get_user_reaction,  # ← Agregar estas dos también
+    get_reactions_summaries, get_user_reactions, set_reactions
 )
 
 
@@ -79,7 +81,10 @@ def toggle_like_view(request, post_id):
         reaction_type = 'like'
     
     try:
-        reacted, current_reaction, reactions_count = toggle_reaction(request.user, post, reaction_type)
+        # Permisos y archivado ya verificados arriba
+        reacted, current_reaction, reactions_count = toggle_reaction(
+            request.user, post, reaction_type, validate=False
+        )
         
         # Obtener resumen de reacciones
         reactions_summary = get_post_reactions_summary(post)
@@ -149,6 +154,87 @@ def remove_like_view(request, post_id):
     return redirect('posts:post_detail', pk=post_id)
 
 
+@login_required
+@require_POST
+def batch_reactions_view(request):
+    """
+    Sincroniza en lote las reacciones encoladas por un cliente sin conexión
+    POST /likes/batch/
+    Body: {"operations": [{"post_id": 1, "reaction_type": "love"},
+                          {"post_id": 2, "reaction_type": null}]}
+    
+    Cada operación fija el estado final (null quita la reacción); si un
+    post se repite, gana la última. La visibilidad de todos los posts se
+    verifica con una consulta y los cambios se aplican en lote.
+    """
+    import json
+    from django.conf import settings
+    
+    try:
+        data = json.loads(request.body)
+        operations = data['operations'] if isinstance(data, dict) else data
+        if not isinstance(operations, list):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Se esperaba {"operations": [...]} en JSON'
+        }, status=400)
+    
+    max_operations = settings.UNICONET_CONFIG.get('LIKES_BATCH_MAX_OPERATIONS', 100)
+    if len(operations) > max_operations:
+        return JsonResponse({
+            'success': False,
+            'error': f'Máximo {max_operations} operaciones por lote'
+        }, status=400)
+    
+    valid_reactions = {choice for choice, _ in Like.REACTION_CHOICES}
+    desired = {}
+    errors = []
+    for operation in operations:
+        post_id = operation.get('post_id') if isinstance(operation, dict) else None
+        reaction_type = operation.get('reaction_type') if isinstance(operation, dict) else None
+        if not isinstance(post_id, int) or isinstance(post_id, bool) or (
+            reaction_type is not None and reaction_type not in valid_reactions
+        ):
+            errors.append({'operation': operation, 'error': 'Operación inválida'})
+            continue
+        desired[post_id] = reaction_type
+    
+    # Visibilidad y archivado de todos los posts en una consulta
+    allowed = set(
+        Post.objects.visible_to(request.user).filter(
+            pk__in=list(desired), is_archived=False
+        ).values_list('pk', flat=True)
+    )
+    for post_id in [post_id for post_id in desired if post_id not in allowed]:
+        errors.append({
+            'post_id': post_id,
+            'error': 'Publicación no disponible'
+        })
+        del desired[post_id]
+    
+    changed = set_reactions(request.user, desired)
+    
+    summaries = get_reactions_summaries(desired)
+    reactions = get_user_reactions(request.user, [Post(pk=post_id) for post_id in desired])
+    
+    return JsonResponse({
+        'success': True,
+        'changed': changed,
+        'results': [
+            {
+                'post_id': post_id,
+                'reaction_type': reactions.get(post_id),
+                'reactions_count': sum(summaries[post_id].values()),
+                'reactions_summary': summaries[post_id],
+            }
+            for post_id in desired
+        ],
+        'errors': errors,
+    })
+
+
 # ============================================================================
 # VISTAS DE LISTADO
 # ============================================================================
@@ -204,23 +290,11 @@ def user_liked_posts(request, username=None):
     else:
         user = request.user
     
-    # Obtener posts con like
-    posts = get_user_liked_posts(user)
-    
-    # Filtrar según privacidad si no es el usuario actual
-    if user != request.user:
-        from apps.friends.models import are_friends
-        
-        visible_posts = []
-        for post in posts:
-            if post.can_view(request.user):
-                visible_posts.append(post)
-        posts = visible_posts
+    # Posts con like que el usuario actual puede ver (filtrado en SQL)
+    posts = get_user_liked_posts(user, viewer=request.user)
     
-    # Paginación
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor (orden de la reacción)
+    page_obj = paginate_cursor(request, posts, 10, ordering=('-liked_at', '-like_id'))
     
     context = {
         'profile_user': user,
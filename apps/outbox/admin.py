@@ -0,0 +1,22 @@
+"""
+Configuración del admin para el outbox
+"""
+from django.contrib import admin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """
+    Admin para el modelo OutboxEvent (solo lectura)
+    """
+    list_display = ['id', 'topic', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['status', 'topic']
+    search_fields = ['topic', 'key', 'last_error']
+    readonly_fields = [
+        'topic', 'payload', 'key', 'status', 'attempts', 'last_error',
+        'available_at', 'created_at', 'processed_at',
+    ]
+    
+    def has_add_permission(self, request):
+        return False
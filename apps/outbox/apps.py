@@ -0,0 +1,17 @@
+"""
+Configuración de la app outbox
+"""
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.outbox'
+    verbose_name = 'Outbox de eventos'
+    
+    def ready(self):
+        """
+        Registrar los manejadores definidos en el módulo outbox.py de cada app
+        """
+        autodiscover_modules('outbox')
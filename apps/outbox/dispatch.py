@@ -0,0 +1,193 @@
+"""
+Publicación y procesamiento de eventos del outbox
+
+Uso:
+    # apps/<app>/outbox.py
+    from apps.outbox.dispatch import register
+
+    @register('post.created')
+    def handle_post_created(payload):
+        ...
+
+    # En un signal, dentro de la transacción de la petición
+    publish('post.created', {'post_id': post.pk}, key=f'post.created:{post.pk}')
+
+Los manejadores deben ser idempotentes: un evento puede reintentarse
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+
+def get_outbox_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+# ============================================================================
+# REGISTRO Y PUBLICACIÓN
+# ============================================================================
+
+def register(topic):
+    """
+    Decorador que registra un manejador para un tema
+    Un tema puede tener varios manejadores (uno por app)
+    """
+    def decorator(handler):
+        _handlers[topic].append(handler)
+        return handler
+    return decorator
+
+
+def get_handlers(topic):
+    return list(_handlers.get(topic, ()))
+
+
+def publish(topic, payload, key=None):
+    """
+    Registra un evento en la transacción actual
+    Se procesa después del commit; si la transacción se revierte, el evento
+    desaparece con ella
+
+    Args:
+        topic: Tema del evento (ej. 'post.created')
+        payload: Datos serializables a JSON (ids, no instancias)
+        key: Clave de idempotencia opcional; un evento con la misma clave
+             ya publicado se ignora
+    """
+    OutboxEvent.objects.bulk_create(
+        [OutboxEvent(topic=topic, payload=payload, key=key)],
+        ignore_conflicts=True
+    )
+    _schedule_on_commit()
+
+
+def _schedule_on_commit():
+    """
+    Un solo encolado por transacción, aunque publique muchos eventos
+    Se busca en los callbacks pendientes de la conexión: si la transacción
+    (o el savepoint que lo registró) se revierte, el callback desaparece con
+    ella y el siguiente publish lo vuelve a registrar
+    """
+    connection = transaction.get_connection()
+    if any(func is schedule_processing for _, func, _ in connection.run_on_commit):
+        return
+    transaction.on_commit(schedule_processing)
+
+
+def schedule_processing():
+    """
+    Encola el procesamiento del outbox
+    Nunca procesa en la petición: sin broker disponible los eventos esperan
+    al barrido periódico (sweep_outbox_task)
+    """
+    from .tasks import process_outbox_task
+
+    try:
+        process_outbox_task.apply_async(retry=False)
+    except Exception as exc:
+        logger.warning('outbox: broker no disponible, queda para el barrido: %s', exc)
+
+
+# ============================================================================
+# PROCESAMIENTO
+# ============================================================================
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(2 ** attempts * 10, 3600))
+
+
+def process_batch(batch_size=None):
+    """
+    Procesa un lote de eventos pendientes
+
+    En PostgreSQL los eventos se reclaman con SELECT ... FOR UPDATE SKIP LOCKED,
+    de modo que varios workers pueden drenar el outbox en paralelo. Cada evento
+    se ejecuta en su propio savepoint: si un manejador falla, sus cambios se
+    revierten y el evento se reintenta más tarde con espera exponencial
+
+    Returns:
+        int: Número de eventos procesados (con éxito o no)
+    """
+    batch_size = batch_size or get_outbox_config('OUTBOX_BATCH_SIZE', 100)
+    max_attempts = get_outbox_config('OUTBOX_MAX_ATTEMPTS', 5)
+
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                available_at__lte=timezone.now()
+            ).order_by('id')[:batch_size]
+        )
+
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    for handler in get_handlers(event.topic):
+                        handler(event.payload)
+            except Exception as exc:
+                logger.exception('outbox: error procesando %s #%s', event.topic, event.pk)
+                event.last_error = f'{type(exc).__name__}: {exc}'
+                if event.attempts >= max_attempts:
+                    event.status = 'failed'
+                else:
+                    event.available_at = timezone.now() + _retry_delay(event.attempts)
+            else:
+                event.status = 'done'
+                event.processed_at = timezone.now()
+                event.last_error = ''
+
+        OutboxEvent.objects.bulk_update(
+            events,
+            ['status', 'attempts', 'last_error', 'available_at', 'processed_at']
+        )
+
+    return len(events)
+
+
+def process_outbox(batch_size=None, max_batches=None):
+    """
+    Drena el outbox por lotes hasta vaciarlo (o hasta max_batches)
+
+    Returns:
+        int: Total de eventos procesados
+    """
+    total = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        processed = process_batch(batch_size)
+        total += processed
+        batches += 1
+        if not processed:
+            break
+
+    return total
+
+
+def purge_processed(days=None):
+    """
+    Elimina los eventos procesados con más de N días
+
+    Returns:
+        int: Número de eventos eliminados
+    """
+    days = days if days is not None else get_outbox_config('OUTBOX_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+
+    deleted, _ = OutboxEvent.objects.filter(
+        status='done',
+        processed_at__lt=cutoff
+    ).delete()
+    return deleted
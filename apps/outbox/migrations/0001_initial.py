@@ -0,0 +1,94 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("topic", models.CharField(max_length=100, verbose_name="tema")),
+                ("payload", models.JSONField(default=dict, verbose_name="datos")),
+                (
+                    "key",
+                    models.CharField(
+                        blank=True,
+                        max_length=200,
+                        null=True,
+                        unique=True,
+                        verbose_name="clave",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("done", "Procesado"),
+                            ("failed", "Fallido"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="estado",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="intentos"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="último error"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="disponible desde",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="creado"),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="procesado"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "evento de outbox",
+                "verbose_name_plural": "eventos de outbox",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="outbox_status_available_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "processed_at"],
+                        name="outbox_status_processed_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
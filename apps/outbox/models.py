@@ -0,0 +1,59 @@
+"""
+Modelos del outbox transaccional de UnicoNet
+Los signals registran eventos en la misma transacción que el cambio que
+los origina; un worker de Celery los procesa después del commit
+"""
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento pendiente de procesar (efecto secundario diferido)
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('done', 'Procesado'),
+        ('failed', 'Fallido'),
+    ]
+    
+    topic = models.CharField(_('tema'), max_length=100)
+    
+    payload = models.JSONField(_('datos'), default=dict)
+    
+    # Clave de idempotencia: publicar dos veces el mismo evento no lo duplica
+    key = models.CharField(
+        _('clave'),
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    
+    status = models.CharField(
+        _('estado'),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    
+    attempts = models.PositiveSmallIntegerField(_('intentos'), default=0)
+    last_error = models.TextField(_('último error'), blank=True)
+    
+    available_at = models.DateTimeField(_('disponible desde'), default=timezone.now)
+    created_at = models.DateTimeField(_('creado'), auto_now_add=True)
+    processed_at = models.DateTimeField(_('procesado'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('evento de outbox')
+        verbose_name_plural = _('eventos de outbox')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+            models.Index(fields=['status', 'processed_at'], name='outbox_status_processed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
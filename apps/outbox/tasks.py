@@ -0,0 +1,36 @@
+"""
+Tareas asíncronas (Celery) del outbox
+"""
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def process_outbox_task():
+    """
+    Drena los eventos pendientes
+    Se encola tras cada commit que publica eventos
+    """
+    from .dispatch import process_outbox
+
+    processed = process_outbox()
+    if processed:
+        logger.info('outbox.process eventos=%s', processed)
+
+
+@shared_task(ignore_result=True)
+def sweep_outbox_task():
+    """
+    Barrido periódico: procesa eventos cuyo encolado se perdió o que esperan
+    reintento, y purga los ya procesados
+    Programada en CELERY_BEAT_SCHEDULE
+    """
+    from .dispatch import process_outbox, purge_processed
+
+    processed = process_outbox()
+    purged = purge_processed()
+    logger.info('outbox.sweep eventos=%s purgados=%s', processed, purged)
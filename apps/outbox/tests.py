@@ -0,0 +1,55 @@
+"""
+Tests del módulo de outbox
+"""
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+
+from . import dispatch
+from .dispatch import publish, schedule_processing
+from .models import OutboxEvent
+
+
+# ============================================================================
+# PUBLICACIÓN
+# ============================================================================
+
+class PublishTests(TestCase):
+
+    def scheduled(self, callbacks):
+        return [callback for callback in callbacks if callback is schedule_processing]
+
+    def test_one_hook_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for pk in range(3):
+                publish('post.created', {'post_id': pk})
+
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+        self.assertEqual(len(self.scheduled(callbacks)), 1)
+
+    def test_hook_registered_again_after_savepoint_rollback(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    publish('post.created', {'post_id': 1})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            publish('post.created', {'post_id': 2})
+
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('payload', flat=True)), [{'post_id': 2}]
+        )
+        self.assertEqual(len(self.scheduled(callbacks)), 1)
+
+    def test_broker_down_leaves_events_for_the_sweep(self):
+        with mock.patch(
+            'apps.outbox.tasks.process_outbox_task.apply_async', side_effect=OSError
+        ), mock.patch.object(dispatch, 'process_outbox') as process_outbox, \
+                self.assertLogs(dispatch.logger, 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                publish('post.created', {'post_id': 1})
+
+        process_outbox.assert_not_called()
+        self.assertEqual(OutboxEvent.objects.get().status, 'pending')
@@ -7,6 +7,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Count
+from django.db.models.functions import Coalesce, Now
 from .models import (
     Post, PostImage, PostVideo, PostMention, 
     Hashtag, PostHashtag, PostReport
@@ -106,7 +107,7 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('location', 'feeling', 'shared_post')
         }),
         ('Estado', {
-            'fields': ('is_pinned', 'is_archived', 'is_edited', 'edited_at')
+            'fields': ('is_pinned', 'is_archived', 'archived_at', 'is_edited', 'edited_at')
         }),
         ('Estadísticas', {
             'fields': (
@@ -212,12 +213,15 @@ class PostAdmin(admin.ModelAdmin):
     unpin_posts.short_description = 'Desfijar posts seleccionados'
     
     def archive_posts(self, request, queryset):
-        updated = queryset.update(is_archived=True)
+        # Los ya archivados conservan su fecha (cuenta para cleanup_posts)
+        updated = queryset.update(
+            is_archived=True, archived_at=Coalesce('archived_at', Now())
+        )
         self.message_user(request, f'{updated} post(s) archivado(s).')
     archive_posts.short_description = 'Archivar posts seleccionados'
     
     def unarchive_posts(self, request, queryset):
-        updated = queryset.update(is_archived=False)
+        updated = queryset.update(is_archived=False, archived_at=None)
         self.message_user(request, f'{updated} post(s) desarchivado(s).')
     unarchive_posts.short_description = 'Desarchivar posts seleccionados'
 
@@ -0,0 +1,347 @@
+"""
+Archivo frío de publicaciones (PostgreSQL)
+
+Los posts con más de POSTS_COLD_AFTER_DAYS días se mueven, junto con sus
+imágenes, videos, menciones, hashtags y reacciones, a tablas *_archive
+particionadas por mes (PARTITION BY RANGE sobre la fecha del post).
+
+- Las tablas calientes quedan acotadas a la ventana reciente: sus índices y
+  el costo de VACUUM no crecen con los semestres acumulados
+- Las particiones del archivo solo reciben inserciones; un mes completo se
+  puede separar o eliminar con DETACH/DROP PARTITION sin tocar filas
+- Los feeds, búsquedas y listados consultan solo las tablas calientes, por
+  lo que el archivo queda excluido por defecto; el detalle de un post
+  archivado se lee con get_archived_post
+- Un post no se archiva mientras un post caliente lo comparta, de modo que
+  shared_post nunca apunta a una fila que ya no está
+
+Las tablas calientes no se particionan: en PostgreSQL la clave primaria y
+las restricciones únicas de una tabla particionada deben incluir la columna
+de partición, lo que rompería las claves foráneas hacia posts_post y la
+unicidad (user, post) de Like.
+
+En otros motores todo es un no-op.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+
+# (modelo, columna que referencia al post); el primero es el propio post
+ARCHIVED_MODELS = [
+    ('posts.Post', 'id'),
+    ('posts.PostImage', 'post_id'),
+    ('posts.PostVideo', 'post_id'),
+    ('posts.PostMention', 'post_id'),
+    ('posts.PostHashtag', 'post_id'),
+    ('likes.Like', 'post_id'),
+]
+
+PARTITION_COLUMN = 'post_created_at'
+
+
+def get_archive_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def _archived_tables():
+    """
+    [(tabla, tabla de archivo, columna del post)]
+    Las tablas de archivo se crean en la migración posts.0004
+    """
+    tables = []
+    for label, post_column in ARCHIVED_MODELS:
+        table = apps.get_model(label)._meta.db_table
+        tables.append((table, f'{table}_archive', post_column))
+    return tables
+
+
+# ============================================================================
+# PARTICIONES
+# ============================================================================
+
+def _month_bounds(moment):
+    start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def ensure_partitions(cursor, months):
+    """
+    Crea, si faltan, las particiones mensuales de todas las tablas de archivo
+
+    Args:
+        months: Fechas (cualquier día) de los meses requeridos
+    """
+    qn = connection.ops.quote_name
+    for start, end in sorted({_month_bounds(month) for month in months}):
+        for _, archive, _ in _archived_tables():
+            partition = f'{archive}_p{start:%Y%m}'
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {qn(partition)} PARTITION OF {qn(archive)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+
+
+def _archive_columns(cursor, table, archive):
+    """
+    Columnas comunes a la tabla caliente y a su archivo
+    Si la tabla caliente ganó columnas después de crear el archivo, esas
+    columnas no se copian (agregarlas al archivo con ALTER TABLE)
+    """
+    introspection = connection.introspection
+    source = {col.name for col in introspection.get_table_description(cursor, table)}
+    return [
+        col.name for col in introspection.get_table_description(cursor, archive)
+        if col.name in source and col.name != PARTITION_COLUMN
+    ]
+
+
+# ============================================================================
+# MOVIMIENTO AL ARCHIVO
+# ============================================================================
+
+def _hot_shares(post_ids):
+    """
+    Posts calientes que comparten alguno de `post_ids` y no están en la lista
+    """
+    from .models import Post
+
+    return Post.objects.filter(shared_post_id__in=post_ids).exclude(pk__in=post_ids)
+
+
+def get_cold_posts(older_than_days=None):
+    """
+    Posts candidatos al archivo: más antiguos que el corte, no fijados y
+    no compartidos por ningún post caliente (se perdería la referencia;
+    el original se archiva en un lote posterior al de sus compartidos)
+    """
+    from .models import Post
+
+    days = older_than_days or get_archive_config('POSTS_COLD_AFTER_DAYS', 365)
+    cutoff = timezone.now() - timedelta(days=days)
+
+    return Post.objects.filter(
+        created_at__lt=cutoff,
+        is_pinned=False
+    ).exclude(
+        pk__in=Post.objects.filter(
+            shared_post__isnull=False
+        ).values('shared_post_id')
+    )
+
+
+def _delete_hot_rows(cursor, posts):
+    """
+    Elimina los posts y todas las filas que los referencian con una
+    sentencia por tabla (sin cargar instancias ni disparar signals)
+
+    Replica en lote lo que hacen los signals de borrado: contadores de
+    hashtags y de compartidos, timelines y caches pull
+    """
+    from apps.feed.models import TimelineEntry
+    from apps.feed.timeline import invalidate_feed_heads, invalidate_pull_sources
+    from utils import counters
+    from .models import Post, PostHashtag
+
+    post_ids = [post.pk for post in posts]
+    qn = connection.ops.quote_name
+
+    hashtag_counts = PostHashtag.objects.filter(
+        post_id__in=post_ids
+    ).values('hashtag_id').annotate(total=Count('pk'))
+    for row in hashtag_counts:
+        counters.increment('hashtag.posts', row['hashtag_id'], -row['total'])
+
+    shared_counts = Counter(
+        post.shared_post_id for post in posts
+        if post.shared_post_id and post.shared_post_id not in post_ids
+    )
+    for shared_post_id, total in shared_counts.items():
+        counters.increment('post.shares', shared_post_id, -total)
+
+    invalidate_feed_heads(set(
+        TimelineEntry.objects.filter(post_id__in=post_ids).values_list('user_id', flat=True)
+    ))
+    authors = {post.author_id: post for post in posts}
+    for post in authors.values():
+        invalidate_pull_sources(post)
+
+    for relation in Post._meta.related_objects:
+        table = qn(relation.related_model._meta.db_table)
+        column = qn(relation.field.column)
+        if relation.on_delete is models.CASCADE:
+            cursor.execute(f'DELETE FROM {table} WHERE {column} = ANY(%s)', [post_ids])
+        elif relation.on_delete is models.SET_NULL:
+            cursor.execute(
+                f'UPDATE {table} SET {column} = NULL WHERE {column} = ANY(%s)', [post_ids]
+            )
+        else:
+            raise NotImplementedError(
+                f'on_delete no soportado en {relation.related_model._meta.label}'
+            )
+
+    cursor.execute(f'DELETE FROM {qn(Post._meta.db_table)} WHERE id = ANY(%s)', [post_ids])
+
+
+def archive_posts(post_ids):
+    """
+    Copia un lote de posts y sus filas relacionadas al archivo y los elimina
+    de las tablas calientes, en una sola transacción
+
+    El borrado es una sentencia por tabla (ver _delete_hot_rows). Los posts
+    que todavía comparte un post caliente fuera del lote se omiten. Los
+    archivos de media no se borran: las filas archivadas siguen apuntando
+    a ellos.
+
+    Returns:
+        dict: {tabla: filas archivadas}
+    """
+    from .models import Post
+
+    if not is_supported() or not post_ids:
+        return {}
+
+    qn = connection.ops.quote_name
+    post_table = Post._meta.db_table
+    copied = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        posts = list(
+            Post.objects.filter(pk__in=post_ids).exclude(
+                pk__in=_hot_shares(post_ids).values('shared_post_id')
+            ).select_for_update().only('pk', 'author_id', 'shared_post_id', 'created_at')
+        )
+        if not posts:
+            return {}
+        post_ids = [post.pk for post in posts]
+
+        ensure_partitions(cursor, [post.created_at for post in posts])
+
+        for table, archive, post_column in _archived_tables():
+            columns = _archive_columns(cursor, table, archive)
+            column_list = ', '.join(qn(col) for col in columns)
+            source_list = ', '.join(f'src.{qn(col)}' for col in columns)
+
+            cursor.execute(
+                f'INSERT INTO {qn(archive)} ({column_list}, {PARTITION_COLUMN}) '
+                f'SELECT {source_list}, post.created_at '
+                f'FROM {qn(table)} src JOIN {qn(post_table)} post '
+                f'ON post.id = src.{qn(post_column)} '
+                f'WHERE src.{qn(post_column)} = ANY(%s)',
+                [post_ids]
+            )
+            copied[table] = cursor.rowcount
+
+        _delete_hot_rows(cursor, posts)
+
+    return copied
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def _load_archived(cursor, model, post_column, post_ids):
+    """
+    Instancias (sin guardar) de `model` leídas de su tabla de archivo
+    """
+    table = model._meta.db_table
+    archive = f'{table}_archive'
+    columns = set(_archive_columns(cursor, table, archive))
+    field_names = [
+        field.attname for field in model._meta.concrete_fields if field.column in columns
+    ]
+    qn = connection.ops.quote_name
+
+    cursor.execute(
+        f'SELECT {", ".join(qn(model._meta.get_field(name).column) for name in field_names)} '
+        f'FROM {qn(archive)} WHERE {qn(post_column)} = ANY(%s) ORDER BY {qn("id")}',
+        [list(post_ids)]
+    )
+    return [model.from_db(connection.alias, field_names, row) for row in cursor.fetchall()]
+
+
+def _prefetched(model, instances):
+    queryset = model.objects.all()
+    queryset._result_cache = list(instances)
+    queryset._prefetch_done = True
+    return queryset
+
+
+def get_archived_post(post_id):
+    """
+    Post archivado como instancia de solo lectura, o None si no está
+
+    Trae del archivo sus imágenes, videos, menciones y hashtags (como si
+    se hubieran precargado con prefetch_related) y su post compartido, que
+    puede seguir caliente o estar archivado también
+    """
+    from .models import Post, PostHashtag, PostImage, PostMention, PostVideo
+
+    if not is_supported():
+        return None
+
+    with connection.cursor() as cursor:
+        found = _load_archived(cursor, Post, 'id', [post_id])
+        if not found:
+            return None
+        post = found[0]
+
+        post._prefetched_objects_cache = {
+            related_name: _prefetched(model, _load_archived(cursor, model, 'post_id', [post.pk]))
+            for related_name, model in (
+                ('images', PostImage),
+                ('videos', PostVideo),
+                ('mentions', PostMention),
+                ('post_hashtags', PostHashtag),
+            )
+        }
+
+    if post.shared_post_id:
+        shared = (
+            Post.objects.filter(pk=post.shared_post_id).first() or
+            get_archived_post(post.shared_post_id)
+        )
+        Post.shared_post.field.set_cached_value(post, shared)
+
+    return post
+
+
+# (modelo archivado, columnas con archivos de media)
+ARCHIVED_MEDIA = [
+    ('posts.PostImage', ['image']),
+    ('posts.PostVideo', ['video', 'thumbnail']),
+]
+
+
+def get_archived_media(names):
+    """
+    Subconjunto de `names` (rutas relativas a MEDIA_ROOT) referenciado por
+    filas archivadas; esos archivos no son huérfanos
+    """
+    names = list(names)
+    if not is_supported() or not names:
+        return set()
+
+    qn = connection.ops.quote_name
+    found = set()
+    with connection.cursor() as cursor:
+        for label, columns in ARCHIVED_MEDIA:
+            archive = qn(f'{apps.get_model(label)._meta.db_table}_archive')
+            for column in columns:
+                cursor.execute(
+                    f'SELECT {qn(column)} FROM {archive} WHERE {qn(column)} = ANY(%s)',
+                    [names]
+                )
+                found.update(row[0] for row in cursor.fetchall())
+    return found
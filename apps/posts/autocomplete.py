@@ -0,0 +1,282 @@
+"""
+Autocompletado de #hashtags y @menciones para el editor de posts
+
+Índices de prefijos en memoria (una lista ordenada por proceso) consultados
+con bisect: una búsqueda no toca la base de datos.
+
+- Se construyen completos en el primer uso y cada AUTOCOMPLETE_REBUILD_SECONDS
+  (recoge renombres, bajas y contadores); la reconstrucción periódica corre
+  en un hilo aparte y mientras tanto se sigue respondiendo con el índice
+  anterior. Un solo hilo por proceso reconstruye a la vez
+- Entre reconstrucciones se actualizan de forma incremental: quien inserta
+  hashtags (process_hashtags) o usuarios (signal de User) sube una versión
+  en cache; cada proceso, al ver la versión cambiada, lee solo las filas
+  con id mayor al último cargado
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+AUTOCOMPLETE_LIMIT = 8
+
+# Coincidencias revisadas por consulta antes de ordenar por popularidad
+MAX_SCAN = 50
+
+INDEX_VERSION_KEY = 'autocomplete_version_{}'
+
+
+def get_autocomplete_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+def normalize_prefix(value):
+    from apps.profiles.search import normalize_search_text
+
+    return normalize_search_text(value).replace(' ', '')
+
+
+class PrefixIndex:
+    """
+    Lista ordenada de (clave, id) con la información de cada id aparte
+
+    Subclases: load(after_id) devuelve [(id, [claves], info)] con id > after_id
+    """
+
+    name = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Una sola carga completa a la vez
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._keys = []
+        self._items = {}
+        self._max_id = 0
+        self._version = None
+        self._built_at = None
+
+    def load(self, after_id=0):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------ estado
+
+    def _add_rows(self, rows):
+        """
+        Agrega filas nuevas (carga incremental)
+        La lista se reemplaza por una mezcla en lugar de modificarse: las
+        consultas en curso siguen recorriendo la anterior
+        """
+        new_keys = []
+        for item_id, keys, info in rows:
+            if item_id in self._items:
+                continue
+            self._items[item_id] = info
+            new_keys.extend((key, item_id) for key in keys if key)
+            self._max_id = max(self._max_id, item_id)
+
+        if new_keys:
+            new_keys.sort()
+            self._keys = list(heapq.merge(self._keys, new_keys))
+
+    @staticmethod
+    def _build(rows):
+        """
+        Índice completo: las claves se ordenan una vez al final
+        """
+        keys = []
+        items = {}
+        for item_id, item_keys, info in rows:
+            if item_id in items:
+                continue
+            items[item_id] = info
+            keys.extend((key, item_id) for key in item_keys if key)
+        keys.sort()
+        return keys, items, max(items, default=0)
+
+    def _load_all(self):
+        """
+        Carga completa; quien llama tiene _build_lock
+        La versión se lee antes de cargar: lo que se agregue durante la
+        lectura lo trae la siguiente carga incremental
+        """
+        version = cache.get(INDEX_VERSION_KEY.format(self.name))
+        keys, items, max_id = self._build(self.load())
+        with self._lock:
+            self._keys, self._items, self._max_id = keys, items, max_id
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _rebuild(self):
+        with self._build_lock:
+            self._load_all()
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+
+        def run():
+            try:
+                self._rebuild()
+            except Exception:
+                logger.exception('autocomplete: error reconstruyendo %s', self.name)
+            finally:
+                self._rebuilding = False
+                # Conexión propia del hilo
+                connections.close_all()
+
+        threading.Thread(target=run, name=f'autocomplete-{self.name}', daemon=True).start()
+
+    def _refresh(self):
+        """
+        Construye el índice en el primer uso (las peticiones concurrentes
+        esperan esa misma carga); si caducó, lo reconstruye en segundo plano;
+        si otro proceso agregó filas, las carga
+        """
+        rebuild_seconds = get_autocomplete_config('AUTOCOMPLETE_REBUILD_SECONDS', 3600)
+        version = cache.get(INDEX_VERSION_KEY.format(self.name))
+
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._load_all()
+        elif time.monotonic() - self._built_at > rebuild_seconds:
+            self._rebuild_in_background()
+
+        if version != self._version:
+            rows = self.load(after_id=self._max_id)
+            with self._lock:
+                self._add_rows(rows)
+            self._version = version
+
+    def notify_changed(self):
+        """
+        Avisa a todos los procesos (incluido este) que hay filas nuevas
+        """
+        try:
+            cache.incr(INDEX_VERSION_KEY.format(self.name))
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY.format(self.name), 1, None)
+
+    # ---------------------------------------------------------------- consulta
+
+    def matches(self, prefix, limit=MAX_SCAN, exclude=()):
+        """
+        Ids cuyas claves empiezan con el prefijo, en orden de clave
+        Llamar antes a _refresh()
+        """
+        found = []
+        seen = set(exclude)
+        keys = self._keys
+        index = bisect_left(keys, (prefix, 0))
+
+        while index < len(keys) and len(found) < limit:
+            key, item_id = keys[index]
+            if not key.startswith(prefix):
+                break
+            if item_id not in seen:
+                seen.add(item_id)
+                found.append(item_id)
+            index += 1
+
+        return found
+
+    def get(self, item_id):
+        return self._items.get(item_id)
+
+    def has_prefix(self, item_id, prefix):
+        info = self._items.get(item_id)
+        return info is not None and any(key.startswith(prefix) for key in info['keys'])
+
+
+class HashtagIndex(PrefixIndex):
+    name = 'hashtags'
+
+    def load(self, after_id=0):
+        from .models import Hashtag
+
+        rows = Hashtag.objects.filter(pk__gt=after_id).values_list('pk', 'name', 'posts_count')
+        return [
+            (pk, [normalize_prefix(name)], {'name': name, 'count': posts_count})
+            for pk, name, posts_count in rows.iterator()
+        ]
+
+    def suggest(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        self._refresh()
+        items = [self.get(item_id) for item_id in self.matches(prefix)]
+        items.sort(key=lambda item: -item['count'])
+        return [{'name': item['name'], 'count': item['count']} for item in items[:limit]]
+
+
+class UserIndex(PrefixIndex):
+    name = 'users'
+
+    def load(self, after_id=0):
+        from apps.authentication.models import User
+
+        rows = User.objects.filter(
+            pk__gt=after_id, is_active=True
+        ).values_list('pk', 'username', 'first_name', 'last_name')
+        return [self.make_row(*row) for row in rows.iterator()]
+
+    @staticmethod
+    def make_row(pk, username, first_name, last_name):
+        keys = [normalize_prefix(username)] + [
+            normalize_prefix(part) for part in f'{first_name} {last_name}'.split()
+        ]
+        return (pk, keys, {
+            'username': username,
+            'name': f'{first_name} {last_name}'.strip(),
+            'keys': keys,
+        })
+
+    def suggest(self, prefix, friend_ids=(), limit=AUTOCOMPLETE_LIMIT, exclude=()):
+        """
+        Usuarios por prefijo de usuario, nombre o apellido
+        Primero los amigos (recorre friend_ids), luego el resto en orden de clave
+        """
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        self._refresh()
+        excluded = set(exclude)
+
+        ids = [
+            friend_id for friend_id in friend_ids
+            if friend_id not in excluded and self.has_prefix(friend_id, prefix)
+        ]
+        ids.sort(key=lambda item_id: self.get(item_id)['username'].lower())
+        ids = ids[:limit]
+
+        if len(ids) < limit:
+            ids += self.matches(prefix, limit - len(ids), exclude=excluded.union(ids))
+
+        friend_set = set(friend_ids)
+        return [
+            {
+                'username': self.get(item_id)['username'],
+                'name': self.get(item_id)['name'],
+                'friend': item_id in friend_set,
+            }
+            for item_id in ids
+        ]
+
+
+hashtag_index = HashtagIndex()
+user_index = UserIndex()
@@ -0,0 +1,81 @@
+"""
+Preparación de tarjetas de publicación (posts/components/post_card.html)
+La parte de la tarjeta que no depende del lector se cachea como fragmento;
+su clave combina post.pk, updated_at, una versión de media y el post compartido
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+CARD_VERSION_KEY = 'post_card_version_{}'
+
+# Campos que se muestran en el fragmento cacheado. Un save(update_fields=...)
+# que los toque sin actualizar updated_at debe invalidar el fragmento
+CARD_FIELDS = {'content', 'has_images', 'has_videos', 'shared_post', 'location', 'feeling'}
+
+
+def get_card_cache_timeout():
+    return settings.CACHE_TIMEOUT.get('posts', 600)
+
+
+def bump_card_version(post_id):
+    """
+    Invalida el fragmento cacheado de un post
+    Se llama desde los signals de post, imagen y video
+    """
+    key = CARD_VERSION_KEY.format(post_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave no existe todavía
+        cache.set(key, 1, None)
+
+
+def _version_keys(post):
+    keys = [CARD_VERSION_KEY.format(post.pk)]
+    if post.shared_post_id:
+        keys.append(CARD_VERSION_KEY.format(post.shared_post_id))
+    return keys
+
+
+def _card_version(post, versions):
+    version = f'{post.updated_at.timestamp()}:{versions.get(CARD_VERSION_KEY.format(post.pk), 0)}'
+    if post.shared_post_id:
+        shared = post.shared_post
+        shared_version = versions.get(CARD_VERSION_KEY.format(shared.pk), 0)
+        version += f':{shared.pk}:{shared.updated_at.timestamp()}:{shared_version}'
+    return version
+
+
+def get_card_version(post):
+    """
+    Versión del fragmento de un post (una lectura de cache)
+    """
+    return _card_version(post, cache.get_many(_version_keys(post)))
+
+
+def prepare_post_cards(posts, viewer=None):
+    """
+    Prepara una página de posts para renderizar sus tarjetas
+    Obtiene las versiones de todos los fragmentos con un solo get_many y,
+    si se indica el lector, sus reacciones con una sola consulta
+
+    Args:
+        posts: Iterable de posts ya cargados
+        viewer: Usuario que ve la página (opcional)
+
+    Returns:
+        Los mismos posts, con card_version (y viewer_reaction si hay lector)
+    """
+    posts = list(posts)
+    versions = cache.get_many([key for post in posts for key in _version_keys(post)])
+
+    for post in posts:
+        post.card_version = _card_version(post, versions)
+
+    if viewer is not None and viewer.is_authenticated:
+        from apps.likes.models import annotate_viewer_reactions
+
+        annotate_viewer_reactions(posts, viewer)
+
+    return posts
@@ -0,0 +1,320 @@
+"""
+Limpieza de contenido vencido (comando cleanup_posts)
+
+Cada fase recorre su tabla en lotes de claves primarias crecientes y
+procesa cada lote en su propia transacción:
+
+- archived_posts: posts archivados por su autor hace más de
+  ARCHIVED_POSTS_RETENTION_DAYS; pasan al archivo frío (PostgreSQL, ver
+  archive.py) o se eliminan
+- orphan_files: imágenes, videos y miniaturas en disco sin fila en
+  PostImage/PostVideo ni en las tablas de archivo
+- hashtags: hashtags sin posts ni uso en HASHTAG_GRACE_DAYS
+- reports: reportes revisados hace más de REPORTS_RETENTION_DAYS
+
+El progreso (última clave de cada fase) se guarda en un checkpoint JSON en
+logs/, de modo que una ejecución interrumpida continúa donde quedó.
+"""
+import json
+import os
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import archive
+from .models import Hashtag, Post, PostHashtag, PostImage, PostReport, PostVideo
+
+
+def get_cleanup_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+class Checkpoint:
+    """
+    {fase: {'last': última clave procesada, 'done': bool, 'rows': filas}}
+    Se reescribe completo (archivo temporal + rename) después de cada lote
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+
+    def load(self):
+        try:
+            with open(self.path) as handle:
+                self.state = json.load(handle)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+        return self
+
+    def get(self, phase):
+        return self.state.setdefault(phase, {'last': None, 'done': False, 'rows': 0})
+
+    def advance(self, phase, last, rows):
+        entry = self.get(phase)
+        entry['last'] = last
+        entry['rows'] += rows
+        self.save()
+
+    def finish(self, phase):
+        self.get(phase)['done'] = True
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(self.state, handle, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def discard(self, phases):
+        for phase in phases:
+            self.state.pop(phase, None)
+        if self.state:
+            self.save()
+        else:
+            self.clear()
+
+    def clear(self):
+        self.state = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_checkpoint_path():
+    return os.path.join(settings.BASE_DIR, 'logs', 'cleanup_posts.json')
+
+
+# ============================================================================
+# LÍMITE DE VELOCIDAD
+# ============================================================================
+
+def get_rate_limit(now=None):
+    """
+    Filas por segundo permitidas a esta hora (None: sin límite)
+    Dentro de CLEANUP_PEAK_HOURS rige CLEANUP_PEAK_ROWS_PER_SECOND
+    """
+    start, end = get_cleanup_config('CLEANUP_PEAK_HOURS', (8, 22))
+    hour = timezone.localtime(now).hour
+    if start <= hour < end:
+        return get_cleanup_config('CLEANUP_PEAK_ROWS_PER_SECOND', 200)
+    return get_cleanup_config('CLEANUP_OFF_PEAK_ROWS_PER_SECOND')
+
+
+class RateLimiter:
+    """
+    Duerme lo necesario para no superar `max_rate` filas por segundo
+    (promedio desde el inicio de la fase)
+    """
+
+    def __init__(self, max_rate=None):
+        self.max_rate = max_rate
+        self.rows = 0
+        self.started = time.monotonic()
+
+    def throttle(self, rows):
+        self.rows += rows
+        max_rate = self.max_rate if self.max_rate is not None else get_rate_limit()
+        if not max_rate:
+            return 0
+
+        wait = self.rows / max_rate - (time.monotonic() - self.started)
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0
+
+
+# ============================================================================
+# FASES
+# ============================================================================
+
+class CleanupPhase:
+    """
+    Subclases: queryset() con las filas vencidas y process(ids)
+    next_chunk() devuelve las claves del siguiente lote después de `after`
+    """
+
+    name = None
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def process(self, keys):
+        raise NotImplementedError
+
+    def count(self):
+        return self.queryset().count()
+
+    def next_chunk(self, after, size):
+        queryset = self.queryset().order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        return list(queryset.values_list('pk', flat=True)[:size])
+
+
+class ArchivedPostsPhase(CleanupPhase):
+    name = 'archived_posts'
+
+    def queryset(self):
+        days = get_cleanup_config('ARCHIVED_POSTS_RETENTION_DAYS', 180)
+        # Por archived_at: archivar guarda con update_fields, así que
+        # updated_at no cambia y puede ser muy anterior al archivado
+        return Post.objects.filter(
+            is_archived=True,
+            archived_at__lt=timezone.now() - timedelta(days=days)
+        )
+
+    def process(self, keys):
+        if archive.is_supported():
+            ids = list(self.queryset().filter(pk__in=keys).values_list('pk', flat=True))
+            return archive.archive_posts(ids).get(Post._meta.db_table, 0)
+
+        # Sin archivo frío: se eliminan (sus archivos de media quedan
+        # huérfanos y los recoge la fase orphan_files)
+        _, deleted = self.queryset().filter(pk__in=keys).delete()
+        return deleted.get(Post._meta.label, 0)
+
+
+class HashtagsPhase(CleanupPhase):
+    name = 'hashtags'
+
+    def queryset(self):
+        days = get_cleanup_config('HASHTAG_GRACE_DAYS', 30)
+        return Hashtag.objects.filter(
+            posts_count=0,
+            last_used__lt=timezone.now() - timedelta(days=days)
+        ).exclude(
+            Exists(PostHashtag.objects.filter(hashtag=OuterRef('pk')))
+        )
+
+    def process(self, keys):
+        _, deleted = self.queryset().filter(pk__in=keys).delete()
+        return deleted.get(Hashtag._meta.label, 0)
+
+
+class ReportsPhase(CleanupPhase):
+    name = 'reports'
+
+    def queryset(self):
+        days = get_cleanup_config('REPORTS_RETENTION_DAYS', 180)
+        return PostReport.objects.filter(
+            is_reviewed=True,
+            reviewed_at__lt=timezone.now() - timedelta(days=days)
+        )
+
+    def process(self, keys):
+        _, deleted = self.queryset().filter(pk__in=keys).delete()
+        return deleted.get(PostReport._meta.label, 0)
+
+
+class OrphanFilesPhase(CleanupPhase):
+    """
+    Las claves son rutas relativas a MEDIA_ROOT en orden alfabético
+    Solo se consideran archivos con más de ORPHAN_FILE_GRACE_HOURS de
+    antigüedad, para no borrar subidas cuya fila aún no se confirma
+    """
+
+    name = 'orphan_files'
+
+    MEDIA_DIRS = ['posts/images', 'posts/videos', 'posts/thumbnails']
+
+    def __init__(self):
+        self._names = None
+
+    def _walk(self, path):
+        try:
+            dirs, files = default_storage.listdir(path)
+        except FileNotFoundError:
+            return
+        for name in files:
+            yield f'{path}/{name}'
+        for name in dirs:
+            yield from self._walk(f'{path}/{name}')
+
+    def names(self):
+        if self._names is None:
+            self._names = sorted(
+                name for path in self.MEDIA_DIRS for name in self._walk(path)
+            )
+        return self._names
+
+    def _orphans(self, names):
+        grace = timedelta(hours=get_cleanup_config('ORPHAN_FILE_GRACE_HOURS', 24))
+        cutoff = timezone.now() - grace
+
+        referenced = set(PostImage.objects.filter(image__in=names).values_list('image', flat=True))
+        referenced.update(PostVideo.objects.filter(video__in=names).values_list('video', flat=True))
+        referenced.update(
+            PostVideo.objects.filter(thumbnail__in=names).values_list('thumbnail', flat=True)
+        )
+        referenced.update(archive.get_archived_media(names))
+
+        return [
+            name for name in names
+            if name not in referenced and default_storage.get_modified_time(name) < cutoff
+        ]
+
+    def count(self):
+        names = self.names()
+        size = 1000
+        return sum(len(self._orphans(names[i:i + size])) for i in range(0, len(names), size))
+
+    def next_chunk(self, after, size):
+        names = self.names()
+        start = bisect_right(names, after) if after is not None else 0
+        return names[start:start + size]
+
+    def process(self, keys):
+        deleted = 0
+        for name in self._orphans(keys):
+            default_storage.delete(name)
+            deleted += 1
+        return deleted
+
+
+PHASES = [ArchivedPostsPhase, OrphanFilesPhase, HashtagsPhase, ReportsPhase]
+
+
+def run_phase(phase, checkpoint, chunk_size, limiter, max_chunks=None, on_chunk=None):
+    """
+    Procesa una fase lote a lote desde su checkpoint
+
+    Returns:
+        tuple: (lotes, filas procesadas, segundos)
+    """
+    entry = checkpoint.get(phase.name)
+    chunks = rows = 0
+    started = time.monotonic()
+
+    while max_chunks is None or chunks < max_chunks:
+        keys = phase.next_chunk(entry['last'], chunk_size)
+        if not keys:
+            checkpoint.finish(phase.name)
+            break
+
+        chunk_started = time.monotonic()
+        with transaction.atomic():
+            processed = phase.process(keys)
+        checkpoint.advance(phase.name, keys[-1], processed)
+
+        chunks += 1
+        rows += processed
+        elapsed = time.monotonic() - chunk_started
+        waited = limiter.throttle(processed)
+        if on_chunk:
+            on_chunk(phase, chunks, len(keys), processed, elapsed, waited)
+
+    return chunks, rows, time.monotonic() - started
@@ -0,0 +1,108 @@
+"""
+Limpia contenido vencido en lotes: posts archivados, archivos de media
+huérfanos, hashtags sin uso y reportes revisados (ver apps/posts/cleanup.py)
+Uso: python manage.py cleanup_posts [--phase hashtags ...] [--chunk-size 500]
+     [--max-rate 200] [--restart] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.posts.cleanup import PHASES, Checkpoint, RateLimiter, get_checkpoint_path, run_phase
+
+
+class Command(BaseCommand):
+    help = 'Elimina o archiva contenido vencido en lotes reanudables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--phase',
+            action='append',
+            choices=[phase.name for phase in PHASES],
+            help='Fase a ejecutar (repetible; por defecto todas)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Filas por lote (una transacción por lote)'
+        )
+        parser.add_argument(
+            '--max-chunks',
+            type=int,
+            default=None,
+            help='Lotes máximos por fase en esta ejecución'
+        )
+        parser.add_argument(
+            '--max-rate',
+            type=float,
+            default=None,
+            help='Filas por segundo (0: sin límite; por defecto según la hora, '
+                 'CLEANUP_PEAK_HOURS)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=get_checkpoint_path(),
+            help='Archivo JSON de progreso'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignorar el checkpoint y empezar desde el inicio'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar lo que se limpiaría'
+        )
+
+    def handle(self, *args, **options):
+        phases = [
+            phase() for phase in PHASES
+            if not options['phase'] or phase.name in options['phase']
+        ]
+
+        if options['dry_run']:
+            for phase in phases:
+                self.stdout.write(f'{phase.name}: {phase.count()} pendiente(s)')
+            return
+
+        checkpoint = Checkpoint(options['checkpoint'])
+        if options['restart']:
+            checkpoint.clear()
+        else:
+            checkpoint.load()
+
+        for phase in phases:
+            entry = checkpoint.get(phase.name)
+            if entry['done']:
+                self.stdout.write(f'{phase.name}: completada en una ejecución anterior')
+                continue
+            if entry['last'] is not None:
+                self.stdout.write(f'{phase.name}: continuando después de {entry["last"]}')
+
+            chunks, rows, seconds = run_phase(
+                phase,
+                checkpoint,
+                options['chunk_size'],
+                RateLimiter(options['max_rate']),
+                max_chunks=options['max_chunks'],
+                on_chunk=self.report_chunk
+            )
+            rate = rows / seconds if seconds else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'{phase.name}: {rows} fila(s) en {chunks} lote(s), '
+                f'{seconds:.1f}s ({rate:.1f} filas/s)'
+            ))
+
+        # Ejecución completa: la próxima empieza desde el inicio
+        if all(checkpoint.get(phase.name)['done'] for phase in phases):
+            checkpoint.discard([phase.name for phase in phases])
+
+    def report_chunk(self, phase, chunk, scanned, processed, elapsed, waited):
+        rate = processed / elapsed if elapsed else 0
+        message = (
+            f'{phase.name}: lote {chunk}, {processed}/{scanned} fila(s), '
+            f'{rate:.1f} filas/s'
+        )
+        if waited:
+            message += f' (pausa {waited:.2f}s)'
+        self.stdout.write(message)
@@ -0,0 +1,71 @@
+"""
+Mueve los posts antiguos al archivo particionado por mes
+Uso: python manage.py partition_posts [--older-than-days 365] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Archiva posts antiguos (y sus filas relacionadas) en tablas particionadas por mes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Antigüedad mínima en días (por defecto POSTS_COLD_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Posts por transacción'
+        )
+        parser.add_argument(
+            '--max-chunks',
+            type=int,
+            default=None,
+            help='Detenerse tras este número de lotes'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar los posts que se archivarían'
+        )
+
+    def handle(self, *args, **options):
+        if not archive.is_supported():
+            self.stdout.write(self.style.WARNING(
+                'El archivo particionado requiere PostgreSQL; no se hizo nada'
+            ))
+            return
+
+        cold = archive.get_cold_posts(options['older_than_days'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{cold.count()} post(s) se archivarían')
+            return
+
+        chunks = 0
+        totals = {}
+        started = time.monotonic()
+
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            ids = list(cold.order_by('pk').values_list('pk', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+
+            for table, rows in archive.archive_posts(ids).items():
+                totals[table] = totals.get(table, 0) + rows
+            chunks += 1
+            self.stdout.write(f'Lote {chunks}: {len(ids)} post(s) archivados')
+
+        for table, rows in totals.items():
+            self.stdout.write(f'{table}: {rows} fila(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archivo completado: {chunks} lote(s) en {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,32 @@
+"""
+Recalcula los contadores desnormalizados a partir de sus tablas de origen
+Uso: python manage.py reconcile_counters [--counter post.likes ...]
+"""
+from django.core.management.base import BaseCommand
+
+from utils import counters
+
+
+class Command(BaseCommand):
+    help = 'Recalcula likes, compartidos, publicaciones por hashtag y amigos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--counter',
+            action='append',
+            choices=sorted(counters.COUNTERS),
+            help='Contador a reconciliar (repetible; por defecto todos)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Filas por lote al leer y corregir'
+        )
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile(options['counter'], batch_size=options['batch_size'])
+
+        for name, total in fixed.items():
+            self.stdout.write(f'{name}: {total} fila(s) corregida(s)')
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados'))
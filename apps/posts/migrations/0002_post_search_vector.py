@@ -0,0 +1,118 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# El SQL queda fijo en la migración: debe producir el mismo esquema aunque
+# apps/posts/search.py cambie más adelante
+
+POSTGRES_INSTALL = [
+    """
+    CREATE OR REPLACE FUNCTION posts_post_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('spanish', coalesce(NEW.content, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce((
+                SELECT concat_ws(' ', username, first_name, last_name)
+                FROM authentication_user WHERE id = NEW.author_id
+            ), '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER posts_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content, author_id ON posts_post
+    FOR EACH ROW EXECUTE FUNCTION posts_post_search_vector_update();
+    """,
+    """
+    CREATE INDEX posts_post_search_vector_gin ON posts_post USING GIN (search_vector);
+    """,
+    # Poblar los posts existentes (dispara el trigger)
+    "UPDATE posts_post SET content = content;",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS posts_post_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS posts_post_search_vector_trigger ON posts_post;",
+    "DROP FUNCTION IF EXISTS posts_post_search_vector_update();",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        content, author, tokenize = 'unicode61 remove_diacritics 2'
+    );
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, content, author)
+        VALUES (new.id, new.content, (
+            SELECT username || ' ' || first_name || ' ' || last_name
+            FROM authentication_user WHERE id = new.author_id
+        ));
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+    AFTER UPDATE OF content, author_id ON posts_post BEGIN
+        DELETE FROM posts_post_fts WHERE rowid = old.id;
+        INSERT INTO posts_post_fts(rowid, content, author)
+        VALUES (new.id, new.content, (
+            SELECT username || ' ' || first_name || ' ' || last_name
+            FROM authentication_user WHERE id = new.author_id
+        ));
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_post_fts WHERE rowid = old.id;
+    END;
+    """,
+    """
+    INSERT INTO posts_post_fts(rowid, content, author)
+    SELECT p.id, p.content, u.username || ' ' || u.first_name || ' ' || u.last_name
+    FROM posts_post p JOIN authentication_user u ON u.id = p.author_id;
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert;",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update;",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete;",
+    "DROP TABLE IF EXISTS posts_post_fts;",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    "sqlite": (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def install_search_backend(apps, schema_editor):
+    install, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in install:
+        schema_editor.execute(statement)
+
+
+def uninstall_search_backend(apps, schema_editor):
+    _, uninstall = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in uninstall:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(install_search_backend, uninstall_search_backend),
+    ]
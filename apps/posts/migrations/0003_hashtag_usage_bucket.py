@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0002_post_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HashtagUsageBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bucket_start",
+                    models.DateTimeField(verbose_name="inicio de la hora"),
+                ),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="usos")),
+                (
+                    "hashtag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage_buckets",
+                        to="posts.hashtag",
+                        verbose_name="hashtag",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "uso de hashtag por hora",
+                "verbose_name_plural": "usos de hashtags por hora",
+                "indexes": [
+                    models.Index(
+                        fields=["bucket_start"], name="posts_hasht_bucket__d95b13_idx"
+                    )
+                ],
+                "unique_together": {("hashtag", "bucket_start")},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:20
+
+from django.db import migrations
+
+# DDL fijo (sin importar apps.posts.archive): (tabla, columna del post)
+ARCHIVED_TABLES = [
+    ("posts_post", "id"),
+    ("posts_postimage", "post_id"),
+    ("posts_postvideo", "post_id"),
+    ("posts_postmention", "post_id"),
+    ("posts_posthashtag", "post_id"),
+    ("likes_like", "post_id"),
+]
+
+
+def install_archive_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, post_column in ARCHIVED_TABLES:
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}_archive" '
+            f'(LIKE "{table}", post_created_at timestamp with time zone NOT NULL) '
+            f"PARTITION BY RANGE (post_created_at)"
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_archive_post" '
+            f'ON "{table}_archive" ("{post_column}")'
+        )
+
+
+def uninstall_archive_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, _ in ARCHIVED_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{table}_archive" CASCADE')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0003_hashtag_usage_bucket"),
+        ("likes", "0002_alter_like_options_like_reaction_type_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_archive_tables, uninstall_archive_tables),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0004_post_archive_tables"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "-is_pinned", "-created_at", "-id"],
+                name="posts_post_author__f8a045_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-is_pinned", "-created_at", "-id"],
+                name="posts_post_is_pinn_c04f26_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:21
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_archived_at(apps, schema_editor):
+    # Se desconoce cuándo se archivaron: la retención cuenta desde ahora
+    Post = apps.get_model("posts", "Post")
+    Post.objects.filter(is_archived=True, archived_at__isnull=True).update(
+        archived_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0005_post_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="archived_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="archivado en"
+            ),
+        ),
+        migrations.RunPython(backfill_archived_at, migrations.RunPython.noop),
+    ]
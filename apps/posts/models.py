@@ -8,10 +8,58 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 from django.urls import reverse
+from django.contrib.postgres.search import SearchVectorField
 import re
 
+from utils.mixins import DirtyFieldsMixin
 
-class Post(models.Model):
+
+# Patrones de menciones (@username) y hashtags (#hashtag) en el contenido
+MENTION_PATTERN = re.compile(r'@(\w+)')
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+
+# Indicadores de media recalculados en Post.save
+MEDIA_FLAG_FIELDS = {'has_images', 'has_videos'}
+
+
+class PostQuerySet(models.QuerySet):
+    """
+    Consultas reutilizables sobre publicaciones
+    """
+    
+    def visible_to(self, viewer):
+        """
+        Posts que `viewer` puede ver (mismas reglas que Post.can_view)
+        en un solo predicado SQL:
+        - Los propios, siempre
+        - Los archivados y privados, nunca
+        - Los públicos, siempre
+        - Los de amigos, si el autor es amigo (subconsulta sobre Friendship)
+        """
+        if not getattr(viewer, 'is_authenticated', False):
+            return self.filter(privacy='public', is_archived=False)
+        
+        from apps.friends.models import Friendship
+        
+        is_friend = (
+            models.Q(author_id__in=Friendship.objects.filter(
+                user1_id=viewer.pk
+            ).values('user2_id')) |
+            models.Q(author_id__in=Friendship.objects.filter(
+                user2_id=viewer.pk
+            ).values('user1_id'))
+        )
+        
+        return self.filter(
+            models.Q(author_id=viewer.pk) |
+            models.Q(is_archived=False) & (
+                models.Q(privacy='public') |
+                models.Q(privacy='friends') & is_friend
+            )
+        )
+
+
+class Post(DirtyFieldsMixin, models.Model):
     """
     Publicación de usuario
     Puede contener texto, imágenes, videos, menciones y hashtags
@@ -23,6 +71,9 @@ class Post(models.Model):
         ('private', 'Solo yo'),
     ]
     
+    # Campos cuyo valor original registra DirtyFieldsMixin
+    TRACKED_FIELDS = {'content', 'privacy', 'is_archived'}
+    
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -93,12 +144,19 @@ class Post(models.Model):
     is_edited = models.BooleanField(_('editado'), default=False)
     is_pinned = models.BooleanField(_('fijado'), default=False)
     is_archived = models.BooleanField(_('archivado'), default=False)
+    archived_at = models.DateTimeField(_('archivado en'), null=True, blank=True)
     
     # Fechas
     created_at = models.DateTimeField(_('creado'), auto_now_add=True)
     updated_at = models.DateTimeField(_('actualizado'), auto_now=True)
     edited_at = models.DateTimeField(_('editado en'), null=True, blank=True)
     
+    # Búsqueda de texto completo (PostgreSQL); la mantiene un trigger y su
+    # índice GIN se crea en la migración (ver apps/posts/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = PostQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('publicación')
         verbose_name_plural = _('publicaciones')
@@ -107,6 +165,9 @@ class Post(models.Model):
             models.Index(fields=['author', '-created_at']),
             models.Index(fields=['privacy', '-created_at']),
             models.Index(fields=['-created_at']),
+            # Orden de los listados paginados (DEFAULT_POST_ORDERING)
+            models.Index(fields=['author', '-is_pinned', '-created_at', '-id']),
+            models.Index(fields=['-is_pinned', '-created_at', '-id']),
         ]
     
     def __str__(self):
@@ -117,23 +178,44 @@ class Post(models.Model):
         return reverse('posts:post_detail', kwargs={'pk': self.pk})
     
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        content_saved = update_fields is None or 'content' in update_fields
+        adding = self._state.adding
+        
         # Si se está editando (no es la primera vez)
-        if self.pk and self._state.adding is False:
-            original = Post.objects.get(pk=self.pk)
-            if original.content != self.content:
+        if self.pk and not adding and content_saved:
+            if self.is_field_loaded('content'):
+                previous_content = self.get_loaded_value('content')
+            else:
+                previous_content = Post.objects.filter(
+                    pk=self.pk
+                ).values_list('content', flat=True).first()
+            
+            # Contenido anterior: el signal post_save lo usa para actualizar
+            # solo las menciones y hashtags que cambiaron
+            self._previous_content = previous_content
+            if previous_content is not None and previous_content != self.content:
                 self.is_edited = True
                 self.edited_at = timezone.now()
+                if update_fields is not None:
+                    kwargs['update_fields'] = set(update_fields) | {'is_edited', 'edited_at'}
         
         super().save(*args, **kwargs)
         
         # Actualizar indicadores de contenido
-        self.has_images = self.images.exists()
-        self.has_videos = self.videos.exists()
-        if self.pk:
-            Post.objects.filter(pk=self.pk).update(
-                has_images=self.has_images,
-                has_videos=self.has_videos
-            )
+        # Un post nuevo aún no tiene media y los saves parciales que no tocan
+        # los indicadores no pueden cambiarlos
+        media_saved = update_fields is None or MEDIA_FLAG_FIELDS & set(update_fields)
+        if media_saved and not adding:
+            has_images = self.images.exists()
+            has_videos = self.videos.exists()
+            if (has_images, has_videos) != (self.has_images, self.has_videos):
+                self.has_images = has_images
+                self.has_videos = has_videos
+                Post.objects.filter(pk=self.pk).update(
+                    has_images=has_images,
+                    has_videos=has_videos
+                )
     
     @property
     def is_shared(self):
@@ -145,20 +227,20 @@ class Post(models.Model):
         Extrae menciones (@username) del contenido
         Retorna lista de usernames mencionados
         """
-        pattern = r'@(\w+)'
-        return re.findall(pattern, self.content)
+        return MENTION_PATTERN.findall(self.content)
     
     def extract_hashtags(self):
         """
         Extrae hashtags (#hashtag) del contenido
         Retorna lista de hashtags
         """
-        pattern = r'#(\w+)'
-        return re.findall(pattern, self.content)
+        return HASHTAG_PATTERN.findall(self.content)
     
     def can_view(self, user):
         """
         Verifica si un usuario puede ver este post
+        Para listados usar Post.objects.visible_to(user), que aplica las
+        mismas reglas en SQL
         """
         # El autor siempre puede ver
         if self.author == user:
@@ -394,6 +476,34 @@ class PostHashtag(models.Model):
         return f"#{self.hashtag.name} en post de {self.post.author.username}"
 
 
+class HashtagUsageBucket(models.Model):
+    """
+    Usos de un hashtag en una hora
+    Base de las tendencias por ventana (ver apps/posts/trending.py)
+    """
+    
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name='usage_buckets',
+        verbose_name=_('hashtag')
+    )
+    
+    bucket_start = models.DateTimeField(_('inicio de la hora'))
+    count = models.PositiveIntegerField(_('usos'), default=0)
+    
+    class Meta:
+        verbose_name = _('uso de hashtag por hora')
+        verbose_name_plural = _('usos de hashtags por hora')
+        unique_together = ['hashtag', 'bucket_start']
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.hashtag.name} {self.bucket_start:%Y-%m-%d %H}h: {self.count}"
+
+
 class PostReport(models.Model):
     """
     Reporte de contenido inapropiado
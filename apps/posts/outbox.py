@@ -0,0 +1,53 @@
+"""
+Manejadores del outbox para el módulo de posts
+Se ejecutan en el worker, fuera de la petición; deben ser idempotentes
+"""
+from apps.outbox.dispatch import register
+from .cards import bump_card_version
+from .models import Post
+from .signals import (
+    create_share_notification, process_hashtags, process_mentions,
+    sync_mentions_and_hashtags
+)
+
+
+def _get_post(payload):
+    return Post.objects.select_related(
+        'author', 'shared_post', 'shared_post__author'
+    ).filter(pk=payload['post_id']).first()
+
+
+@register('post.created')
+def handle_post_created(payload):
+    """
+    Menciones, hashtags y notificación de compartido de un post nuevo
+    process_mentions y process_hashtags ignoran lo ya registrado
+    La tarjeta cacheada muestra menciones y hashtags: si cambian se invalida
+    """
+    post = _get_post(payload)
+    if post is None:
+        return
+
+    mentioned = process_mentions(post)
+    if process_hashtags(post) or mentioned:
+        bump_card_version(post.pk)
+
+    if post.shared_post_id:
+        create_share_notification(post)
+
+
+@register('post.updated')
+def handle_post_updated(payload):
+    """
+    Diferencia de menciones y hashtags de un post editado
+    Parte de los conjuntos anteriores que trae el evento (sin ellos compara
+    con lo guardado); repetirla no cambia nada
+    """
+    if not payload.get('content'):
+        return
+
+    post = _get_post(payload)
+    if post is not None and sync_mentions_and_hashtags(
+        post, payload.get('previous_mentions'), payload.get('previous_hashtags')
+    ):
+        bump_card_version(post.pk)
@@ -0,0 +1,92 @@
+"""
+Búsqueda de texto completo en publicaciones
+
+- PostgreSQL: columna search_vector (tsvector) mantenida por un trigger y
+  con índice GIN. El contenido usa la configuración 'spanish' (stemming);
+  el nombre del autor, 'simple'
+- SQLite (desarrollo y pruebas): tabla virtual FTS5 mantenida por triggers
+
+El backend se instala en la migración posts.0002 según el motor de la base
+de datos (el SQL vive en la migración; SEARCH_CONFIG y FTS_TABLE deben
+coincidir con él); search_posts elige la consulta correspondiente
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = 'spanish'
+
+FTS_TABLE = 'posts_post_fts'
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+def _fts5_query(query):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura:
+    cada palabra entre comillas y como prefijo, todas obligatorias
+    """
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', query))
+
+
+def search_posts(queryset, query):
+    """
+    Filtra un QuerySet de posts por texto y anota su relevancia (rank)
+
+    Args:
+        queryset: Posts ya filtrados por visibilidad
+        query: Texto buscado
+
+    Returns:
+        QuerySet con la anotación 'rank' (mayor es más relevante); ordenar
+        por ('-rank', '-id') para paginar con CursorPaginator
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        # 'spanish' para el contenido y 'simple' para los nombres de autor
+        search_query = (
+            SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch') |
+            SearchQuery(query, config='simple', search_type='websearch')
+        )
+        # ts_rank devuelve real: se convierte a double para que el valor del
+        # cursor sobreviva intacto a la ida y vuelta por JSON
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+
+    if vendor == 'sqlite':
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                [fts_query]
+            )
+        ).annotate(
+            rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+                [fts_query],
+                output_field=FloatField()
+            )
+        )
+
+    # Otros motores: búsqueda por subcadena sin ranking
+    return queryset.filter(
+        Q(content__icontains=query) |
+        Q(author__username__icontains=query) |
+        Q(author__first_name__icontains=query) |
+        Q(author__last_name__icontains=query)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -1,15 +1,25 @@
 """
 Signals para el módulo de posts
 Manejo automático de menciones, hashtags y notificaciones
+El trabajo pesado se publica en el outbox (ver apps/posts/outbox.py)
 """
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.conf import settings
 from django.dispatch import receiver
-from django.db.models import F
 
+from apps.feed.timeline import (
+    TIMELINE_FIELDS, invalidate_pull_sources, push_post, sync_post
+)
+from apps.outbox.dispatch import publish
+from utils import counters
+from .autocomplete import hashtag_index, user_index
+from .cards import CARD_FIELDS, bump_card_version
 from .models import (
     Post, PostImage, PostVideo, PostMention, 
-    Hashtag, PostHashtag, PostReport
+    Hashtag, PostHashtag, PostReport,
+    MENTION_PATTERN, HASHTAG_PATTERN
 )
+from .trending import record_hashtag_usage
 
 
 # ============================================================================
@@ -20,43 +30,62 @@ from .models import (
 def post_saved(sender, instance, created, **kwargs):
     """
     Se ejecuta cuando se guarda un post
-    - Procesa menciones
-    - Procesa hashtags
-    - Crea notificaciones
+    - Agrega el post al timeline del autor
+    - Publica en el outbox el fan-out, las menciones, los hashtags
+      y las notificaciones
+    - Invalida la tarjeta cacheada
     """
+    update_fields = kwargs.get('update_fields')
+
+    # Un save completo cambia updated_at y con ello la clave del fragmento;
+    # un save parcial no, así que se invalida explícitamente
+    if update_fields is not None and CARD_FIELDS & set(update_fields):
+        bump_card_version(instance.pk)
+
     if created:
-        # Procesar menciones
-        process_mentions(instance)
-        
-        # Procesar hashtags
-        process_hashtags(instance)
-        
-        # Crear notificación si es un post compartido
-        if instance.shared_post:
-            create_share_notification(instance)
-    else:
-        # Si se editó, actualizar menciones y hashtags
-        # Primero eliminar los anteriores
-        instance.mentions.all().delete()
-        instance.post_hashtags.all().delete()
-        
-        # Procesar de nuevo
-        process_mentions(instance)
-        process_hashtags(instance)
+        # El autor ve su post de inmediato; el resto va por el outbox
+        push_post(instance, [instance.author_id])
+        invalidate_pull_sources(instance, public=instance.privacy == 'public')
+        publish(
+            'post.created',
+            {'post_id': instance.pk},
+            key=f'post.created:{instance.pk}'
+        )
+        return
+
+    changed = changed_fields(instance, update_fields)
+    timeline = bool(TIMELINE_FIELDS & changed)
+    content = 'content' in changed and mentions_or_hashtags_changed(instance)
 
+    if timeline and (instance.is_archived or instance.privacy == 'private'):
+        # Restringir la visibilidad no puede esperar al worker
+        sync_post(instance)
+        timeline = False
 
-@receiver(post_delete, sender=Post)
+    if timeline or content:
+        payload = {'post_id': instance.pk, 'timeline': timeline, 'content': content}
+        previous_content = getattr(instance, '_previous_content', None)
+        if content and previous_content is not None:
+            # El worker recarga el post y ya no conoce el contenido anterior
+            payload['previous_mentions'] = sorted(extract_mention_set(previous_content))
+            payload['previous_hashtags'] = sorted(extract_hashtag_set(previous_content))
+        publish('post.updated', payload)
+
+
+@receiver(pre_delete, sender=Post)
 def post_deleted(sender, instance, **kwargs):
     """
-    Se ejecuta cuando se elimina un post
-    - Actualiza contadores de hashtags
-    - Limpia archivos de media
+    Se ejecuta antes de eliminar un post
+    - Actualiza contadores de hashtags y de compartidos
+    En post_delete las relaciones ya se borraron en cascada
     """
-    # Actualizar contadores de hashtags
-    for post_hashtag in instance.post_hashtags.all():
-        hashtag = post_hashtag.hashtag
-        hashtag.posts_count = F('posts_count') - 1
-        hashtag.save(update_fields=['posts_count'])
+    counters.increment_many(
+        'hashtag.posts',
+        PostHashtag.objects.filter(post=instance).values_list('hashtag_id', flat=True),
+        -1
+    )
+    if instance.shared_post_id:
+        counters.increment('post.shares', instance.shared_post_id, -1)
 
 
 # ============================================================================
@@ -71,6 +100,7 @@ def image_saved(sender, instance, created, **kwargs):
     if created:
         instance.post.has_images = True
         instance.post.save(update_fields=['has_images'])
+    bump_card_version(instance.post_id)
 
 
 @receiver(post_delete, sender=PostImage)
@@ -82,6 +112,7 @@ def image_deleted(sender, instance, **kwargs):
     if not post.images.exists():
         post.has_images = False
         post.save(update_fields=['has_images'])
+    bump_card_version(instance.post_id)
 
 
 @receiver(post_save, sender=PostVideo)
@@ -92,6 +123,7 @@ def video_saved(sender, instance, created, **kwargs):
     if created:
         instance.post.has_videos = True
         instance.post.save(update_fields=['has_videos'])
+    bump_card_version(instance.post_id)
 
 
 @receiver(post_delete, sender=PostVideo)
@@ -103,6 +135,7 @@ def video_deleted(sender, instance, **kwargs):
     if not post.videos.exists():
         post.has_videos = False
         post.save(update_fields=['has_videos'])
+    bump_card_version(instance.post_id)
 
 
 # ============================================================================
@@ -119,69 +152,223 @@ def report_saved(sender, instance, created, **kwargs):
         pass
 
 
+# ============================================================================
+# SIGNALS DE USUARIOS (autocompletado de menciones)
+# ============================================================================
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created, **kwargs):
+    """
+    Avisa al índice de menciones que hay un usuario nuevo
+    """
+    if created:
+        user_index.notify_changed()
+
+
 # ============================================================================
 # FUNCIONES AUXILIARES
 # ============================================================================
 
-def process_mentions(post):
+def extract_mention_set(content):
+    return set(MENTION_PATTERN.findall(content or ''))
+
+
+def extract_hashtag_set(content):
+    """
+    Hashtags normalizados (minúsculas) que caben en Hashtag.name
+    """
+    max_length = Hashtag._meta.get_field('name').max_length
+    return {
+        tag_name.lower() for tag_name in HASHTAG_PATTERN.findall(content or '')
+        if len(tag_name) <= max_length
+    }
+
+
+def changed_fields(post, update_fields=None):
+    """
+    Campos de Post.TRACKED_FIELDS que cambió este save
+    En post_save DirtyFieldsMixin aún conserva los valores originales; un
+    campo sin valor original conocido se da por cambiado
+    """
+    saved = Post.TRACKED_FIELDS
+    if update_fields is not None:
+        saved = saved & set(update_fields)
+    dirty = post.get_dirty_fields()
+    return {name for name in saved if name in dirty or not post.is_field_loaded(name)}
+
+
+def mentions_or_hashtags_changed(post):
+    """
+    Indica si una edición cambió las menciones o los hashtags
+    Sin contenido anterior conocido asume que sí
+    """
+    previous_content = getattr(post, '_previous_content', None)
+    if previous_content is None:
+        return True
+
+    return (
+        extract_mention_set(previous_content) != extract_mention_set(post.content) or
+        extract_hashtag_set(previous_content) != extract_hashtag_set(post.content)
+    )
+
+
+def sync_mentions_and_hashtags(post, previous_mentions=None, previous_hashtags=None):
+    """
+    Actualiza menciones y hashtags de un post editado aplicando solo la diferencia
+    Si los conjuntos anteriores son conocidos (del evento del outbox o del
+    contenido anterior) y no cambian, no ejecuta ninguna consulta
+
+    Returns:
+        bool: Si se agregó o quitó alguna mención o hashtag
+    """
+    mentions = extract_mention_set(post.content)
+    hashtags = extract_hashtag_set(post.content)
+
+    previous_content = getattr(post, '_previous_content', None)
+    if previous_mentions is not None and previous_hashtags is not None:
+        old_mentions = set(previous_mentions)
+        old_hashtags = set(previous_hashtags)
+    elif previous_content is not None:
+        old_mentions = extract_mention_set(previous_content)
+        old_hashtags = extract_hashtag_set(previous_content)
+    else:
+        # Contenido anterior desconocido: comparar con lo guardado
+        old_mentions = set(post.mentions.values_list('user__username', flat=True))
+        old_hashtags = set(post.post_hashtags.values_list('hashtag__name', flat=True))
+
+    changed = False
+    if mentions != old_mentions:
+        removed = old_mentions - mentions
+        if removed:
+            deleted, _ = PostMention.objects.filter(
+                post=post, user__username__in=removed
+            ).delete()
+            changed = bool(deleted)
+        changed = process_mentions(post, mentions - old_mentions) or changed
+
+    if hashtags != old_hashtags:
+        removed = old_hashtags - hashtags
+        if removed:
+            removed_ids = list(
+                PostHashtag.objects.filter(
+                    post=post, hashtag__name__in=removed
+                ).values_list('hashtag_id', flat=True)
+            )
+            PostHashtag.objects.filter(post=post, hashtag_id__in=removed_ids).delete()
+            counters.increment_many('hashtag.posts', removed_ids, -1)
+            changed = changed or bool(removed_ids)
+        changed = process_hashtags(post, hashtags - old_hashtags) or changed
+
+    return changed
+
+
+def process_mentions(post, usernames=None):
     """
     Procesa menciones en el contenido del post
+    Número de consultas constante: una búsqueda por username__in,
+    una lectura de las menciones existentes y un bulk_create
+
+    Args:
+        post: Post a procesar
+        usernames: Usernames a agregar (por defecto, todos los del contenido)
+
+    Returns:
+        bool: Si se agregó alguna mención
     """
     from apps.authentication.models import User
     
-    mentions = post.extract_mentions()
+    if usernames is None:
+        usernames = extract_mention_set(post.content)
+    if not usernames:
+        return False
     
-    for username in mentions:
-        try:
-            user = User.objects.get(username=username)
-            # Crear mención si no existe
-            PostMention.objects.get_or_create(
-                post=post,
-                user=user
-            )
-            
-            # Crear notificación
-            try:
-                from apps.notifications.utils import create_notification
-                create_notification(
-                    recipient=user,
-                    sender=post.author,
-                    notification_type='post_mention',
-                    text=f'{post.author.get_full_name()} te mencionó en una publicación',
-                    link=post.get_absolute_url(),
-                    related_object_type='post',
-                    related_object_id=post.id
-                )
-            except ImportError:
-                pass
-        except User.DoesNotExist:
-            # Usuario no existe, ignorar
-            pass
+    users = list(User.objects.filter(username__in=usernames))
+    if not users:
+        return False
+    
+    existing = set(
+        PostMention.objects.filter(
+            post=post, user__in=users
+        ).values_list('user_id', flat=True)
+    )
+    new_users = [user for user in users if user.pk not in existing]
+    
+    PostMention.objects.bulk_create(
+        [PostMention(post=post, user=user) for user in new_users],
+        ignore_conflicts=True
+    )
+    
+    # Crear notificaciones solo para las menciones nuevas
+    try:
+        from apps.notifications.utils import create_notification
+    except ImportError:
+        return bool(new_users)
+    
+    for user in new_users:
+        create_notification(
+            recipient=user,
+            sender=post.author,
+            notification_type='post_mention',
+            text=f'{post.author.get_full_name()} te mencionó en una publicación',
+            link=post.get_absolute_url(),
+            related_object_type='post',
+            related_object_id=post.id
+        )
+    return bool(new_users)
 
 
-def process_hashtags(post):
+def process_hashtags(post, tag_names=None):
     """
     Procesa hashtags en el contenido del post
+    Número de consultas constante: upsert de Hashtag, lectura de ids,
+    lectura de relaciones existentes, bulk_create y un único UPDATE
+
+    Args:
+        post: Post a procesar
+        tag_names: Hashtags a agregar (por defecto, todos los del contenido)
+
+    Returns:
+        bool: Si se agregó algún hashtag
     """
-    hashtags = post.extract_hashtags()
+    if tag_names is None:
+        tag_names = extract_hashtag_set(post.content)
+    if not tag_names:
+        return False
     
-    for tag_name in hashtags:
-        # Normalizar: convertir a minúsculas
-        tag_name = tag_name.lower()
-        
-        # Obtener o crear hashtag
-        hashtag, created = Hashtag.objects.get_or_create(name=tag_name)
-        
-        # Crear relación si no existe
-        post_hashtag, created = PostHashtag.objects.get_or_create(
-            post=post,
-            hashtag=hashtag
-        )
-        
-        if created:
-            # Incrementar contador
-            hashtag.posts_count = F('posts_count') + 1
-            hashtag.save(update_fields=['posts_count', 'last_used'])
+    # Crear los hashtags que no existan
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=tag_name) for tag_name in tag_names],
+        ignore_conflicts=True
+    )
+    counts = dict(
+        Hashtag.objects.filter(name__in=tag_names).values_list('pk', 'posts_count')
+    )
+    hashtag_ids = set(counts)
+    
+    # Un hashtag sin publicaciones es nuevo: avisar al autocompletado
+    if 0 in counts.values():
+        hashtag_index.notify_changed()
+    
+    existing = set(
+        PostHashtag.objects.filter(
+            post=post, hashtag_id__in=hashtag_ids
+        ).values_list('hashtag_id', flat=True)
+    )
+    new_ids = hashtag_ids - existing
+    if not new_ids:
+        return False
+    
+    PostHashtag.objects.bulk_create(
+        [PostHashtag(post=post, hashtag_id=hashtag_id) for hashtag_id in new_ids],
+        ignore_conflicts=True
+    )
+    
+    # Contadores (agrupados por utils.counters; también actualiza last_used)
+    counters.increment_many('hashtag.posts', new_ids)
+    
+    # Cubetas horarias de tendencias
+    record_hashtag_usage(new_ids)
+    return True
 
 
 def create_share_notification(post):
@@ -0,0 +1,35 @@
+"""
+Tareas asíncronas (Celery) del módulo de posts
+"""
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def compute_trending_hashtags_task():
+    """
+    Recalcula y cachea los hashtags en tendencia y purga las cubetas viejas
+    Programada en CELERY_BEAT_SCHEDULE
+    """
+    from .trending import purge_usage_buckets, refresh_trending
+
+    sizes = refresh_trending()
+    purged = purge_usage_buckets()
+    logger.info('posts.trending ventanas=%s cubetas_purgadas=%s', sizes, purged)
+
+
+@shared_task(ignore_result=True)
+def flush_counters_task():
+    """
+    Aplica los incrementos de contadores acumulados (utils.counters)
+    Programada en CELERY_BEAT_SCHEDULE cada pocos segundos
+    """
+    from utils import counters
+
+    updated = counters.flush()
+    if updated:
+        logger.info('counters.flush filas=%s', updated)
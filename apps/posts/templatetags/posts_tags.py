@@ -0,0 +1,25 @@
+"""
+Template tags para el módulo de posts
+"""
+from django import template
+
+from apps.posts.cards import get_card_cache_timeout, get_card_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_cache(post):
+    """
+    Parámetros del fragmento cacheado de una tarjeta de post
+    Uso: {% post_card_cache post as card %}
+         {% cache card.timeout post_card_body post.pk card.version %}
+    """
+    version = getattr(post, 'card_version', None)
+    if version is None:
+        version = get_card_version(post)
+
+    return {
+        'timeout': get_card_cache_timeout(),
+        'version': version,
+    }
@@ -0,0 +1,638 @@
+"""
+Tests del módulo de posts
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.friends.models import Friendship
+from apps.outbox.dispatch import process_outbox
+from apps.outbox.models import OutboxEvent
+from utils import counters
+from utils.pagination import CursorPaginator
+from utils.testing import make_post, make_user
+
+from . import archive, autocomplete
+from .cards import CARD_VERSION_KEY, get_card_version, prepare_post_cards
+from .cleanup import ArchivedPostsPhase, Checkpoint, RateLimiter, run_phase
+from .models import Hashtag, HashtagUsageBucket, Post, PostHashtag, PostImage, PostMention
+from .search import search_posts
+from .trending import (
+    compute_trending, get_bucket_start, get_trending_hashtags, purge_usage_buckets,
+    record_hashtag_usage
+)
+
+
+# ============================================================================
+# VISIBILIDAD
+# ============================================================================
+
+class VisibleToTests(TestCase):
+    """
+    visible_to (SQL) y can_view (Python) deben aplicar las mismas reglas
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('autor')
+        self.friend = make_user('amigo')
+        self.other_friend = make_user('amiga')
+        self.stranger = make_user('extrano')
+        # La amistad se guarda en un solo sentido: probar ambos
+        Friendship.objects.create(user1=self.author, user2=self.friend)
+        Friendship.objects.create(user1=self.other_friend, user2=self.author)
+
+        self.posts = {
+            'public': make_post(self.author, privacy='public'),
+            'friends': make_post(self.author, privacy='friends'),
+            'private': make_post(self.author, privacy='private'),
+            'archived': make_post(self.author, privacy='public', is_archived=True),
+            'archived_friends': make_post(self.author, privacy='friends', is_archived=True),
+        }
+
+    def visible(self, viewer):
+        ids = set(Post.objects.visible_to(viewer).values_list('pk', flat=True))
+        return {name for name, post in self.posts.items() if post.pk in ids}
+
+    def test_matches_can_view(self):
+        viewers = [self.author, self.friend, self.other_friend, self.stranger]
+        for viewer in viewers:
+            with self.subTest(viewer=viewer.username):
+                expected = {
+                    name for name, post in self.posts.items() if post.can_view(viewer)
+                }
+                self.assertEqual(self.visible(viewer), expected)
+
+    def test_expected_visibility(self):
+        self.assertEqual(self.visible(self.author), set(self.posts))
+        self.assertEqual(self.visible(self.friend), {'public', 'friends'})
+        self.assertEqual(self.visible(self.other_friend), {'public', 'friends'})
+        self.assertEqual(self.visible(self.stranger), {'public'})
+        self.assertEqual(self.visible(AnonymousUser()), {'public'})
+
+
+# ============================================================================
+# PAGINACIÓN POR CURSOR
+# ============================================================================
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        author = make_user('autor')
+        # Fechas repetidas y un post fijado: el desempate es -id
+        now = timezone.now()
+        self.posts = [make_post(author) for _ in range(7)]
+        for post, day in zip(self.posts, (1, 1, 1, 2, 2, 3, 4)):
+            Post.objects.filter(pk=post.pk).update(created_at=now - timedelta(days=day))
+        Post.objects.filter(pk=self.posts[5].pk).update(is_pinned=True)
+
+    def walk(self, per_page):
+        paginator = CursorPaginator(Post.objects.all(), per_page)
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next:
+                return seen, page
+            page = paginator.get_page(after=page.next_cursor)
+
+    def test_pages_cover_every_post_once_in_order(self):
+        expected = list(
+            Post.objects.order_by('-is_pinned', '-created_at', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(expected[0], self.posts[5].pk)
+
+        for per_page in (1, 2, 3, 10):
+            seen, _ = self.walk(per_page)
+            self.assertEqual(seen, expected)
+
+    def test_before_cursor_returns_previous_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        first = paginator.get_page()
+        second = paginator.get_page(after=first.next_cursor)
+
+        back = paginator.get_page(before=second.previous_cursor)
+        self.assertEqual([post.pk for post in back], [post.pk for post in first])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        self.assertEqual(
+            [post.pk for post in paginator.get_page(after='no-es-un-cursor')],
+            [post.pk for post in paginator.get_page()]
+        )
+
+
+# ============================================================================
+# SIGNALS DE POST
+# ============================================================================
+
+class PostSavedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.post = make_post(make_user('autor'), content='hola #uno')
+
+    def updated_events(self):
+        return list(
+            OutboxEvent.objects.filter(topic='post.updated').values_list('payload', flat=True)
+        )
+
+    def test_full_save_without_changes_publishes_nothing(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.save()
+
+        self.assertEqual(self.updated_events(), [])
+
+    def test_full_save_publishes_only_what_changed(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = 'hola #dos'
+        post.save()
+
+        events = self.updated_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0]['timeline'], events[0]['content']), (False, True))
+
+    def test_edit_syncs_mentions_and_hashtags_in_the_worker(self):
+        make_user('ana')
+        make_user('beto')
+        self.post.content = 'hola @ana #uno'
+        self.post.save()
+        process_outbox()
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = 'hola @beto #dos'
+        post.save()
+
+        event = self.updated_events()[-1]
+        self.assertEqual(
+            (event['previous_mentions'], event['previous_hashtags']), (['ana'], ['uno'])
+        )
+
+        # El worker recarga el post: sin los conjuntos del evento tendría
+        # que leer las menciones y hashtags guardados
+        with mock.patch('apps.posts.models.Post.mentions') as mentions:
+            process_outbox()
+        mentions.values_list.assert_not_called()
+
+        self.assertEqual(
+            set(PostMention.objects.filter(post=post).values_list('user__username', flat=True)),
+            {'beto'}
+        )
+        self.assertEqual(
+            set(PostHashtag.objects.filter(post=post).values_list('hashtag__name', flat=True)),
+            {'dos'}
+        )
+
+
+    def test_worker_invalidates_card_when_links_change(self):
+        key = CARD_VERSION_KEY.format(self.post.pk)
+
+        # El fragmento de la tarjeta muestra hashtags y menciones, que el
+        # worker agrega después de la petición
+        version = cache.get(key, 0)
+        process_outbox()
+        self.assertEqual(cache.get(key), version + 1)
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = 'hola #dos'
+        post.save()
+        process_outbox()
+        self.assertEqual(cache.get(key), version + 2)
+
+        # Una edición que no cambia menciones ni hashtags no la invalida
+        post.content = 'chao #dos'
+        post.save()
+        OutboxEvent.objects.create(
+            topic='post.updated', payload={'post_id': post.pk, 'content': True}
+        )
+        process_outbox()
+        self.assertEqual(cache.get(key), version + 2)
+
+
+# ============================================================================
+# TARJETAS CACHEADAS
+# ============================================================================
+
+class CardVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('autor')
+        self.post = make_post(self.author)
+
+    def version(self):
+        return get_card_version(Post.objects.get(pk=self.post.pk))
+
+    def test_partial_save_of_card_fields_invalidates(self):
+        before = self.version()
+        self.post.location = 'Biblioteca'
+        self.post.save(update_fields=['location'])
+
+        self.assertNotEqual(self.version(), before)
+
+    def test_partial_save_of_other_fields_keeps_the_fragment(self):
+        before = self.version()
+        self.post.is_pinned = True
+        self.post.save(update_fields=['is_pinned'])
+
+        self.assertEqual(self.version(), before)
+
+    def test_full_save_invalidates_through_updated_at(self):
+        before = self.version()
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = 'adiós'
+        post.save()
+
+        self.assertNotEqual(self.version(), before)
+
+    def test_new_image_invalidates(self):
+        before = self.version()
+        PostImage.objects.create(post=self.post, image='posts/images/foto.jpg')
+
+        self.assertNotEqual(self.version(), before)
+
+    def test_share_follows_the_shared_post(self):
+        share = make_post(make_user('lector'), shared_post=self.post)
+        before = get_card_version(share)
+
+        self.post.content = 'editado'
+        self.post.save(update_fields=['content'])
+
+        self.assertNotEqual(get_card_version(Post.objects.get(pk=share.pk)), before)
+
+    def test_page_reads_every_version_at_once(self):
+        posts = [make_post(self.author, shared_post=self.post) for _ in range(3)]
+        posts = list(Post.objects.filter(pk__in=[post.pk for post in posts]))
+
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            prepared = prepare_post_cards(posts)
+
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(
+            {post.card_version for post in prepared},
+            {get_card_version(post) for post in posts}
+        )
+
+
+# ============================================================================
+# BÚSQUEDA
+# ============================================================================
+
+class SearchPostsTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user('autor')
+        self.author.first_name = 'Marta'
+        self.author.save()
+        self.song = make_post(self.author, content='Nueva canción del coro universitario')
+        self.exam = make_post(make_user('otro'), content='Examen de cálculo el lunes')
+
+    def found(self, query):
+        results = search_posts(Post.objects.all(), query).order_by('-rank', '-id')
+        return [post.pk for post in results]
+
+    def test_matches_content_prefixes_and_author(self):
+        self.assertEqual(self.found('cancion'), [self.song.pk])
+        self.assertEqual(self.found('univ'), [self.song.pk])
+        self.assertEqual(self.found('marta'), [self.song.pk])
+        self.assertEqual(self.found('coro lunes'), [])
+
+    def test_more_relevant_posts_first(self):
+        repeated = make_post(self.author, content='Coro, coro y más coro')
+
+        self.assertEqual(self.found('coro'), [repeated.pk, self.song.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.exam.content = 'Examen de física'
+        self.exam.save()
+        self.assertEqual(self.found('física'), [self.exam.pk])
+        self.assertEqual(self.found('cálculo'), [])
+
+        self.exam.delete()
+        self.assertEqual(self.found('física'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.found('"*'), [])
+        self.assertEqual(self.found('coro OR NOT "x'), [])
+
+    def test_other_engines_fall_back_to_substrings(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            results = search_posts(Post.objects.all(), 'cálculo')
+
+            self.assertEqual([(post.pk, post.rank) for post in results], [(self.exam.pk, 0.0)])
+
+
+# ============================================================================
+# CONTADORES
+# ============================================================================
+
+class CounterFlushTests(TestCase):
+
+    def setUp(self):
+        self.post = make_post(make_user('autor'))
+        self.buffer = counters.MemoryBuffer()
+        patcher = mock.patch.object(counters, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_memory_buffer_flushes_on_its_own(self):
+        with mock.patch.object(counters, 'flush') as flush, \
+                mock.patch.object(counters.time, 'sleep', side_effect=[None, SystemExit]):
+            self.buffer.add('post.likes', {self.post.pk: 1})
+            self.buffer._flusher.join(1)
+
+        # Sin otro incremento: el hilo del buffer aplica lo pendiente
+        flush.assert_called_once_with()
+
+
+# ============================================================================
+# TENDENCIAS
+# ============================================================================
+
+class TrendingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # A media hora de la cubeta actual: su antigüedad cuenta como 0
+        self.now = get_bucket_start() + timedelta(minutes=30)
+        self.spike = Hashtag.objects.create(name='pico')
+        self.steady = Hashtag.objects.create(name='constante')
+
+    def uses(self, hashtag, hours_ago, count):
+        HashtagUsageBucket.objects.create(
+            hashtag=hashtag,
+            bucket_start=get_bucket_start(self.now) - timedelta(hours=hours_ago),
+            count=count
+        )
+
+    def test_score_halves_every_half_life(self):
+        self.uses(self.steady, 6, 4)
+
+        [row] = compute_trending('24h', now=self.now)
+
+        self.assertEqual((row['name'], row['uses'], row['score']), ('constante', 4, 2.0))
+
+    def test_recent_spike_beats_older_volume(self):
+        self.uses(self.steady, 20, 10)
+        self.uses(self.spike, 0, 3)
+
+        names = [row['name'] for row in compute_trending('24h', now=self.now)]
+
+        self.assertEqual(names, ['pico', 'constante'])
+
+    def test_windows_ignore_older_buckets(self):
+        self.uses(self.steady, 30, 5)
+
+        self.assertEqual(compute_trending('24h', now=self.now), [])
+        self.assertEqual(
+            [row['name'] for row in compute_trending('7d', now=self.now)], ['constante']
+        )
+
+    def test_usage_accumulates_in_the_hourly_bucket(self):
+        record_hashtag_usage([self.spike.pk, self.steady.pk], when=self.now)
+        record_hashtag_usage([self.spike.pk], when=self.now)
+
+        self.assertEqual(
+            dict(HashtagUsageBucket.objects.values_list('hashtag__name', 'count')),
+            {'pico': 2, 'constante': 1}
+        )
+
+    def test_purge_keeps_the_longest_window(self):
+        self.now = get_bucket_start()
+        self.uses(self.steady, 24 * 7 + 1, 1)
+        self.uses(self.spike, 24 * 7, 1)
+
+        self.assertEqual(purge_usage_buckets(), 1)
+        self.assertEqual(
+            list(HashtagUsageBucket.objects.values_list('hashtag', flat=True)), [self.spike.pk]
+        )
+
+    def test_view_reads_the_cached_list(self):
+        self.uses(self.spike, 0, 1)
+        first = get_trending_hashtags('desconocida')
+
+        self.uses(self.steady, 0, 5)
+
+        self.assertEqual([row['name'] for row in first], ['pico'])
+        self.assertEqual(get_trending_hashtags('24h'), first)
+
+
+# ============================================================================
+# AUTOCOMPLETADO
+# ============================================================================
+
+class FakeIndex(autocomplete.PrefixIndex):
+    """
+    Índice sobre una lista en memoria; cuenta las cargas completas
+    """
+
+    name = 'pruebas'
+
+    def __init__(self, rows, delay=0):
+        super().__init__()
+        self.rows = rows
+        self.delay = delay
+        self.full_loads = 0
+
+    def load(self, after_id=0):
+        if not after_id:
+            self.full_loads += 1
+            time.sleep(self.delay)
+        return [row for row in self.rows if row[0] > after_id]
+
+
+def index_row(item_id, key):
+    return (item_id, [key], {'keys': [key]})
+
+
+class PrefixIndexBuildTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_full_build_is_sorted(self):
+        index = FakeIndex([index_row(3, 'beta'), index_row(1, 'gamma'), index_row(2, 'alfa')])
+        index._refresh()
+
+        self.assertEqual(index._keys, sorted(index._keys))
+        self.assertEqual(index.matches('a'), [2])
+
+        # Filas nuevas de otro proceso: se mezclan en orden
+        index.rows.append(index_row(4, 'alba'))
+        index.notify_changed()
+        index._refresh()
+        self.assertEqual(index.matches('al'), [4, 2])
+        self.assertEqual(index._keys, sorted(index._keys))
+
+    def test_first_use_loads_once_under_concurrency(self):
+        index = FakeIndex([index_row(1, 'alfa')], delay=0.1)
+        threads = [threading.Thread(target=index._refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(index.full_loads, 1)
+        self.assertEqual(index.matches('a'), [1])
+
+    def test_expired_index_rebuilds_off_the_request(self):
+        index = FakeIndex([index_row(1, 'alfa')])
+        index._refresh()
+        index._built_at -= 2 * 3600
+
+        with mock.patch.object(autocomplete.threading, 'Thread') as thread:
+            index._refresh()
+            index._refresh()
+
+        # Un solo hilo de reconstrucción; la consulta usa el índice anterior
+        thread.assert_called_once()
+        self.assertEqual(index.full_loads, 1)
+        self.assertEqual(index.matches('a'), [1])
+
+
+class AutocompleteViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('autor')
+        self.client.force_login(self.author)
+        # Índices propios: los globales conservarían filas de otros tests
+        for name, index in (('user_index', autocomplete.UserIndex()),
+                            ('hashtag_index', autocomplete.HashtagIndex())):
+            patcher = mock.patch(f'apps.posts.views.{name}', index)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def suggest(self, url_name, prefix):
+        response = self.client.get(reverse(url_name), {'q': prefix})
+        return response.json()['results']
+
+    def test_mentions_list_friends_first(self):
+        for username in ('mario', 'marta', 'maria'):
+            make_user(username)
+        friend = make_user('martin')
+        Friendship.objects.create(user1=self.author, user2=friend)
+        namesake = make_user('zoe')
+        namesake.first_name = 'Mariángela'
+        namesake.save()
+
+        results = self.suggest('posts:mention_autocomplete', '@mar')
+
+        # El amigo primero; el resto por clave, incluido el nombre sin tilde
+        self.assertEqual(
+            [(row['username'], row['friend']) for row in results],
+            [('martin', True), ('maria', False), ('zoe', False), ('mario', False),
+             ('marta', False)]
+        )
+
+    def test_mentions_skip_the_author(self):
+        self.assertEqual(self.suggest('posts:mention_autocomplete', 'aut'), [])
+
+    def test_hashtags_by_popularity(self):
+        for name, posts_count in (('futbol', 3), ('fisica', 10), ('fiesta', 1), ('quimica', 20)):
+            Hashtag.objects.create(name=name, posts_count=posts_count)
+
+        results = self.suggest('posts:hashtag_autocomplete', '#f')
+
+        self.assertEqual(
+            [(row['name'], row['count']) for row in results],
+            [('fisica', 10), ('futbol', 3), ('fiesta', 1)]
+        )
+
+
+# ============================================================================
+# ARCHIVO FRÍO
+# ============================================================================
+
+class ColdPostsTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user('autor')
+
+    def test_old_posts_are_cold(self):
+        old = make_post(self.author, days_ago=400)
+        make_post(self.author)
+
+        self.assertEqual(list(archive.get_cold_posts(365)), [old])
+
+    def test_pinned_posts_stay_hot(self):
+        make_post(self.author, days_ago=400, is_pinned=True)
+
+        self.assertFalse(archive.get_cold_posts(365).exists())
+
+    def test_shared_post_waits_for_its_shares(self):
+        original = make_post(self.author, days_ago=400)
+        share = make_post(self.author, days_ago=390, shared_post=original)
+
+        # El compartido va primero; el original queda caliente mientras
+        # algún post caliente lo referencie
+        self.assertEqual(list(archive.get_cold_posts(365)), [share])
+
+        share.delete()
+        self.assertEqual(list(archive.get_cold_posts(365)), [original])
+
+
+# ============================================================================
+# LIMPIEZA
+# ============================================================================
+
+class ArchivedPostsCleanupTests(TestCase):
+
+    def setUp(self):
+        self.author = make_user('autor')
+        self.client.force_login(self.author)
+        self.checkpoint = Checkpoint(os.path.join(tempfile.mkdtemp(), 'checkpoint.json'))
+
+    def run_cleanup(self):
+        return run_phase(ArchivedPostsPhase(), self.checkpoint, 100, RateLimiter(0))
+
+    def test_old_post_archived_now_survives(self):
+        post = make_post(self.author, days_ago=400)
+        Post.objects.filter(pk=post.pk).update(updated_at=post.created_at)
+
+        self.client.post(reverse('posts:post_archive', args=[post.pk]))
+        post.refresh_from_db()
+        self.assertTrue(post.is_archived)
+        self.assertLess(post.updated_at, timezone.now() - timedelta(days=365))
+
+        self.run_cleanup()
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+    def test_post_archived_past_retention_is_removed(self):
+        expired = make_post(self.author, days_ago=400)
+        Post.objects.filter(pk=expired.pk).update(
+            is_archived=True, archived_at=timezone.now() - timedelta(days=200)
+        )
+        recent = make_post(self.author, days_ago=400)
+        Post.objects.filter(pk=recent.pk).update(
+            is_archived=True, archived_at=timezone.now() - timedelta(days=10)
+        )
+
+        _, rows, _ = self.run_cleanup()
+
+        self.assertEqual(rows, 1)
+        self.assertFalse(Post.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=recent.pk).exists())
+
+    def test_unarchive_clears_archived_at(self):
+        post = make_post(self.author)
+        url = reverse('posts:post_archive', args=[post.pk])
+
+        self.client.post(url)
+        post.refresh_from_db()
+        self.assertIsNotNone(post.archived_at)
+
+        self.client.post(url)
+        post.refresh_from_db()
+        self.assertFalse(post.is_archived)
+        self.assertIsNone(post.archived_at)
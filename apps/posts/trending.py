@@ -0,0 +1,185 @@
+"""
+Hashtags en tendencia por ventana deslizante
+
+Cada uso de un hashtag suma 1 a su cubeta horaria (HashtagUsageBucket).
+Una tarea periódica agrega las cubetas de cada ventana (24 h y 7 días) con
+decaimiento exponencial, guarda el top-N en cache y elimina las cubetas
+fuera de la retención. La vista solo lee la cache.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Hashtag, HashtagUsageBucket
+
+
+TRENDING_KEY = 'trending_hashtags_{}'
+
+# ventana: (horas, vida media en horas)
+TRENDING_WINDOWS = {
+    '24h': (24, 6),
+    '7d': (24 * 7, 48),
+}
+DEFAULT_WINDOW = '24h'
+
+TRENDING_LIMIT = 20
+
+
+def get_trending_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+def get_trending_cache_timeout():
+    # Holgura sobre el periodo de la tarea: si el worker se retrasa,
+    # la vista sigue sirviendo la última lista
+    return get_trending_config('TRENDING_CACHE_TIMEOUT', 60 * 30)
+
+
+def get_bucket_start(when=None):
+    """
+    Inicio de la cubeta horaria que contiene `when`
+    """
+    when = when or timezone.now()
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+# ============================================================================
+# REGISTRO DE USOS
+# ============================================================================
+
+def record_hashtag_usage(hashtag_ids, when=None):
+    """
+    Suma un uso a la cubeta actual de cada hashtag
+    Dos consultas por lote: crear las cubetas que falten e incrementarlas
+    """
+    hashtag_ids = list(hashtag_ids)
+    if not hashtag_ids:
+        return
+
+    bucket_start = get_bucket_start(when)
+
+    HashtagUsageBucket.objects.bulk_create(
+        [
+            HashtagUsageBucket(hashtag_id=hashtag_id, bucket_start=bucket_start)
+            for hashtag_id in hashtag_ids
+        ],
+        ignore_conflicts=True
+    )
+    HashtagUsageBucket.objects.filter(
+        hashtag_id__in=hashtag_ids,
+        bucket_start=bucket_start
+    ).update(count=F('count') + 1)
+
+
+def purge_usage_buckets():
+    """
+    Elimina las cubetas más antiguas que la ventana más larga
+
+    Returns:
+        int: Cubetas eliminadas
+    """
+    retention_hours = max(hours for hours, _ in TRENDING_WINDOWS.values())
+    cutoff = get_bucket_start() - timedelta(hours=retention_hours)
+
+    deleted, _ = HashtagUsageBucket.objects.filter(bucket_start__lt=cutoff).delete()
+    return deleted
+
+
+# ============================================================================
+# CÁLCULO DE TENDENCIAS
+# ============================================================================
+
+def compute_trending(window=DEFAULT_WINDOW, limit=TRENDING_LIMIT, now=None):
+    """
+    Calcula el top-N de una ventana
+
+    La puntuación de un hashtag es la suma de sus cubetas ponderadas por
+    0.5 ** (antigüedad / vida media); un pico de hace una hora pesa más que
+    el mismo número de usos al inicio de la ventana
+
+    Returns:
+        list[dict]: name, posts_count, last_used, uses y score de cada hashtag
+    """
+    hours, half_life = TRENDING_WINDOWS[window]
+    now = now or timezone.now()
+    since = get_bucket_start(now) - timedelta(hours=hours - 1)
+
+    rows = list(
+        HashtagUsageBucket.objects.filter(
+            bucket_start__gte=since
+        ).values_list('hashtag_id', 'bucket_start', 'count')
+    )
+    if not rows:
+        return []
+
+    hashtag_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    counts = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    # Antigüedad medida desde la mitad de cada cubeta
+    age_hours = np.fromiter(
+        ((now - row[1]).total_seconds() / 3600 - 0.5 for row in rows),
+        dtype=np.float64,
+        count=len(rows)
+    )
+    weighted = counts * np.power(0.5, np.maximum(age_hours, 0) / half_life)
+
+    unique_ids, inverse = np.unique(hashtag_ids, return_inverse=True)
+    scores = np.bincount(inverse, weights=weighted)
+    uses = np.bincount(inverse, weights=counts)
+
+    top = np.argsort(-scores, kind='stable')[:limit]
+    top_ids = unique_ids[top].tolist()
+
+    hashtags = Hashtag.objects.in_bulk(top_ids)
+    trending = []
+    for index, hashtag_id in zip(top, top_ids):
+        hashtag = hashtags.get(hashtag_id)
+        if hashtag is None:
+            continue
+        trending.append({
+            'name': hashtag.name,
+            'posts_count': hashtag.posts_count,
+            'last_used': hashtag.last_used,
+            'uses': int(uses[index]),
+            'score': round(float(scores[index]), 3),
+        })
+    return trending
+
+
+def refresh_trending(limit=TRENDING_LIMIT):
+    """
+    Recalcula y cachea todas las ventanas
+    Llamada por compute_trending_hashtags_task
+
+    Returns:
+        dict: {ventana: número de hashtags}
+    """
+    timeout = get_trending_cache_timeout()
+    now = timezone.now()
+    sizes = {}
+
+    for window in TRENDING_WINDOWS:
+        trending = compute_trending(window, limit, now=now)
+        cache.set(TRENDING_KEY.format(window), trending, timeout)
+        sizes[window] = len(trending)
+
+    return sizes
+
+
+def get_trending_hashtags(window=DEFAULT_WINDOW):
+    """
+    Lista en tendencia de una ventana (una lectura de cache)
+    Si la cache está vacía (tarea aún no ejecutada) se calcula y se guarda
+    """
+    if window not in TRENDING_WINDOWS:
+        window = DEFAULT_WINDOW
+
+    key = TRENDING_KEY.format(window)
+    trending = cache.get(key)
+    if trending is None:
+        trending = compute_trending(window)
+        cache.set(key, trending, get_trending_cache_timeout())
+    return trending
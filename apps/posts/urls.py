@@ -30,9 +30,11 @@ urlpatterns = [
     # Hashtags
     path('hashtag/<str:hashtag_name>/', views.hashtag_posts, name='hashtag_posts'),
     path('hashtags/trending/', views.trending_hashtags, name='trending_hashtags'),
+    path('hashtags/autocomplete/', views.hashtag_autocomplete, name='hashtag_autocomplete'),
     
     # Menciones
     path('mentions/', views.my_mentions, name='my_mentions'),
+    path('mentions/autocomplete/', views.mention_autocomplete, name='mention_autocomplete'),
     
     # Media
     path('<int:pk>/add-images/', views.post_add_images, name='post_add_images'),
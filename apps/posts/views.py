@@ -5,15 +5,23 @@ CRUD completo de publicaciones con imágenes, videos y funcionalidades sociales
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Prefetch
-from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponseForbidden
+from django.db.models import F, Q, Prefetch
+from django.http import Http404, JsonResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
 from apps.authentication.models import User
+from utils import counters
+from utils.pagination import (
+    DEFAULT_POST_ORDERING, CursorPage, decode_cursor, encode_cursor, paginate_cursor
+)
+from .autocomplete import hashtag_index, user_index
+from .cards import prepare_post_cards
+from .search import search_posts
+from .trending import DEFAULT_WINDOW, TRENDING_WINDOWS, get_trending_hashtags
 from .models import (
-    Post, PostImage, PostVideo, PostMention,
+    Post, PostImage, PostVideo,
     Hashtag, PostHashtag, PostReport
 )
 from .forms import (
@@ -31,13 +39,33 @@ from .forms import (
 def post_list(request):
     """
     Lista de publicaciones (feed personal)
-    Muestra posts del usuario y sus amigos
+    Muestra posts del usuario, de sus amigos y los públicos del campus
+    Sin filtros de búsqueda lee el timeline híbrido; con filtros consulta Post
     """
+    search_form = PostSearchForm(request.GET)
+    has_filters = any(request.GET.get(field) for field in search_form.fields)
+
+    if not has_filters:
+        from apps.feed.timeline import get_timeline_page
+
+        before = decode_cursor(request.GET.get('after'), 2)
+        rows, posts, has_more = get_timeline_page(
+            request.user, 10, before=before, include_public=True
+        )
+        next_cursor = encode_cursor(rows[-1]) if has_more and rows else None
+
+        context = {
+            'posts': CursorPage(
+                prepare_post_cards(posts, request.user), next_cursor=next_cursor, params=request.GET
+            ),
+            'search_form': search_form,
+        }
+        return render(request, 'posts/post_list.html', context)
+
     # Obtener posts del usuario y sus amigos
-    from apps.friends.models import get_friends
+    from apps.friends.models import get_friend_ids
     
-    friends = get_friends(request.user)
-    friend_ids = [friend.id for friend in friends]
+    friend_ids = get_friend_ids(request.user)
     
     # Posts del usuario + posts de amigos + posts públicos
     posts = Post.objects.filter(
@@ -50,10 +78,11 @@ def post_list(request):
         'images', 'videos', 'mentions', 'post_hashtags__hashtag'
     ).exclude(
         is_archived=True
-    ).distinct().order_by('-is_pinned', '-created_at')
+    ).distinct()
     
-    # Búsqueda
-    search_form = PostSearchForm(request.GET)
+    ordering = DEFAULT_POST_ORDERING
+    
+    # Búsqueda (ordenada por relevancia si hay texto)
     if search_form.is_valid():
         query = search_form.cleaned_data.get('query')
         privacy = search_form.cleaned_data.get('privacy')
@@ -62,12 +91,8 @@ def post_list(request):
         date_to = search_form.cleaned_data.get('date_to')
         
         if query:
-            posts = posts.filter(
-                Q(content__icontains=query) |
-                Q(author__username__icontains=query) |
-                Q(author__first_name__icontains=query) |
-                Q(author__last_name__icontains=query)
-            )
+            posts = search_posts(posts, query)
+            ordering = ('-rank', '-id')
         
         if privacy:
             posts = posts.filter(privacy=privacy)
@@ -85,10 +110,9 @@ def post_list(request):
         if date_to:
             posts = posts.filter(created_at__date__lte=date_to)
     
-    # Paginación
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor
+    page_obj = paginate_cursor(request, posts, 10, ordering=ordering)
+    page_obj.object_list = prepare_post_cards(page_obj.object_list, request.user)
     
     context = {
         'posts': page_obj,
@@ -101,21 +125,28 @@ def post_list(request):
 def post_detail(request, pk):
     """
     Detalle de una publicación
+    Los posts movidos al archivo frío se muestran desde sus tablas de archivo
     """
-    post = get_object_or_404(
-        Post.objects.select_related(
-            'author', 'author__profile', 'shared_post', 'shared_post__author'
-        ).prefetch_related(
-            'images', 'videos', 'mentions__user', 'post_hashtags__hashtag'
-        ),
-        pk=pk
-    )
+    post = Post.objects.select_related(
+        'author', 'author__profile', 'shared_post', 'shared_post__author'
+    ).prefetch_related(
+        'images', 'videos', 'mentions__user', 'post_hashtags__hashtag'
+    ).filter(pk=pk).first()
+
+    if post is None:
+        from .archive import get_archived_post
+
+        post = get_archived_post(pk)
+        if post is None:
+            raise Http404
     
     # Verificar permisos de visualización
     if not post.can_view(request.user):
         messages.error(request, _('No tienes permiso para ver esta publicación.'))
         return redirect('posts:post_list')
     
+    prepare_post_cards([post], request.user)
+    
     context = {
         'post': post,
     }
@@ -155,12 +186,11 @@ def user_posts(request, username):
         'images', 'videos'
     ).exclude(
         is_archived=True
-    ).order_by('-is_pinned', '-created_at')
+    )
     
-    # Paginación
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor
+    page_obj = paginate_cursor(request, posts, 10)
+    page_obj.object_list = prepare_post_cards(page_obj.object_list, request.user)
     
     context = {
         'profile_user': user,
@@ -312,9 +342,8 @@ def post_share(request, pk):
                 shared_post=original_post
             )
             
-            # Incrementar contador
-            original_post.shares_count += 1
-            original_post.save(update_fields=['shares_count'])
+            # Incrementar contador (sin leer-modificar-escribir)
+            counters.increment('post.shares', original_post.pk)
             
             messages.success(request, _('Publicación compartida exitosamente.'))
             return redirect('posts:post_detail', pk=shared_post.pk)
@@ -367,7 +396,8 @@ def post_archive(request, pk):
         return JsonResponse({'error': 'No autorizado'}, status=403)
     
     post.is_archived = not post.is_archived
-    post.save(update_fields=['is_archived'])
+    post.archived_at = timezone.now() if post.is_archived else None
+    post.save(update_fields=['is_archived', 'archived_at'])
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -454,12 +484,11 @@ def hashtag_posts(request, hashtag_name):
         'images', 'videos'
     ).exclude(
         is_archived=True
-    ).distinct().order_by('-created_at')
+    ).distinct()
     
-    # Paginación
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor (orden cronológico, sin fijados)
+    page_obj = paginate_cursor(request, posts, 10, ordering=('-created_at', '-id'))
+    page_obj.object_list = prepare_post_cards(page_obj.object_list, request.user)
     
     context = {
         'hashtag': hashtag,
@@ -471,18 +500,31 @@ def hashtag_posts(request, hashtag_name):
 @login_required
 def trending_hashtags(request):
     """
-    Lista de hashtags en tendencia
+    Lista de hashtags en tendencia (últimas 24 h o 7 días)
+    Se sirve desde la cache que llena compute_trending_hashtags_task
     """
-    hashtags = Hashtag.objects.filter(
-        posts_count__gt=0
-    ).order_by('-posts_count', '-last_used')[:20]
+    window = request.GET.get('window', DEFAULT_WINDOW)
+    if window not in TRENDING_WINDOWS:
+        window = DEFAULT_WINDOW
     
     context = {
-        'hashtags': hashtags,
+        'hashtags': get_trending_hashtags(window),
+        'window': window,
     }
     return render(request, 'posts/trending_hashtags.html', context)
 
 
+@login_required
+@require_GET
+def hashtag_autocomplete(request):
+    """
+    Sugerencias al escribir #prefijo en el editor (JSON)
+    Se resuelven en el índice en memoria, sin consultas
+    """
+    prefix = request.GET.get('q', '').lstrip('#')
+    return JsonResponse({'results': hashtag_index.suggest(prefix)})
+
+
 # ============================================================================
 # VISTAS DE MENCIONES
 # ============================================================================
@@ -491,25 +533,26 @@ def trending_hashtags(request):
 def my_mentions(request):
     """
     Posts donde el usuario ha sido mencionado
-    """
-    mentions = PostMention.objects.filter(
-        user=request.user
+    La visibilidad se filtra en SQL y se pagina por el índice
+    (user, -created_at) de PostMention: el costo no depende del total
+    de menciones
+    """
+    posts = Post.objects.visible_to(request.user).filter(
+        mentions__user=request.user
+    ).annotate(
+        mentioned_at=F('mentions__created_at'),
+        mention_id=F('mentions__id')
     ).select_related(
-        'post', 'post__author', 'post__author__profile'
+        'author', 'author__profile'
     ).prefetch_related(
-        'post__images', 'post__videos'
-    ).order_by('-created_at')
-    
-    # Filtrar posts que el usuario puede ver
-    posts = []
-    for mention in mentions:
-        if mention.post.can_view(request.user):
-            posts.append(mention.post)
+        'images', 'videos'
+    )
     
-    # Paginación
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor (orden de mención, sin fijados)
+    page_obj = paginate_cursor(
+        request, posts, 10, ordering=('-mentioned_at', '-mention_id')
+    )
+    page_obj.object_list = prepare_post_cards(page_obj.object_list, request.user)
     
     context = {
         'posts': page_obj,
@@ -517,6 +560,24 @@ def my_mentions(request):
     return render(request, 'posts/my_mentions.html', context)
 
 
+@login_required
+@require_GET
+def mention_autocomplete(request):
+    """
+    Sugerencias al escribir @prefijo en el editor (JSON)
+    Primero los amigos del autor; el resto por orden alfabético
+    """
+    from apps.friends.models import get_friend_ids
+    
+    prefix = request.GET.get('q', '').lstrip('@')
+    results = user_index.suggest(
+        prefix,
+        friend_ids=get_friend_ids(request.user),
+        exclude=[request.user.pk]
+    )
+    return JsonResponse({'results': results})
+
+
 # ============================================================================
 # VISTAS DE MEDIA
 # ============================================================================
@@ -0,0 +1,116 @@
+# Generated by Django 5.0.1 on 2026-10-16 23:50
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# La normalización y los trigramas se copian aquí (en vez de importar
+# apps.profiles.search) para que la migración no cambie si ese módulo cambia
+
+TRIGRAM_INDEX = "profiles_userprofile_search_text_trgm"
+
+
+def build_search_text(user):
+    value = " ".join(
+        getattr(user, field) or "" for field in ("username", "first_name", "last_name")
+    )
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[a-z0-9]+", stripped.lower()))
+
+
+def make_trigrams(text):
+    trigrams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def backfill_search_index(apps, schema_editor):
+    UserProfile = apps.get_model("profiles", "UserProfile")
+    UserSearchToken = apps.get_model("profiles", "UserSearchToken")
+    db = schema_editor.connection.alias
+    use_tokens = schema_editor.connection.vendor != "postgresql"
+
+    profiles = list(UserProfile.objects.using(db).select_related("user"))
+    tokens = []
+    for profile in profiles:
+        profile.search_text = build_search_text(profile.user)
+        if use_tokens:
+            tokens.extend(
+                UserSearchToken(user_id=profile.user_id, token=token)
+                for token in make_trigrams(profile.search_text)
+            )
+
+    UserProfile.objects.using(db).bulk_update(profiles, ["search_text"], batch_size=500)
+    UserSearchToken.objects.using(db).bulk_create(tokens, batch_size=1000)
+
+
+def install_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON profiles_userprofile "
+            "USING GIN (search_text gin_trgm_ops);"
+        )
+
+
+def uninstall_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX};")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="userprofile",
+            name="search_text",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=200,
+                verbose_name="texto de búsqueda",
+            ),
+        ),
+        migrations.CreateModel(
+            name="UserSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=3, verbose_name="trigrama")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="usuario",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "token de búsqueda",
+                "verbose_name_plural": "tokens de búsqueda",
+                "unique_together": {("token", "user")},
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+        migrations.RunPython(install_trigram_index, uninstall_trigram_index),
+    ]
@@ -8,8 +8,10 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from utils.mixins import DirtyFieldsMixin
 
-class UserProfile(models.Model):
+
+class UserProfile(DirtyFieldsMixin, models.Model):
     """
     Perfil extendido del usuario
     Información adicional que no está en el modelo User
@@ -110,10 +112,20 @@ class UserProfile(models.Model):
         help_text=_('Mostrar teléfono en el perfil público')
     )
     
+    # Búsqueda de personas: usuario y nombre normalizados (apps/profiles/search.py)
+    search_text = models.CharField(
+        _('texto de búsqueda'),
+        max_length=200,
+        blank=True,
+        editable=False
+    )
+    
     # Fechas
     created_at = models.DateTimeField(_('creado'), auto_now_add=True)
     updated_at = models.DateTimeField(_('actualizado'), auto_now=True)
     
+    TRACKED_FIELDS = {'search_text'}
+    
     class Meta:
         verbose_name = _('perfil de usuario')
         verbose_name_plural = _('perfiles de usuario')
@@ -122,6 +134,13 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Perfil de {self.user.username}"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'search_text' in update_fields:
+            from .search import build_search_text
+            self.search_text = build_search_text(self.user)
+        super().save(*args, **kwargs)
+    
     @property
     def age(self):
         """Calcula la edad del usuario"""
@@ -499,4 +518,29 @@ class ProfileView(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.viewer.username} vio a {self.viewed_profile.username}"
\ No newline at end of file
+        return f"{self.viewer.username} vio a {self.viewed_profile.username}"
+
+
+class UserSearchToken(models.Model):
+    """
+    Trigramas del nombre de cada usuario
+    Índice de búsqueda de personas cuando la base de datos no es PostgreSQL
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name=_('usuario')
+    )
+    
+    token = models.CharField(_('trigrama'), max_length=3)
+    
+    class Meta:
+        verbose_name = _('token de búsqueda')
+        verbose_name_plural = _('tokens de búsqueda')
+        # (token, user): la búsqueda filtra por token
+        unique_together = ['token', 'user']
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.token!r}"
@@ -0,0 +1,177 @@
+"""
+Búsqueda de personas (search_users, find_friends)
+
+Cada perfil guarda search_text: usuario, nombre y apellido en minúsculas y
+sin tildes ('José Núñez' -> 'jose nunez'), de modo que la búsqueda no
+distingue acentos en ningún motor.
+
+- PostgreSQL: índice GIN con gin_trgm_ops (pg_trgm) sobre search_text,
+  creado en la migración profiles.0002; se filtra con el operador de similitud por palabra, que usa el índice
+- Otros motores: tabla UserSearchToken con los trigramas de cada usuario
+  (mismo esquema de relleno que pg_trgm); la similitud es la fracción de
+  trigramas de la consulta presentes
+
+El puntaje final suma la similitud y dos bonificaciones: misma carrera y
+amigos en común con quien busca
+"""
+import re
+import unicodedata
+
+from django.db import connection, connections
+from django.db.models import (
+    Case, Count, Exists, F, FloatField, OuterRef, Q, Subquery, Value, When
+)
+from django.db.models.functions import Cast
+
+
+SEARCH_LIMIT = 20
+
+# Similitud mínima en el índice de tokens (en PostgreSQL rige
+# pg_trgm.word_similarity_threshold, 0.6 por defecto)
+MIN_SIMILARITY = 0.5
+
+CAREER_BOOST = 0.2
+MUTUAL_FRIEND_BOOST = 0.3
+
+SEARCH_TEXT_FIELDS = ('username', 'first_name', 'last_name')
+
+# ============================================================================
+# NORMALIZACIÓN Y TRIGRAMAS
+# ============================================================================
+
+def normalize_search_text(value):
+    """
+    Minúsculas, sin tildes ni signos; palabras separadas por un espacio
+    """
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'[a-z0-9]+', stripped.lower()))
+
+
+def build_search_text(user):
+    return normalize_search_text(
+        ' '.join(getattr(user, field) or '' for field in SEARCH_TEXT_FIELDS)
+    )
+
+
+def make_trigrams(text):
+    """
+    Trigramas de un texto normalizado, con el relleno de pg_trgm
+    (dos espacios al inicio y uno al final de cada palabra)
+    """
+    trigrams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def uses_trigram_index(using=None):
+    db = connections[using] if using else connection
+    return db.vendor == 'postgresql'
+
+
+def sync_search_tokens(profile):
+    """
+    Reemplaza los trigramas del usuario en UserSearchToken
+    En PostgreSQL no hace nada: el índice GIN se mantiene solo
+    """
+    from .models import UserSearchToken
+
+    if uses_trigram_index(profile._state.db):
+        return
+
+    UserSearchToken.objects.filter(user_id=profile.user_id).delete()
+    UserSearchToken.objects.bulk_create([
+        UserSearchToken(user_id=profile.user_id, token=token)
+        for token in make_trigrams(profile.search_text)
+    ])
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+def _similarity_filter(queryset, text):
+    """
+    Filtra por similitud de trigramas y anota 'similarity' (0 a 1)
+    """
+    if uses_trigram_index(queryset.db):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        return queryset.filter(
+            profile__search_text__trigram_word_similar=text
+        ).annotate(
+            similarity=TrigramWordSimilarity(text, 'profile__search_text')
+        )
+
+    from .models import UserSearchToken
+
+    trigrams = make_trigrams(text)
+    hits = UserSearchToken.objects.filter(
+        user=OuterRef('pk'), token__in=trigrams
+    ).values('user').annotate(total=Count('pk')).values('total')
+
+    return queryset.filter(
+        pk__in=UserSearchToken.objects.filter(token__in=trigrams).values('user_id')
+    ).annotate(
+        similarity=Cast(Subquery(hits), FloatField()) / len(trigrams)
+    ).filter(similarity__gte=MIN_SIMILARITY)
+
+
+def search_people(viewer, query, queryset=None):
+    """
+    Busca usuarios por nombre o usuario, ordenados por relevancia
+
+    Args:
+        viewer: Usuario que busca (para las bonificaciones)
+        query: Texto buscado; si contiene '@' se busca el email exacto
+        queryset: QuerySet de User ya filtrado (por defecto todos)
+
+    Returns:
+        QuerySet anotado con 'rank' y ordenado por ('-rank', '-id');
+        el llamador aplica el límite (SEARCH_LIMIT)
+    """
+    from apps.authentication.models import User
+    from apps.friends.models import Friendship, get_friend_ids
+
+    if queryset is None:
+        queryset = User.objects.all()
+
+    if '@' in query:
+        return queryset.filter(email__iexact=query.strip()).annotate(
+            rank=Value(1.0, output_field=FloatField())
+        ).order_by('-rank', '-id')
+
+    text = normalize_search_text(query)
+    if not text:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    queryset = _similarity_filter(queryset, text)
+
+    career_boost = Value(0.0, output_field=FloatField())
+    if viewer.career:
+        career_boost = Case(
+            When(career=viewer.career, then=Value(CAREER_BOOST)),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+
+    mutual_boost = Value(0.0, output_field=FloatField())
+    friend_ids = get_friend_ids(viewer)
+    if friend_ids:
+        mutual_boost = Case(
+            When(
+                Exists(Friendship.objects.filter(
+                    Q(user1=OuterRef('pk'), user2_id__in=friend_ids) |
+                    Q(user2=OuterRef('pk'), user1_id__in=friend_ids)
+                )),
+                then=Value(MUTUAL_FRIEND_BOOST)
+            ),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+
+    return queryset.annotate(
+        rank=F('similarity') + career_boost + mutual_boost
+    ).order_by('-rank', '-id')
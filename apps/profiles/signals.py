@@ -34,4 +34,13 @@ def create_privacy_settings(sender, instance, created, **kwargs):
     Crea configuración de privacidad cuando se crea un usuario
     """
     if created:
-        PrivacySettings.objects.create(user=instance)
\ No newline at end of file
+        PrivacySettings.objects.create(user=instance)
+
+@receiver(post_save, sender=UserProfile)
+def sync_profile_search_tokens(sender, instance, created, **kwargs):
+    """
+    Actualiza el índice de búsqueda de personas si cambió el nombre
+    """
+    if created or not instance.is_field_loaded('search_text') or instance.has_changed('search_text'):
+        from .search import sync_search_tokens
+        sync_search_tokens(instance)
@@ -0,0 +1,68 @@
+"""
+Tests del módulo de perfiles
+"""
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.friends.models import Friendship
+from utils.testing import make_user
+
+from .search import search_people
+
+
+def make_person(username, first_name, last_name, **fields):
+    user = make_user(username)
+    user.first_name = first_name
+    user.last_name = last_name
+    for name, value in fields.items():
+        setattr(user, name, value)
+    user.save()
+    return user
+
+
+# ============================================================================
+# BÚSQUEDA DE PERSONAS
+# ============================================================================
+
+class SearchPeopleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = make_person('lector', 'Lucía', 'Pérez', career='turismo')
+        self.jose = make_person('jose1', 'José', 'Núñez')
+
+    def found(self, query):
+        return [user.pk for user in search_people(self.viewer, query)]
+
+    def test_ignores_accents_and_case(self):
+        self.assertEqual(self.found('jose nunez'), [self.jose.pk])
+        self.assertEqual(self.found('NÚÑEZ'), [self.jose.pk])
+
+    def test_tolerates_typos_but_not_unrelated_names(self):
+        self.assertEqual(self.found('nunes'), [self.jose.pk])
+        self.assertEqual(self.found('martinez'), [])
+        self.assertEqual(self.found('¿?'), [])
+
+    def test_rename_updates_the_index(self):
+        self.jose.last_name = 'Quispe'
+        self.jose.save()
+
+        self.assertEqual(self.found('quispe'), [self.jose.pk])
+        self.assertEqual(self.found('nunez'), [])
+
+    def test_email_is_matched_exactly(self):
+        self.assertEqual(self.found('JOSE1@example.com'), [self.jose.pk])
+        self.assertEqual(self.found('nunez@example.com'), [])
+
+    def test_same_career_ranks_first(self):
+        classmate = make_person('jose2', 'José', 'Núñez', career='turismo')
+
+        self.assertEqual(self.found('jose nunez'), [classmate.pk, self.jose.pk])
+
+    def test_mutual_friends_rank_first(self):
+        friend = make_user('amigo')
+        Friendship.objects.create(user1=self.viewer, user2=friend)
+        Friendship.objects.create(user1=friend, user2=self.jose)
+        stranger = make_person('jose2', 'José', 'Núñez')
+
+        self.assertEqual(self.found('jose nunez'), [self.jose.pk, stranger.pk])
@@ -6,7 +6,6 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
@@ -307,12 +306,11 @@ def search_users(request):
     users = []
     
     if query:
-        users = User.objects.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query)
-        ).exclude(id=request.user.id)[:20]
+        from .search import SEARCH_LIMIT, search_people
+        
+        users = search_people(
+            request.user, query, User.objects.exclude(id=request.user.id)
+        ).select_related('profile')[:SEARCH_LIMIT]
     
     context = {
         'query': query,
@@ -3,6 +3,6 @@ Inicializacion del paquete uniconet
 """
 
 # Esto asegura que Celery se cargue cuando Django inicie
-# from .celery import app as celery_app
+from .celery import app as celery_app
 
-# __all__ = ('celery_app',)
\ No newline at end of file
+__all__ = ('celery_app',)
@@ -31,20 +31,8 @@ def debug_task(self):
     print(f'Request: {self.request!r}')
 
 
-# Configuraciones de Celery (agregar al settings.py si usas Celery):
-"""
-# En settings.py:
-
-# Celery Configuration
-CELERY_BROKER_URL = f"redis://{config('REDIS_HOST', default='localhost')}:{config('REDIS_PORT', default='6379')}/0"
-CELERY_RESULT_BACKEND = f"redis://{config('REDIS_HOST', default='localhost')}:{config('REDIS_PORT', default='6379')}/0"
-CELERY_ACCEPT_CONTENT = ['application/json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = TIME_ZONE
-CELERY_TASK_TRACK_STARTED = True
-CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
-"""
+# La configuracion (broker, tareas programadas) esta en la seccion
+# CELERY de settings.py
 
 # Para iniciar Celery worker:
 # celery -A uniconet worker -l info
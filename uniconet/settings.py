@@ -41,6 +41,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -70,6 +71,7 @@ LOCAL_APPS = [
     'apps.messaging',
     'apps.feed',
     'apps.events',
+    'apps.outbox',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -469,6 +471,46 @@ if DEBUG:
         pass
 
 
+# ==============================================================================
+# CELERY (Tareas asíncronas y programadas)
+# ==============================================================================
+
+CELERY_BROKER_URL = f"redis://{config('REDIS_HOST', default='localhost')}:{config('REDIS_PORT', default='6379')}/0"
+CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+CELERY_ACCEPT_CONTENT = ['application/json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
+# Publicar desde una petición web no debe bloquearla si Redis no responde
+# (p. ej. el precalentamiento del feed al iniciar sesión)
+CELERY_BROKER_TRANSPORT_OPTIONS = {'max_retries': 0}
+
+CELERY_BEAT_SCHEDULE = {
+    'feed-compute-scores': {
+        'task': 'apps.feed.tasks.compute_feed_scores_task',
+        'schedule': 60 * 5,  # cada 5 minutos
+    },
+    'outbox-sweep': {
+        'task': 'apps.outbox.tasks.sweep_outbox_task',
+        'schedule': 60,  # cada minuto
+    },
+    'posts-trending-hashtags': {
+        'task': 'apps.posts.tasks.compute_trending_hashtags_task',
+        'schedule': 60 * 5,  # cada 5 minutos
+    },
+    'counters-flush': {
+        'task': 'apps.posts.tasks.flush_counters_task',
+        'schedule': 5,  # cada 5 segundos
+    },
+    'reactions-flush': {
+        'task': 'apps.likes.tasks.flush_reaction_buffer_task',
+        'schedule': 5,  # cada 5 segundos (REACTION_BUFFER_FLUSH_SECONDS)
+    },
+}
+
+
 # ==============================================================================
 # DEFAULT PRIMARY KEY FIELD TYPE
 # ==============================================================================
@@ -493,6 +535,48 @@ UNICONET_CONFIG = {
     'ALLOWED_IMAGE_FORMATS': ['JPEG', 'PNG', 'GIF', 'WEBP'],
     'THUMBNAIL_SIZE': (300, 300),
     'PROFILE_IMAGE_SIZE': (500, 500),
+    # Timeline materializado del feed
+    'FEED_BACKFILL_POSTS': 50,      # Posts copiados al crear una amistad
+    'FEED_TIMELINE_LENGTH': 1000,   # Posts por timeline al reconstruir
+    # Feed híbrido: los autores con más amigos que el umbral no hacen fan-out
+    'FEED_FANOUT_THRESHOLD': 1000,
+    'FEED_PULL_CACHE_SIZE': 100,    # Posts recientes cacheados por fuente pull
+    # Outbox transaccional (ver apps/outbox/dispatch.py)
+    'OUTBOX_BATCH_SIZE': 100,
+    'OUTBOX_MAX_ATTEMPTS': 5,
+    'OUTBOX_RETENTION_DAYS': 7,     # Días que se conservan los eventos procesados
+    # Hashtags en tendencia (ver apps/posts/trending.py)
+    'TRENDING_CACHE_TIMEOUT': 60 * 30,
+    # Contadores agrupados (ver utils/counters.py): 'auto' usa Redis si la
+    # cache es django_redis y si no un buffer en memoria; 'db' escribe directo
+    'COUNTER_BACKEND': 'auto',
+    'COUNTER_FLUSH_SECONDS': 5,     # Intervalo de flush del buffer en memoria
+    # Reacciones en buffer para posts virales (ver apps/likes/buffer.py)
+    'REACTION_BUFFER_ENABLED': False,
+    'REACTION_BUFFER_HOT_RATE': 60,         # Reacciones por minuto para considerar viral un post
+    'REACTION_BUFFER_FLUSH_SECONDS': 5,
+    'REACTION_BUFFER_BATCH_SIZE': 100,      # Posts por flush
+    'LIKES_BATCH_MAX_OPERATIONS': 100,      # Operaciones por POST /likes/batch/
+    # Archivo frío (ver apps/posts/archive.py, comando partition_posts)
+    'POSTS_COLD_AFTER_DAYS': 365,   # Antigüedad a partir de la cual un post se archiva
+    # Limpieza (ver apps/posts/cleanup.py, comando cleanup_posts)
+    'ARCHIVED_POSTS_RETENTION_DAYS': 180,
+    'REPORTS_RETENTION_DAYS': 180,  # Reportes ya revisados
+    'HASHTAG_GRACE_DAYS': 30,       # Días sin uso antes de borrar un hashtag vacío
+    'ORPHAN_FILE_GRACE_HOURS': 24,
+    'CLEANUP_PEAK_HOURS': (8, 22),  # Horas locales [inicio, fin) de mayor tráfico
+    'CLEANUP_PEAK_ROWS_PER_SECOND': 200,
+    'CLEANUP_OFF_PEAK_ROWS_PER_SECOND': None,  # Sin límite fuera de horas pico
+    # Pesos del modo "destacados" (ver apps/feed/ranking.py)
+    'FEED_RANKING': {
+        'BASE': 1.0,
+        'LIKES': 1.0,
+        'COMMENTS': 2.0,
+        'SHARES': 3.0,
+        'AFFINITY': 1.5,
+        'HALF_LIFE_HOURS': 24,
+        'WINDOW_HOURS': 72,
+    },
 }
 
 # Configuraciones de notificaciones
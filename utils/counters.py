@@ -0,0 +1,359 @@
+"""
+Contadores desnormalizados con escrituras agrupadas
+
+Los incrementos no tocan la fila del contador: se acumulan en un buffer
+(un hash de Redis por contador, o un diccionario del proceso si la cache no
+es Redis) y flush() los aplica cada pocos segundos como UPDATE ... SET
+campo = campo + delta, un UPDATE por valor de delta. Mil likes a un post
+popular entre dos flush son una sola escritura en lugar de mil bloqueos
+sobre la misma fila.
+
+- Los incrementos se registran al confirmar la transacción (on_commit)
+- Si Redis falla, el incremento se aplica directamente con F()
+- reconcile() recalcula los valores exactos (comando reconcile_counters)
+
+Uso:
+    from utils import counters
+    counters.increment('post.likes', post.pk)
+    counters.increment_many('profile.friends', [user1_id, user2_id], -1)
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+Counter = namedtuple('Counter', ['model', 'field', 'key', 'touch', 'sources'])
+Counter.__doc__ = """
+Definición de un contador
+    model: 'app_label.Model' que guarda el contador
+    field: campo del contador
+    key: campo que identifica la fila ('pk' o 'user_id')
+    touch: campos de fecha que se actualizan a now() al aplicar deltas
+    sources: [(modelo, campo de agrupación, filtros)] cuya suma de filas es
+             el valor exacto (para reconcile)
+"""
+
+COUNTERS = {
+    'post.likes': Counter(
+        'posts.Post', 'likes_count', 'pk', (),
+        [('likes.Like', 'post_id', {})]
+    ),
+    'post.shares': Counter(
+        'posts.Post', 'shares_count', 'pk', (),
+        [('posts.Post', 'shared_post_id', {'shared_post__isnull': False})]
+    ),
+    'hashtag.posts': Counter(
+        'posts.Hashtag', 'posts_count', 'pk', ('last_used',),
+        [('posts.PostHashtag', 'hashtag_id', {})]
+    ),
+    'profile.friends': Counter(
+        'profiles.UserProfile', 'friends_count', 'user_id', (),
+        [('friends.Friendship', 'user1_id', {}), ('friends.Friendship', 'user2_id', {})]
+    ),
+}
+
+REDIS_KEY = 'uniconet:counters:{}'
+
+
+def get_counter_config(key, default=None):
+    return getattr(settings, 'UNICONET_CONFIG', {}).get(key, default)
+
+
+# ============================================================================
+# BUFFERS
+# ============================================================================
+
+class MemoryBuffer:
+    """
+    Buffer del proceso; lo vacía un hilo propio cada COUNTER_FLUSH_SECONDS
+    (flush_counters_task corre en el worker de Celery y no ve la memoria de
+    los procesos web) y atexit al terminar el proceso
+    Si el proceso muere sin salir (SIGKILL, OOM) se pierde a lo sumo un
+    intervalo de deltas hasta el próximo reconcile(); en producción, Redis
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = defaultdict(lambda: defaultdict(int))
+        self._flusher = None
+        self._flusher_pid = None
+
+    def add(self, name, deltas):
+        with self._lock:
+            for obj_id, delta in deltas.items():
+                self._deltas[name][obj_id] += delta
+        self._start_flusher()
+
+    def _start_flusher(self):
+        # Tras un fork (gunicorn --preload) el hilo del padre no existe en el hijo
+        if self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name='counters-flush', daemon=True
+            )
+            self._flusher_pid = os.getpid()
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(get_counter_config('COUNTER_FLUSH_SECONDS', 5))
+            with self._lock:
+                if not any(self._deltas.values()):
+                    continue
+            try:
+                flush()
+            except Exception:
+                logger.exception('counters: error en el flush periódico')
+            finally:
+                # Conexión propia del hilo
+                connections.close_all()
+
+    def pending(self, name, obj_id):
+        with self._lock:
+            return self._deltas.get(name, {}).get(obj_id, 0)
+
+    def drain(self, name):
+        with self._lock:
+            return dict(self._deltas.pop(name, {}))
+
+    def restore(self, name, deltas):
+        with self._lock:
+            for obj_id, delta in deltas.items():
+                self._deltas[name][obj_id] += delta
+
+
+class RedisBuffer:
+    """
+    Un hash por contador: HINCRBY al registrar, HGETALL + DEL atómico al vaciar
+    Compartido por todos los procesos; lo vacía flush_counters_task
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def add(self, name, deltas):
+        pipe = self.connection.pipeline(transaction=False)
+        for obj_id, delta in deltas.items():
+            pipe.hincrby(REDIS_KEY.format(name), obj_id, delta)
+        pipe.execute()
+
+    def pending(self, name, obj_id):
+        value = self.connection.hget(REDIS_KEY.format(name), obj_id)
+        return int(value) if value else 0
+
+    def drain(self, name):
+        pipe = self.connection.pipeline(transaction=True)
+        pipe.hgetall(REDIS_KEY.format(name))
+        pipe.delete(REDIS_KEY.format(name))
+        values, _ = pipe.execute()
+        return {int(obj_id): int(delta) for obj_id, delta in values.items()}
+
+    def restore(self, name, deltas):
+        self.add(name, deltas)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """
+    Redis si la cache por defecto es django_redis; si no, memoria del proceso
+    COUNTER_BACKEND = 'db' desactiva el buffer (escritura directa)
+    """
+    global _buffer
+
+    if get_counter_config('COUNTER_BACKEND', 'auto') == 'db':
+        return None
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                try:
+                    from django_redis import get_redis_connection
+                    _buffer = RedisBuffer(get_redis_connection('default'))
+                except (ImportError, NotImplementedError):
+                    _buffer = MemoryBuffer()
+                    atexit.register(flush)
+    return _buffer
+
+
+# ============================================================================
+# REGISTRO
+# ============================================================================
+
+def _applied(name, deltas):
+    """
+    Efectos de un cambio de contador fuera de su fila (al confirmar)
+    - profile.friends: autores que cruzan FEED_FANOUT_THRESHOLD
+    likes_count y shares_count se muestran fuera del fragmento cacheado de
+    la tarjeta: aplicarlos no la invalida
+
+    Args:
+        deltas: {obj_id: cambio aplicado}
+    """
+    if name == 'profile.friends':
+        from apps.feed.timeline import update_high_fanout_authors
+
+        update_high_fanout_authors(deltas)
+
+
+def _apply(name, deltas):
+    """
+    Aplica deltas en la base de datos: un UPDATE por valor de delta
+    Al confirmar ejecuta los efectos del cambio (_applied)
+    """
+    counter = COUNTERS[name]
+    model = apps.get_model(counter.model)
+    touch = {field: timezone.now() for field in counter.touch}
+
+    by_delta = defaultdict(list)
+    for obj_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(obj_id)
+
+    updated = 0
+    for delta, obj_ids in by_delta.items():
+        updated += model.objects.filter(**{f'{counter.key}__in': sorted(obj_ids)}).update(
+            **{counter.field: Greatest(F(counter.field) + delta, 0)},
+            **(touch if delta > 0 else {})
+        )
+
+    changed = {obj_id: delta for obj_id, delta in deltas.items() if delta}
+    if changed:
+        transaction.on_commit(lambda: _applied(name, changed))
+    return updated
+
+
+def _record(name, deltas):
+    buffer = get_buffer()
+    if buffer is not None:
+        try:
+            buffer.add(name, deltas)
+            return
+        except Exception as exc:
+            logger.warning('counters: buffer no disponible, escritura directa: %s', exc)
+    _apply(name, deltas)
+
+
+def increment_many(name, obj_ids, delta=1):
+    """
+    Suma `delta` al contador de cada objeto al confirmar la transacción
+    """
+    if name not in COUNTERS:
+        raise KeyError(f'Contador desconocido: {name}')
+
+    deltas = defaultdict(int)
+    for obj_id in obj_ids:
+        deltas[obj_id] += delta
+    if deltas:
+        transaction.on_commit(lambda: _record(name, dict(deltas)))
+
+
+def increment(name, obj_id, delta=1):
+    increment_many(name, [obj_id], delta)
+
+
+def get_value(name, obj_id, stored):
+    """
+    Valor guardado más lo pendiente en el buffer
+    """
+    buffer = get_buffer()
+    if buffer is None:
+        return stored
+    try:
+        return max(stored + buffer.pending(name, obj_id), 0)
+    except Exception:
+        return stored
+
+
+# ============================================================================
+# FLUSH Y RECONCILIACIÓN
+# ============================================================================
+
+def flush():
+    """
+    Aplica todos los deltas pendientes
+    Si falla la escritura, los deltas vuelven al buffer
+
+    Returns:
+        int: Filas actualizadas
+    """
+    buffer = get_buffer()
+    if buffer is None:
+        return 0
+
+    updated = 0
+    for name in COUNTERS:
+        deltas = buffer.drain(name)
+        if not deltas:
+            continue
+        try:
+            with transaction.atomic():
+                updated += _apply(name, deltas)
+        except Exception:
+            logger.exception('counters: error aplicando %s', name)
+            buffer.restore(name, deltas)
+    return updated
+
+
+def _exact_counts(counter):
+    totals = defaultdict(int)
+    for label, group_field, filters in counter.sources:
+        rows = apps.get_model(label).objects.filter(**filters).order_by().values(
+            group_field
+        ).annotate(total=Count('pk')).values_list(group_field, 'total')
+        for obj_id, total in rows.iterator():
+            totals[obj_id] += total
+    return totals
+
+
+def reconcile(names=None, batch_size=1000):
+    """
+    Recalcula los contadores a partir de sus tablas de origen
+    Una consulta agregada por tabla de origen; solo se escriben las filas
+    con diferencias
+
+    Returns:
+        dict: {contador: filas corregidas}
+    """
+    flush()
+
+    fixed = {}
+    for name in names or COUNTERS:
+        counter = COUNTERS[name]
+        model = apps.get_model(counter.model)
+        key_attr = model._meta.pk.attname if counter.key == 'pk' else counter.key
+
+        exact = _exact_counts(counter)
+        stale = []
+        changed = {}
+        for obj in model.objects.only(key_attr, counter.field).iterator(chunk_size=batch_size):
+            obj_id = getattr(obj, key_attr)
+            value = exact.get(obj_id, 0)
+            if getattr(obj, counter.field) != value:
+                changed[obj_id] = value - getattr(obj, counter.field)
+                setattr(obj, counter.field, value)
+                stale.append(obj)
+
+        model.objects.bulk_update(stale, [counter.field], batch_size=batch_size)
+        if changed:
+            transaction.on_commit(lambda name=name, changed=changed: _applied(name, changed))
+        fixed[name] = len(stale)
+    return fixed
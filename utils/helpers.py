@@ -0,0 +1,41 @@
+"""
+Funciones auxiliares compartidas por las apps de UnicoNet
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+class QueryStats:
+    """
+    Resultado de query_counter: número de consultas y tiempo transcurrido
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.started = time.perf_counter()
+        self.elapsed_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def query_counter():
+    """
+    Cuenta las consultas SQL y mide la latencia de un bloque
+    No depende de DEBUG, por lo que sirve en producción
+
+    Uso:
+        with query_counter() as stats:
+            ...
+        logger.info('%s consultas en %.1f ms', stats.queries, stats.elapsed_ms)
+    """
+    stats = QueryStats()
+    with connection.execute_wrapper(stats):
+        try:
+            yield stats
+        finally:
+            stats.elapsed_ms = (time.perf_counter() - stats.started) * 1000
@@ -0,0 +1,78 @@
+"""
+Mixins reutilizables para los modelos de UnicoNet
+"""
+
+
+class DirtyFieldsMixin:
+    """
+    Registro de campos modificados de un modelo
+
+    Guarda los valores con los que se cargó la instancia desde la base de
+    datos (o con los que se guardó por última vez) para saber qué cambió
+    sin volver a consultarla.
+
+    TRACKED_FIELDS limita los campos registrados (por attname); None
+    registra todos los campos concretos cargados
+    """
+
+    TRACKED_FIELDS = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {}
+        instance._snapshot(dict(zip(field_names, values)))
+        return instance
+
+    def _snapshot(self, values):
+        tracked = self.TRACKED_FIELDS
+        self._loaded_values.update(
+            (name, value) for name, value in values.items()
+            if tracked is None or name in tracked
+        )
+
+    def _refresh_snapshot(self, update_fields=None):
+        if update_fields is None:
+            names = [field.attname for field in self._meta.concrete_fields]
+        else:
+            names = [self._meta.get_field(name).attname for name in update_fields]
+
+        # Leer un campo diferido dispararía una consulta
+        deferred = self.get_deferred_fields()
+        self._snapshot({
+            name: getattr(self, name) for name in names if name not in deferred
+        })
+
+    def is_field_loaded(self, name):
+        """
+        Indica si se conoce el valor original del campo
+        """
+        return name in getattr(self, '_loaded_values', {})
+
+    def get_loaded_value(self, name, default=None):
+        """
+        Valor del campo al cargarse (o en el último save)
+        """
+        return getattr(self, '_loaded_values', {}).get(name, default)
+
+    def get_dirty_fields(self):
+        """
+        Campos registrados cuyo valor cambió
+
+        Returns:
+            dict: {attname: valor original}
+        """
+        return {
+            name: value
+            for name, value in getattr(self, '_loaded_values', {}).items()
+            if getattr(self, name) != value
+        }
+
+    def has_changed(self, name):
+        return name in self.get_dirty_fields()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        self._refresh_snapshot(kwargs.get('update_fields'))
@@ -0,0 +1,215 @@
+"""
+Paginación por cursor (keyset) para listados de publicaciones
+A diferencia de Paginator no ejecuta COUNT(*) ni OFFSET: cada página es una
+lectura por rango sobre el índice, por lo que la página 500 cuesta lo mismo
+que la primera
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# (-is_pinned, -created_at, -id): lo sirven los índices compuestos de Post
+# (-is_pinned, -created_at, -id) y (author, -is_pinned, -created_at, -id);
+# todas las columnas van en el mismo sentido para que el índice también
+# acote la condición del cursor
+DEFAULT_POST_ORDERING = ('-is_pinned', '-created_at', '-id')
+
+
+# ============================================================================
+# CODIFICACIÓN DE CURSORES
+# ============================================================================
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return parse_datetime(value['dt'])
+    return value
+
+
+def encode_cursor(values):
+    """
+    Convierte los valores de la clave de ordenamiento en un token opaco
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """
+    Decodifica un token de cursor
+    Retorna None si el token es inválido o no corresponde al ordenamiento
+    """
+    if not token:
+        return None
+
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != size:
+        return None
+
+    return [_decode_value(value) for value in values]
+
+
+# ============================================================================
+# PAGINADOR
+# ============================================================================
+
+class CursorPage:
+    """
+    Página de resultados de CursorPaginator
+    Expone la misma interfaz básica que Page (iterable, has_next, has_previous)
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _query(self, key, cursor):
+        params = self.params.copy() if self.params is not None else {}
+        for name in ('after', 'before', 'page'):
+            params.pop(name, None)
+        params[key] = cursor
+        if hasattr(params, 'urlencode'):
+            return params.urlencode()
+        from urllib.parse import urlencode
+        return urlencode(params)
+
+    @property
+    def next_query(self):
+        """Query string para enlazar a la página siguiente"""
+        return self._query('after', self.next_cursor) if self.has_next else ''
+
+    @property
+    def previous_query(self):
+        """Query string para enlazar a la página anterior"""
+        return self._query('before', self.previous_cursor) if self.has_previous else ''
+
+
+class CursorPaginator:
+    """
+    Paginador keyset sobre un QuerySet
+
+    Args:
+        queryset: QuerySet a paginar
+        per_page: Elementos por página
+        ordering: Campos de ordenamiento; el último debe ser único (ej. 'id')
+    """
+
+    def __init__(self, queryset, per_page, ordering=DEFAULT_POST_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = [field.startswith('-') for field in self.ordering]
+
+    def _keyset_filter(self, values, forward):
+        """
+        Construye (f1 < v1) OR (f1 = v1 AND f2 < v2) OR ...
+        respetando el sentido de cada campo
+        """
+        condition = Q()
+        equal = Q()
+
+        for field, descending, value in zip(self.fields, self.descending, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+
+        return condition
+
+    def _cursor_for(self, obj):
+        return encode_cursor([getattr(obj, field) for field in self.fields])
+
+    def get_page(self, after=None, before=None, params=None):
+        """
+        Obtiene una página
+
+        Args:
+            after: Token del último elemento de la página anterior
+            before: Token del primer elemento de la página siguiente
+            params: QueryDict de la petición (para construir enlaces)
+
+        Returns:
+            CursorPage
+        """
+        size = len(self.fields)
+        after_values = decode_cursor(after, size)
+        before_values = decode_cursor(before, size) if after_values is None else None
+
+        queryset = self.queryset
+
+        if before_values is not None:
+            reverse_ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ]
+            queryset = queryset.filter(
+                self._keyset_filter(before_values, forward=False)
+            ).order_by(*reverse_ordering)
+            items = list(queryset[:self.per_page + 1])
+            has_more = len(items) > self.per_page
+            items = list(reversed(items[:self.per_page]))
+
+            next_cursor = self._cursor_for(items[-1]) if items else None
+            previous_cursor = self._cursor_for(items[0]) if items and has_more else None
+        else:
+            queryset = queryset.order_by(*self.ordering)
+            if after_values is not None:
+                queryset = queryset.filter(self._keyset_filter(after_values, forward=True))
+            items = list(queryset[:self.per_page + 1])
+            has_more = len(items) > self.per_page
+            items = items[:self.per_page]
+
+            next_cursor = self._cursor_for(items[-1]) if items and has_more else None
+            previous_cursor = self._cursor_for(items[0]) if items and after_values is not None else None
+
+        return CursorPage(items, next_cursor, previous_cursor, params)
+
+
+def paginate_cursor(request, queryset, per_page, ordering=DEFAULT_POST_ORDERING):
+    """
+    Atajo para paginar un QuerySet con los parámetros ?after= / ?before=
+    """
+    paginator = CursorPaginator(queryset, per_page, ordering)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        params=request.GET
+    )
@@ -0,0 +1,33 @@
+"""
+Fábricas compartidas por los tests de las apps de UnicoNet
+
+Uso:
+    from utils.testing import make_post, make_user
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+
+def make_user(username):
+    return get_user_model().objects.create_user(
+        username=username, email=f'{username}@example.com', password='secret'
+    )
+
+
+def make_post(author, days_ago=0, **fields):
+    """
+    Crea un post (público por defecto) y, si se indica, retrocede su fecha
+    de creación
+    """
+    from apps.posts.models import Post
+
+    fields.setdefault('privacy', 'public')
+    post = Post.objects.create(author=author, content=fields.pop('content', 'hola'), **fields)
+    if days_ago:
+        Post.objects.filter(pk=post.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        post.refresh_from_db()
+    return post